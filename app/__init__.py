@@ -7,14 +7,28 @@ Returns:
 """
 from math import e
 from flask import Flask
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as _Session
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from config import Config
 
 
 
-db = SQLAlchemy()
+class Session(_Session):
+    """Session qui envoie les requêtes sur les idées au shard courant (cf. app/shards.py)."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            shards = current_app.extensions.get('shards')
+            engine = shards.engine_for(mapper, clause) if shards is not None else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': Session})
 migrate = Migrate()
 login_manager = LoginManager()
 
@@ -43,6 +57,82 @@ def create_app(config_class=Config):
     
     login_manager.login_view = 'main.login'
 
+    # Hachage des mots de passe borné, connexions échouées limitées
+    from app import passwords
+    passwords.init_app(app)
+
+    # Idées réparties entre plusieurs bases SQLite (IDEA_SHARDS)
+    from app import shards
+    shards.init_app(app)
+
+    # Logs JSON écrits hors des threads de requête
+    from app import logs
+    logs.init_app(app)
+
+    # Compression gzip/brotli et fichiers statiques versionnés
+    from app import assets
+    assets.init_app(app)
+
+    # Gabarits compilés en cache et pages statiques en mémoire
+    from app import pages
+    pages.init_app(app)
+
+    # Compteurs de tags mis à jour à chaque écriture d'idée
+    from app import tag_stats
+    tag_stats.init_app(app)
+
+    # Index de préfixes pour l'autocomplétion des tags
+    from app import tag_suggest
+    tag_suggest.init_app(app)
+
+    # Purge par lots des suppressions logiques
+    from app import purge
+    purge.init_app(app)
+
+    # Signatures MinHash pour la détection des quasi-doublons
+    from app import similarity
+    similarity.init_app(app)
+
+    # Import en masse multi-format (pool de processus pour les archives)
+    from app import importer
+    importer.init_app(app)
+
+    # Idées liées (TF-IDF local)
+    from app import related
+    related.init_app(app)
+
+    # Dashboard admin en direct (SSE)
+    from app import live
+    live.init_app(app)
+
+    # Migrations de données par lots, reprenables
+    from app import backfill
+    backfill.init_app(app)
+
+    # Journal des modifications (synchronisation incrémentale)
+    from app import changes
+    changes.init_app(app)
+
+    # Publication programmée des idées
+    from app import scheduler
+    scheduler.init_app(app)
+
+    # Rendu Markdown des descriptions (HTML stocké)
+    from app import rendering
+    rendering.init_app(app)
+
+    # Archivage des idées publiées anciennes
+    from app import archive
+    archive.init_app(app)
+
+    # Lancement en production (flask serve)
+    from app import serve
+    serve.init_app(app)
+
+    # Client Gemini partagé
+    from app import ai
+    ai.init_app(app)
+
     from app import routes, models, forms
     from app.routes import bp
     
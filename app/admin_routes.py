@@ -1,12 +1,18 @@
 # admin_routes.py - À ajouter dans votre dossier app/
 
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, flash, redirect, url_for, stream_with_context
 from flask_login import login_required, current_user
 from functools import wraps
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from app import db
-from app.models import User, Idea
+from app import live, read_models, shards
+from app.analytics import WEEKDAY_NAMES, activity_heatmap
+from app.logs import LEVELS, tail
+from app.models import User, Idea, IdeaSignature
+from app.purge import soft_delete_idea, soft_delete_user
+from app.similarity import duplicate_clusters
+from app.tag_stats import tag_pairs, tag_trends, top_tags
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -27,14 +33,16 @@ def dashboard():
     """Page principale du tableau de bord admin"""
     # Statistiques générales
     total_users = User.query.count()
-    total_ideas = Idea.query.count()
+    # une requête groupée par shard (cf. app/shards.py)
+    ideas_by_status = read_models.idea_status_counts()
+    total_ideas = sum(ideas_by_status.values())
     active_users = User.query.filter(
         User.created_at >= datetime.utcnow() - timedelta(days=30)
     ).count()
     
     # Calcul du taux d'engagement (exemple basique)
-    published_ideas = Idea.query.filter_by(status='Published').count()
-    draft_ideas = Idea.query.filter_by(status='Draft').count()
+    published_ideas = ideas_by_status.get('Published', 0)
+    draft_ideas = ideas_by_status.get('Draft', 0)
     engagement_rate = (published_ideas / total_ideas * 100) if total_ideas > 0 else 0
     
     # Croissance mensuelle des utilisateurs
@@ -46,14 +54,9 @@ def dashboard():
     ).count()
     user_growth = ((users_last_month - previous_month) / previous_month * 100) if previous_month > 0 else 0
     
-    # Statistiques des idées par statut
-    ideas_by_status = db.session.query(
-        Idea.status, func.count(Idea.id)
-    ).group_by(Idea.status).all()
-    
     # Activité récente
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-    recent_ideas = Idea.query.order_by(Idea.timestamp.desc()).limit(10).all()
+    recent_ideas = read_models.admin_idea_page(1, per_page=10).items
     
     return render_template('admin/dashboard.html',
                          total_users=total_users,
@@ -61,7 +64,7 @@ def dashboard():
                          active_users=active_users,
                          engagement_rate=round(engagement_rate, 1),
                          user_growth=round(user_growth, 1),
-                         ideas_by_status=dict(ideas_by_status),
+                         ideas_by_status=ideas_by_status,
                          recent_users=recent_users,
                          recent_ideas=recent_ideas)
 
@@ -73,22 +76,10 @@ def users_management():
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     
-    users_query = User.query
-    if search:
-        users_query = users_query.filter(User.username.contains(search))
-    
-    users = users_query.paginate(
-        page=page, per_page=20, error_out=False
-    )
+    users = read_models.admin_user_page(page, per_page=20, search=search)
     
     # Statistiques des utilisateurs
-    user_stats = {
-        'total': User.query.count(),
-        'active': User.query.filter(
-            User.created_at >= datetime.utcnow() - timedelta(days=30)
-        ).count(),
-        'admin': User.query.filter_by(is_admin=True).count()
-    }
+    user_stats = read_models.user_counts()
     
     return render_template('admin/users.html', 
                          users=users, 
@@ -121,10 +112,8 @@ def delete_user(user_id):
     if user.id == current_user.id:
         return jsonify({'error': 'Cannot delete your own account'}), 400
     
-    # Supprimer aussi toutes les idées de l'utilisateur
-    Idea.query.filter_by(user_id=user_id).delete()
-    db.session.delete(user)
-    db.session.commit()
+    # Suppression logique : ses idées sont supprimées par lots par la purge (app/purge.py)
+    soft_delete_user(user)
     
     flash(f'🗑️ User {user.username} deleted successfully', 'success')
     return jsonify({'success': True})
@@ -138,22 +127,15 @@ def ideas_management():
     status_filter = request.args.get('status', '')
     search = request.args.get('search', '')
     
-    ideas_query = Idea.query
-    if status_filter:
-        ideas_query = ideas_query.filter_by(status=status_filter)
-    if search:
-        ideas_query = ideas_query.filter(Idea.title.contains(search))
-    
-    ideas = ideas_query.order_by(Idea.timestamp.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    ideas = read_models.admin_idea_page(page, per_page=20, status=status_filter, search=search)
     
     # Statistiques des idées
+    counts = read_models.idea_status_counts()
     idea_stats = {
-        'total': Idea.query.count(),
-        'draft': Idea.query.filter_by(status='Draft').count(),
-        'published': Idea.query.filter_by(status='Published').count(),
-        'to_film': Idea.query.filter_by(status='To Film').count()
+        'total': sum(counts.values()),
+        'draft': counts.get('Draft', 0),
+        'published': counts.get('Published', 0),
+        'to_film': counts.get('To Film', 0)
     }
     
     return render_template('admin/ideas.html', 
@@ -167,11 +149,12 @@ def ideas_management():
 @admin_required
 def delete_idea(idea_id):
     """Supprimer une idée"""
-    idea = Idea.query.get_or_404(idea_id)
-    db.session.delete(idea)
-    db.session.commit()
+    with shards.use(shards.locate(idea_id)):
+        idea = Idea.query.get_or_404(idea_id)
+        title = idea.title
+        soft_delete_idea(idea)
     
-    flash(f'🗑️ Idea "{idea.title}" deleted successfully', 'success')
+    flash(f'🗑️ Idea "{title}" deleted successfully', 'success')
     return jsonify({'success': True})
 
 @admin_bp.route('/analytics')
@@ -194,35 +177,19 @@ def analytics():
         months.append(month_start.strftime('%b %Y'))
         user_counts.append(count)
     
-    # Répartition des idées par catégorie (basé sur les tags)
-    tag_counts = {}
-    ideas_with_tags = Idea.query.filter(Idea.tags.isnot(None)).all()
-    for idea in ideas_with_tags:
-        if idea.tags:
-            tags = [tag.strip().lower() for tag in idea.tags.split(',')]
-            for tag in tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-    
-    # Top 5 des tags
-    top_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-    published_ideas = Idea.query.filter_by(status='Published').count()
-    # Activité par jour de la semaine
-    weekday_activity = {}
-    for i in range(7):  # 0 = lundi, 6 = dimanche
-        count = Idea.query.filter(
-            func.extract('dow', Idea.timestamp) == i
-        ).count()
-        weekday_activity[i] = count
+    # Top 5 des tags (compteurs maintenus à chaque écriture, cf. app/tag_stats.py)
+    popular_tags = top_tags(5)
+    ideas_by_status = read_models.idea_status_counts()
+    # L'activité par jour/heure est chargée par la page via /api/charts/activity-heatmap
     
     return render_template('admin/analytics.html',
                          total_users=User.query.count(),
-                         total_ideas=Idea.query.count(),
-                         published_ideas=published_ideas,
+                         total_ideas=sum(ideas_by_status.values()),
+                         published_ideas=ideas_by_status.get('Published', 0),
                          active_users=User.query.filter(User.created_at >= datetime.utcnow() - timedelta(days=30)).count(),
                          months=months,
                          user_counts=user_counts,
-                         top_tags=top_tags,
-                         weekday_activity=weekday_activity)
+                         top_tags=popular_tags)
 
 @admin_bp.route('/settings', methods=['GET', 'POST'])
 @login_required
@@ -241,50 +208,40 @@ def settings():
 @login_required
 @admin_required
 def system_logs():
-    """Logs du système"""
-    # Ici vous pourriez implémenter la lecture des logs
-    # depuis un fichier ou une base de données
-    logs = [
-        {
-            'timestamp': datetime.utcnow() - timedelta(minutes=2),
-            'level': 'INFO',
-            'message': f'User login: {current_user.username}'
-        },
-        {
-            'timestamp': datetime.utcnow() - timedelta(minutes=5),
-            'level': 'DEBUG',
-            'message': 'Database connection established'
-        },
-        {
-            'timestamp': datetime.utcnow() - timedelta(minutes=8),
-            'level': 'WARN',
-            'message': 'High memory usage detected: 85%'
-        }
-    ]
-    
-    return render_template('admin/logs.html', logs=logs)
+    """Derniers logs du système (lus depuis la fin du fichier)"""
+    level = request.args.get('level') or None
+    search = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    since = _parse_datetime(request.args.get('since'))
+    until = _parse_datetime(request.args.get('until'))
+    logs = tail(current_app.extensions['logs'], limit, level, since, until, search,
+                current_app.config['LOG_BACKUP_COUNT'])
+    for entry in logs:
+        entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+    return render_template('admin/logs.html', logs=logs, levels=LEVELS, level=level, search=search,
+                           limit=limit, since=request.args.get('since', ''), until=request.args.get('until', ''))
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
 
 # API endpoints pour les données en temps réel
 @admin_bp.route('/api/dashboard/stats')
 @login_required
 @admin_required
 def dashboard_stats():
-    """API pour les statistiques du dashboard"""
-    return jsonify({
-        'total_users': User.query.count(),
-        'total_ideas': Idea.query.count(),
-        'active_users': User.query.filter(
-            User.created_at >= datetime.utcnow() - timedelta(hours=24)
-        ).count(),
-        'recent_activity': [
-            {
-                'type': 'user_registered',
-                'user': user.username,
-                'timestamp': user.created_at.isoformat()
-            }
-            for user in User.query.order_by(User.created_at.desc()).limit(5)
-        ]
-    })
+    """API pour les statistiques du dashboard (instantané partagé)"""
+    return jsonify(current_app.extensions['dashboard_feed'].current()[1])
+
+@admin_bp.route('/api/dashboard/stream')
+@login_required
+@admin_required
+def dashboard_stream():
+    """Flux SSE : instantané des statistiques puis deltas à chaque écriture"""
+    return Response(stream_with_context(live.stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @admin_bp.route('/api/charts/user-growth')
 @login_required
@@ -302,4 +259,62 @@ def chart_user_growth():
             'count': count
         })
     
-    return jsonify(data)
\ No newline at end of file
+    return jsonify(data)
+
+@admin_bp.route('/api/charts/activity-heatmap')
+@login_required
+@admin_required
+def chart_activity_heatmap():
+    """Activité (jour de la semaine x heure), globale ou pour un utilisateur"""
+    user_id = request.args.get('user_id', type=int)
+    matrix = activity_heatmap(user_id)
+    return jsonify({
+        'days': WEEKDAY_NAMES,
+        'hours': list(range(24)),
+        'matrix': matrix,
+        'weekday_totals': [sum(row) for row in matrix],
+        'total': sum(map(sum, matrix))
+    })
+
+@admin_bp.route('/api/charts/tags')
+@login_required
+@admin_required
+def chart_tags():
+    """Top tags, co-occurrences et tendance mensuelle sur 12 mois"""
+    n = min(request.args.get('n', 10, type=int), 100)
+    user_id = request.args.get('user_id', type=int)
+    top = top_tags(n, user_id=user_id)
+    since = (datetime.utcnow().replace(day=1) - timedelta(days=365)).strftime('%Y-%m')
+    return jsonify({
+        'top': [{'tag': tag, 'count': count} for tag, count in top],
+        'pairs': [{'tags': [a, b], 'count': count} for a, b, count in tag_pairs(n)],
+        'trends': tag_trends([tag for tag, _ in top], since_month=since)
+    })
+
+@admin_bp.route('/api/purge/status')
+@login_required
+@admin_required
+def purge_status():
+    """Avancement de la purge des suppressions logiques"""
+    return jsonify(current_app.extensions['purge'].as_dict())
+
+@admin_bp.route('/api/duplicates')
+@login_required
+@admin_required
+def duplicates_report():
+    """Groupes d'idées quasi identiques, par utilisateur"""
+    threshold = request.args.get('threshold', type=float)
+    user_id = request.args.get('user_id', type=int)
+    if user_id:
+        user_ids = [user_id]
+    else:
+        query = db.select(IdeaSignature.user_id).distinct()
+        user_ids = sorted({uid for part in shards.fan_out(lambda: db.session.scalars(query).all()) for uid in part})
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids)))
+    report = []
+    for uid in user_ids:
+        with shards.use(shards.shard_of(uid)):
+            clusters = duplicate_clusters(uid, threshold)
+        if clusters:
+            report.append({'user_id': uid, 'username': usernames.get(uid), 'clusters': clusters})
+    return jsonify(report)
@@ -0,0 +1,59 @@
+"""
+Accès au modèle Gemini.
+
+Un seul client par processus (connexions HTTP réutilisées). ``GEMINI_BASE_URL``
+permet de viser un autre serveur compatible, par exemple le faux modèle de
+``benchmarks/fake_model_server.py``. Sans ``GEMINI_API_KEY``, ``client()``
+lève ``AIUnavailable``.
+
+L'appel est bloquant : en mode synchrone il occupe un worker pendant toute la
+génération. En mode asynchrone (``gunicorn.conf.py`` avec
+``GUNICORN_WORKER_CLASS=gevent``), les sockets sont coopératives et un worker
+sert d'autres requêtes pendant l'attente.
+"""
+import threading
+
+from flask import current_app
+from google import genai
+from google.genai import types
+
+_lock = threading.Lock()
+
+
+class AIUnavailable(RuntimeError):
+    pass
+
+
+def init_app(app):
+    app.extensions['ai'] = {'client': None}
+
+
+def client():
+    state = current_app.extensions['ai']
+    with _lock:
+        if state['client'] is None:
+            config = current_app.config
+            if not config['GEMINI_API_KEY']:
+                raise AIUnavailable('GEMINI_API_KEY is not set: AI suggestions are disabled')
+            state['client'] = genai.Client(
+                api_key=config['GEMINI_API_KEY'],
+                http_options=types.HttpOptions(base_url=config['GEMINI_BASE_URL'],
+                                               timeout=int(config['GEMINI_TIMEOUT'] * 1000)))
+        return state['client']
+
+
+def generate(prompt, schema=None):
+    """Textes renvoyés par le modèle pour ``prompt`` (un par partie de réponse).
+
+    ``schema`` (``types.Schema``) : réponse JSON structurée selon ce schéma.
+    """
+    config = None
+    if schema is not None:
+        config = types.GenerateContentConfig(response_mime_type='application/json', response_schema=schema)
+    response = client().models.generate_content(model=current_app.config['GEMINI_MODEL'],
+                                                contents=prompt, config=config)
+    texts = []
+    for candidate in (response.candidates or []) if response else []:
+        if candidate.content and candidate.content.parts:
+            texts.extend(part.text for part in candidate.content.parts if part.text)
+    return texts
@@ -0,0 +1,51 @@
+"""
+Requêtes d'agrégation pour les pages d'analytics admin.
+
+Les fonctions de date diffèrent d'un moteur à l'autre (SQLite n'a pas
+``extract('dow')``), d'où les expressions choisies selon le dialecte. Avec
+des shards, la matrice globale additionne celle de chaque shard.
+"""
+from sqlalchemy import Integer, cast, extract, func
+
+from app import db, shards
+from app.models import Idea
+
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def _weekday_hour_columns(column):
+    """Expressions (jour de la semaine, heure) ; le jour vaut 0 pour dimanche."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return (cast(func.strftime('%w', column), Integer),
+                cast(func.strftime('%H', column), Integer))
+    if dialect in ('mysql', 'mariadb'):
+        return func.dayofweek(column) - 1, func.hour(column)
+    return cast(extract('dow', column), Integer), cast(extract('hour', column), Integer)
+
+
+def activity_heatmap(user_id=None):
+    """Nombre d'idées créées par jour de la semaine et par heure.
+
+    Une seule requête groupée. Retourne une matrice 7 x 24 dont la première
+    ligne est le lundi (comme ``datetime.weekday()``).
+    """
+    if user_id is not None:
+        with shards.use(shards.shard_of(user_id)):
+            return _heatmap(user_id)
+    matrix = [[0] * 24 for _ in range(7)]
+    for part in shards.fan_out(_heatmap, None):
+        for row, values in zip(matrix, part):
+            row[:] = map(sum, zip(row, values))
+    return matrix
+
+
+def _heatmap(user_id):
+    weekday, hour = _weekday_hour_columns(Idea.timestamp)
+    query = db.session.query(weekday, hour, func.count(Idea.id)).filter(Idea.timestamp.isnot(None))
+    if user_id is not None:
+        query = query.filter(Idea.user_id == user_id)
+    matrix = [[0] * 24 for _ in range(7)]
+    for dow, hr, count in query.group_by(weekday, hour):
+        matrix[(int(dow) + 6) % 7][int(hr)] = count
+    return matrix
@@ -0,0 +1,194 @@
+"""
+Archivage des idées publiées anciennes (table froide ``archived_idea``).
+
+Les idées ``Published`` créées il y a plus de ``ARCHIVE_AFTER_DAYS`` jours
+quittent la table ``idea`` : ses index, ses ``count()`` et les structures
+dérivées (compteurs de tags, vecteurs, signatures) ne portent plus que sur
+le travail en cours. L'idée est conservée dans ``archived_idea`` sous le
+même id, le contenu compressé (JSON + zlib) ; seuls ``user_id``,
+``timestamp`` et ``tags`` restent en clair pour filtrer.
+
+Lecture transparente : ``get`` (page d'une idée, export unitaire),
+``search`` (recherche par tags du dashboard) et ``rows`` (export ZIP)
+relisent l'archive quand l'idée n'est plus dans la table chaude. Une idée
+archivée est en lecture seule ; ``restore`` la remet dans ``idea``.
+
+``flask archive run`` (à planifier) archive par lots ;
+``flask archive restore`` restaure des idées ou tout un utilisateur.
+
+La table ``idea`` est en AUTOINCREMENT sous SQLite : l'id d'une idée
+archivée n'est pas réattribué. ``restore`` refuse toutefois (``ArchiveError``)
+une idée dont l'id a déjà été repris, dans une base antérieure à ce réglage.
+"""
+import json
+import zlib
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select
+
+from app import db
+from app.models import ArchivedIdea, Idea
+from app.signals import IdeaChange, deleted_changes, notify, tracked_values
+from app.tag_stats import split_tags
+
+archive_cli = AppGroup('archive', help='Archivage des idées publiées anciennes.')
+
+# colonnes compressées dans ``payload``
+_PACKED = ('title', 'description', 'status', 'scheduled_at', 'published_at', 'description_html', 'description_hash')
+_DATES = ('scheduled_at', 'published_at')
+
+
+class ArchiveError(RuntimeError):
+    pass
+
+
+def init_app(app):
+    app.cli.add_command(archive_cli)
+
+
+class ArchivedIdeaView:
+    """Idée archivée décompressée, avec les attributs lus par les gabarits d'une ``Idea``."""
+    archived = True
+
+    def __init__(self, row):
+        self.id = row.id
+        self.user_id = row.user_id
+        self.timestamp = row.timestamp
+        self.tags = row.tags
+        self.archived_at = row.archived_at
+        values = json.loads(zlib.decompress(row.payload))
+        for field in _DATES:
+            if values.get(field):
+                values[field] = datetime.fromisoformat(values[field])
+        if 'published_at' not in values and values.get('status') == 'Published':
+            # archivée avant published_at : la date programmée était la date de publication
+            values['published_at'], values['scheduled_at'] = values.get('scheduled_at'), None
+        for field in _PACKED:
+            setattr(self, field, values.get(field))
+        self.deleted_at = None
+
+
+def _pack(idea_row):
+    values = {field: getattr(idea_row, field) for field in _PACKED}
+    for field in _DATES:
+        if values[field] is not None:
+            values[field] = values[field].isoformat()
+    return zlib.compress(json.dumps(values, ensure_ascii=False).encode(), 6)
+
+
+def _candidates(cutoff, batch_size):
+    query = (select(Idea.id).where(Idea.status == 'Published', Idea.timestamp < cutoff)
+             .order_by(Idea.id).limit(batch_size))
+    return db.session.scalars(query).all()
+
+
+def archive(days, batch_size=500, report=None):
+    """Archive les idées publiées créées il y a plus de ``days`` jours ; retourne leur nombre."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+    while True:
+        ids = _candidates(cutoff, batch_size)
+        if not ids:
+            return archived
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(Idea.id, Idea.user_id, Idea.timestamp, Idea.tags, *(getattr(Idea, f) for f in _PACKED))
+            .where(Idea.id.in_(ids))).all()
+        db.session.execute(insert(ArchivedIdea), [
+            {'id': row.id, 'user_id': row.user_id, 'timestamp': row.timestamp, 'tags': row.tags,
+             'archived_at': now, 'payload': _pack(row)} for row in rows])
+        # retirée de la table chaude : les tables dérivées la traitent comme une suppression
+        notify(db.session, deleted_changes(db.session, Idea.id.in_(ids)))
+        db.session.execute(delete(Idea).where(Idea.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        archived += len(rows)
+        if report:
+            report(f'{archived} idée(s) archivée(s)')
+
+
+def restore(ids=None, user_id=None):
+    """Remet dans ``idea`` les idées archivées ``ids`` (ou toutes celles de ``user_id``)."""
+    query = select(ArchivedIdea)
+    if ids is not None:
+        query = query.where(ArchivedIdea.id.in_(list(ids)))
+    if user_id is not None:
+        query = query.where(ArchivedIdea.user_id == user_id)
+    views = [ArchivedIdeaView(row) for row in db.session.scalars(query)]
+    if not views:
+        return 0
+    taken = db.session.scalars(select(Idea.id).where(Idea.id.in_([view.id for view in views]))).all()
+    if taken:
+        db.session.rollback()
+        raise ArchiveError(f"Idea id(s) {', '.join(map(str, sorted(taken)))} already used by another idea")
+    db.session.execute(insert(Idea), [
+        dict({field: getattr(view, field) for field in _PACKED},
+             id=view.id, user_id=view.user_id, timestamp=view.timestamp, tags=view.tags) for view in views])
+    restored = [view.id for view in views]
+    notify(db.session, [IdeaChange.make(id, None, values) for id, values in
+                        tracked_values(db.session, Idea.id.in_(restored)).items()])
+    db.session.execute(delete(ArchivedIdea).where(ArchivedIdea.id.in_(restored)))
+    db.session.commit()
+    return len(views)
+
+
+def get(idea_id):
+    """Idée archivée ``idea_id`` (``ArchivedIdeaView``) ou None."""
+    row = db.session.get(ArchivedIdea, idea_id)
+    return ArchivedIdeaView(row) if row is not None else None
+
+
+def search(user_id, tags, limit=20):
+    """Idées archivées de l'utilisateur portant tous les ``tags``, les plus récentes d'abord."""
+    query = select(ArchivedIdea).where(ArchivedIdea.user_id == user_id)
+    for tag in tags:
+        query = query.where(ArchivedIdea.tags.contains(tag))  # préfiltre, vérifié ci-dessous
+    views = []
+    for row in db.session.scalars(query.order_by(ArchivedIdea.timestamp.desc())):
+        if all(tag in split_tags(row.tags) for tag in tags):
+            views.append(ArchivedIdeaView(row))
+            if len(views) == limit:
+                break
+    return views
+
+
+def rows(user_id, status=None, since=None, until=None, chunk_size=500):
+    """Idées archivées de l'utilisateur pour l'export, par tranches (pagination par id)."""
+    query = select(ArchivedIdea).where(ArchivedIdea.user_id == user_id)
+    if since:
+        query = query.where(ArchivedIdea.timestamp >= since)
+    if until:
+        query = query.where(ArchivedIdea.timestamp < until + timedelta(days=1))
+    last_id = 0
+    while True:
+        chunk = db.session.scalars(query.where(ArchivedIdea.id > last_id)
+                                   .order_by(ArchivedIdea.id).limit(chunk_size)).all()
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+        views = [ArchivedIdeaView(row) for row in chunk]
+        yield [view for view in views if not status or view.status == status]
+
+
+@archive_cli.command('run')
+@click.option('--days', type=int, default=None, help='Âge minimal en jours.')
+@click.option('--batch-size', type=int, default=500)
+def archive_command(days, batch_size):
+    """Archive les idées publiées anciennes."""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    click.echo(f'Archivage terminé : {archive(days, batch_size, report=click.echo)} idée(s).')
+
+
+@archive_cli.command('restore')
+@click.argument('ids', nargs=-1, type=int)
+@click.option('--user-id', type=int, default=None, help='Restaure toutes les idées de cet utilisateur.')
+def restore_command(ids, user_id):
+    """Restaure des idées archivées (par id ou par utilisateur)."""
+    if not ids and user_id is None:
+        raise click.UsageError('Indiquez des ids ou --user-id.')
+    try:
+        click.echo(f'{restore(ids or None, user_id)} idée(s) restaurée(s).')
+    except ArchiveError as exc:
+        raise click.ClickException(str(exc))
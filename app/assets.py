@@ -0,0 +1,181 @@
+"""
+Compression des réponses et versionnement des fichiers statiques.
+
+- les réponses dynamiques (HTML, JSON, CSV...) au-delà de ``COMPRESS_MIN_SIZE``
+  sont compressées en brotli ou gzip selon ``Accept-Encoding`` ;
+- ``url_for('static', ...)`` ajoute ``?v=<hash du contenu>`` et ces URLs sont
+  servies avec un ``Cache-Control`` immutable ;
+- ``flask assets compress`` précompresse les fichiers statiques (``.gz``/``.br``)
+  qui sont ensuite servis directement.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel, gzip suffit sinon
+    brotli = None
+
+
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.json', '.html', '.txt', '.xml', '.svg', '.ico', '.map')
+
+# chemin absolu -> (mtime, hash) ; évite de relire le fichier à chaque url_for
+_digest_cache = {}
+
+assets_cli = AppGroup('assets', help='Gestion des fichiers statiques.')
+
+
+def init_app(app):
+    """Branche la compression et le versionnement statique sur l'application."""
+    app.url_defaults(_add_static_digest)
+    app.view_functions['static'] = serve_static
+    app.after_request(compress_response)
+    app.cli.add_command(assets_cli)
+
+
+def static_digest(filename):
+    """Hash court du contenu d'un fichier statique, ou None s'il n'existe pas."""
+    path = safe_join(current_app.static_folder, filename)
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    cached = _digest_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            md5.update(chunk)
+    digest = md5.hexdigest()[:12]
+    _digest_cache[path] = (mtime, digest)
+    return digest
+
+
+def _add_static_digest(endpoint, values):
+    if endpoint != 'static' or 'filename' not in values or 'v' in values:
+        return
+    digest = static_digest(values['filename'])
+    if digest:
+        values['v'] = digest
+
+
+def _preferred_encoding(available):
+    """Encodage de ``available`` au plus fort ``q`` chez le client (à égalité, l'ordre de ``available``)."""
+    accepted = request.accept_encodings
+    candidates = [encoding for encoding in available if accepted[encoding]]
+    return max(candidates, key=lambda encoding: accepted[encoding]) if candidates else None
+
+
+def dynamic_encoding():
+    """Encodage que ``compress_response`` utiliserait pour la requête courante."""
+    return _preferred_encoding(('br', 'gzip') if brotli is not None else ('gzip',))
+
+
+def serve_static(filename):
+    """Remplace la vue ``static`` de Flask : précompression et cache immutable."""
+    folder = current_app.static_folder
+    versioned = request.args.get('v')
+    fingerprinted = bool(versioned) and versioned == static_digest(filename)
+    if fingerprinted:
+        max_age = current_app.config['STATIC_MAX_AGE']
+    else:
+        max_age = current_app.get_send_file_max_age(filename)
+
+    path = safe_join(folder, filename)
+    available = [enc for enc, suffix in (('br', '.br'), ('gzip', '.gz'))
+                 if path and _is_fresh(path, path + suffix)]
+    encoding = _preferred_encoding(available) if available else None
+
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(folder, filename + suffix, mimetype=mimetype, max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(folder, filename, max_age=max_age)
+
+    if available:
+        response.vary.add('Accept-Encoding')
+    if fingerprinted:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+
+def _is_fresh(original, compressed):
+    try:
+        return os.stat(compressed).st_mtime >= os.stat(original).st_mtime
+    except OSError:
+        return False
+
+
+def compress_response(response):
+    """Compresse les réponses dynamiques textuelles assez volumineuses."""
+    config = current_app.config
+    if (response.status_code < 200 or response.status_code >= 300
+            or response.status_code == 204
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = dynamic_encoding()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=min(config['COMPRESS_LEVEL'], 11))
+    elif encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+@assets_cli.command('compress')
+@click.option('--force', is_flag=True, help='Recompresse même les fichiers à jour.')
+def compress_static(force):
+    """Précompresse les fichiers statiques en .gz (et .br si brotli est installé)."""
+    folder = current_app.static_folder
+    written = 0
+    for root, _dirs, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            outputs = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                outputs.append(('.br', lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in outputs:
+                target = path + suffix
+                if not force and _is_fresh(path, target):
+                    continue
+                payload = compress(data)
+                if len(payload) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(payload)
+                written += 1
+                click.echo(f'{os.path.relpath(target, folder)}: {len(data)} -> {len(payload)} octets')
+    click.echo(f'{written} fichier(s) précompressé(s).')
@@ -0,0 +1,221 @@
+"""
+Migrations de données en ligne, par lots et reprenables.
+
+Une migration Alembic ne change que le schéma (ajout de colonne, d'index :
+opérations rapides). Le travail sur les données est confié à un *backfill*
+qui tourne à côté du trafic normal :
+
+- les idées sont parcourues par id croissant (pagination par clé), par lots
+  de ``BACKFILL_BATCH_SIZE`` ; chaque lot est traité dans sa propre
+  transaction courte, qui enregistre aussi le point de reprise
+  (``BackfillState.last_id``) : un arrêt, même brutal, reprend au lot suivant ;
+- entre deux lots, une pause (``BACKFILL_PAUSE``) et un rapport cyclique
+  (``BACKFILL_DUTY_CYCLE`` : part du temps passée à travailler) laissent
+  passer les écritures des workers, en particulier sous SQLite ;
+- un seul processus à la fois traite un backfill donné (réservation de la
+  ligne ``BackfillState``, expirée après ``BACKFILL_LEASE`` secondes sans
+  nouvelle) ;
+- chaque lot affiche l'avancement, le débit et le temps restant estimé.
+
+Déclarer un backfill (au chargement du module qui possède les données) :
+
+    @register('tags_normalize', 'Normalise la colonne idea.tags')
+    def normalize(session, ids):
+        ...
+        return changed
+
+Depuis une migration Alembic, ``schedule(op, 'tags_normalize')`` le marque
+à lancer ; ``flask backfill run --pending`` exécute ensuite ceux en attente.
+
+Avec des shards (cf. app/shards.py), ``BackfillState`` reste dans la base
+centrale avec un point de reprise par shard : ``run`` traite les idées du
+shard courant, ``flask backfill run`` parcourt chaque shard (ou seulement
+celui choisi par ``flask shards each``). Un backfill marqué par une
+migration est en attente sur tout shard où il n'est pas terminé.
+"""
+import os
+import socket
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import column, func, insert, or_, select, table, update
+
+from app import db, shards
+from app.models import BackfillState, Idea
+
+backfill_cli = AppGroup('backfill', help='Migrations de données par lots.')
+
+Backfill = namedtuple('Backfill', 'name description process')
+
+REGISTRY = {}
+
+_ALL = {'include_deleted': True}
+
+
+class BackfillError(RuntimeError):
+    pass
+
+
+def register(name, description):
+    """Décorateur : déclare ``process(session, ids) -> lignes modifiées``."""
+    def decorator(process):
+        REGISTRY[name] = Backfill(name, description, process)
+        return process
+    return decorator
+
+
+def init_app(app):
+    app.cli.add_command(backfill_cli)
+
+
+def schedule(op, name):
+    """À appeler dans une migration Alembic : marque ``name`` comme à lancer (sur chaque shard)."""
+    # colonnes présentes depuis la création de la table, quelle que soit la révision en cours
+    state = table('backfill_state', column('name'), column('status'), column('last_id'),
+                  column('processed'), column('changed'))
+    bind = op.get_bind()
+    if bind.execute(select(state.c.name).where(state.c.name == name)).first() is None:
+        bind.execute(insert(state).values(name=name, status='pending', last_id=0, processed=0, changed=0))
+
+
+def _shard():
+    index = shards.current()
+    return 0 if index is None else index
+
+
+def pending_names():
+    """Backfills à lancer sur le shard courant : en attente, en pause, en échec, ou jamais lancés ici."""
+    states = dict(db.session.execute(
+        select(BackfillState.name, BackfillState.status).where(BackfillState.shard == _shard())).all())
+    scheduled = db.session.scalars(select(BackfillState.name).distinct().order_by(BackfillState.name))
+    return [name for name in scheduled if states.get(name, 'pending') in ('pending', 'paused', 'failed')]
+
+
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _claim(name, restart, lease):
+    """Réserve le backfill ``name`` pour ce processus ; retourne son état."""
+    session = db.session
+    now = datetime.utcnow()
+    key = (name, _shard())
+    if session.get(BackfillState, key) is None:
+        session.add(BackfillState(name=name, shard=key[1], status='pending', last_id=0, processed=0, changed=0))
+        session.flush()
+    values = {'owner': _owner(), 'heartbeat_at': now, 'status': 'running', 'error': None}
+    if restart:
+        values.update(last_id=0, processed=0, changed=0, started_at=now, finished_at=None)
+    claimed = session.execute(
+        update(BackfillState)
+        .where(BackfillState.name == name, BackfillState.shard == key[1],
+               or_(BackfillState.owner.is_(None), BackfillState.heartbeat_at < now - timedelta(seconds=lease)))
+        .values(**values)).rowcount
+    session.commit()
+    state = session.get(BackfillState, key)
+    if not claimed:
+        raise BackfillError(f'{name} est déjà en cours ({state.owner})')
+    if state.started_at is None:
+        state.started_at = now
+        session.commit()
+    return state
+
+
+def _release(name, **values):
+    db.session.rollback()
+    db.session.execute(update(BackfillState).where(BackfillState.name == name, BackfillState.shard == _shard(),
+                                                   BackfillState.owner == _owner())
+                       .values(owner=None, **values))
+    db.session.commit()
+
+
+def run(name, batch_size=None, pause=None, duty_cycle=None, restart=False, max_batches=None, report=None):
+    """Lance (ou reprend) le backfill ``name`` sur le shard courant ; retourne son ``BackfillState``."""
+    if name not in REGISTRY:
+        raise BackfillError(f'Backfill inconnu : {name}')
+    config = current_app.config
+    batch_size = batch_size or config['BACKFILL_BATCH_SIZE']
+    pause = config['BACKFILL_PAUSE'] if pause is None else pause
+    duty_cycle = duty_cycle or config['BACKFILL_DUTY_CYCLE']
+    process = REGISTRY[name].process
+    session = db.session
+    key = (name, _shard())
+
+    state = session.get(BackfillState, key)
+    if state is not None and state.status == 'done' and not restart:
+        return state
+    state = _claim(name, restart, config['BACKFILL_LEASE'])
+    last_id, processed, changed = state.last_id, state.processed, state.changed
+    remaining = session.scalar(select(func.count(Idea.id)).where(Idea.id > last_id).execution_options(**_ALL))
+    done, started, batches = 0, time.monotonic(), 0
+    try:
+        while max_batches is None or batches < max_batches:
+            batch_start = time.monotonic()
+            ids = session.scalars(select(Idea.id).where(Idea.id > last_id).order_by(Idea.id)
+                                  .limit(batch_size).execution_options(**_ALL)).all()
+            if not ids:
+                _release(name, status='done', finished_at=datetime.utcnow())
+                break
+            changed += process(session, ids) or 0
+            last_id, processed = ids[-1], processed + len(ids)
+            # point de reprise dans la même transaction que le lot
+            session.execute(update(BackfillState).where(BackfillState.name == name,
+                                                        BackfillState.shard == key[1]).values(
+                last_id=last_id, processed=processed, changed=changed, heartbeat_at=datetime.utcnow()))
+            session.commit()
+            batches += 1
+            done += len(ids)
+            elapsed = time.monotonic() - batch_start
+            if report:
+                rate = done / max(time.monotonic() - started, 1e-9)
+                eta = max(remaining - done, 0) / rate if rate else 0
+                report(f'{name} : {done}/{remaining} ({changed} modifiée(s) au total), '
+                       f'{rate:.0f} lignes/s, reste ~{eta:.0f}s')
+            # throttling : au plus ``duty_cycle`` du temps passé à travailler
+            time.sleep(max(pause, elapsed * (1 - duty_cycle) / duty_cycle))
+        else:
+            _release(name, status='paused')
+    except Exception as exc:
+        _release(name, status='failed', error=str(exc)[:500])
+        raise
+    db.session.expire_all()
+    return session.get(BackfillState, key)
+
+
+@backfill_cli.command('list')
+def list_command():
+    """Backfills déclarés et leur état (par shard)."""
+    states = {(state.name, state.shard): state for state in db.session.scalars(select(BackfillState))}
+    for name, backfill in sorted(REGISTRY.items()):
+        for index in range(shards.count() or 1):
+            state = states.get((name, index))
+            status = f'{state.status}, id {state.last_id}, {state.processed} lue(s)' if state else 'jamais lancé'
+            label = f'{name} [{index}]' if shards.count() else name
+            click.echo(f'{label:<28} {status:<40} {backfill.description}')
+
+
+@backfill_cli.command('run')
+@click.argument('names', nargs=-1)
+@click.option('--pending', is_flag=True, help='Lance les backfills marqués par une migration.')
+@click.option('--batch-size', type=int, default=None)
+@click.option('--pause', type=float, default=None, help='Pause minimale entre deux lots (s).')
+@click.option('--restart', is_flag=True, help='Repart du début.')
+def run_command(names, pending, batch_size, pause, restart):
+    """Lance ou reprend des backfills (sur chaque shard, ou celui de ``flask shards each``)."""
+    if not names and not pending:
+        raise click.UsageError('Indiquez un backfill ou --pending.')
+    for index in [shards.current()] if shards.current() is not None else shards.each():
+        prefix = f'[shard {index}] ' if index is not None else ''
+        todo = list(names) + [name for name in (pending_names() if pending else []) if name not in names]
+        if not todo:
+            click.echo(f'{prefix}Aucun backfill en attente.')
+        for name in todo:
+            try:
+                state = run(name, batch_size, pause, restart=restart, report=click.echo)
+            except BackfillError as exc:
+                raise click.ClickException(str(exc))
+            click.echo(f'{prefix}{name} : {state.status} ({state.processed} lue(s), {state.changed} modifiée(s))')
@@ -0,0 +1,140 @@
+"""
+Actions groupées sur les idées d'un utilisateur.
+
+Chaque action lit une fois les idées concernées (``tracked_values``), puis
+s'exécute en une seule instruction dans une seule transaction :
+
+- ``status``, ``reschedule`` et ``delete`` : ``UPDATE idea ... WHERE user_id = ?
+  AND id IN (...)`` ;
+- ``add_tag`` / ``remove_tag`` : ``UPDATE`` par clé primaire en executemany
+  (chaque idée a sa propre liste de tags) ;
+- ``duplicate`` : un seul ``INSERT`` multi-lignes. Comme la copie unitaire,
+  une idée dont une copie quasi identique existe déjà (ou est créée par la
+  même action) n'est pas recopiée (``DuplicateFinder.find_many``, compté
+  dans ``duplicates``).
+
+Les tables dérivées et les caches sont prévenus via ``notify``, comme pour
+une écriture ORM classique. ``reschedule`` (date UTC ISO, vide pour
+déprogrammer) ne touche pas aux idées déjà publiées ; le planificateur la
+prend en compte à son rechargement suivant.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, update
+
+from app import db
+from app.forms import IdeaForm
+from app.models import Idea
+from app.signals import IdeaChange, notify, tracked_values
+from app.similarity import DuplicateFinder
+
+ACTIONS = ('status', 'add_tag', 'remove_tag', 'reschedule', 'delete', 'duplicate')
+STATUSES = [value for value, _ in IdeaForm.status.kwargs['choices']]
+MAX_IDS = 1000
+
+
+class BulkError(ValueError):
+    pass
+
+
+def _add_tag(tags, tag):
+    parts = [t.strip() for t in (tags or '').split(',') if t.strip()]
+    if tag.lower() not in (t.lower() for t in parts):
+        parts.append(tag)
+    return ', '.join(parts)
+
+
+def _remove_tag(tags, tag):
+    parts = [t.strip() for t in (tags or '').split(',') if t.strip()]
+    return ', '.join(t for t in parts if t.lower() != tag.lower())
+
+
+def _schedule_date(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise BulkError(f'Invalid date: {value}')
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def apply(user_id, action, ids, value=None):
+    """Applique ``action`` aux idées ``ids`` de l'utilisateur.
+
+    Retourne ``{'selected': ..., 'affected': ...}`` (et ``created``,
+    ``duplicates`` pour ``duplicate``). Les ids inconnus ou appartenant à un autre utilisateur
+    sont ignorés.
+    """
+    if action not in ACTIONS:
+        raise BulkError(f'Unknown action: {action}')
+    ids = sorted({int(i) for i in ids})
+    if not ids:
+        raise BulkError('No ideas selected')
+    if len(ids) > MAX_IDS:
+        raise BulkError(f'At most {MAX_IDS} ideas per request')
+    value = (value or '').strip()
+    if action == 'status' and value not in STATUSES:
+        raise BulkError(f'Unknown status: {value}')
+    if action in ('add_tag', 'remove_tag') and (not value or ',' in value):
+        raise BulkError('A single tag is required')
+    if action == 'reschedule':
+        scheduled_at = _schedule_date(value)
+
+    session = db.session
+    owned = Idea.user_id == user_id
+    old = tracked_values(session, owned, Idea.id.in_(ids))
+    result = {'selected': len(old), 'affected': 0}
+
+    if action == 'duplicate':
+        texts = [(values['title'] + ' (copy)', values['description']) for values in old.values()]
+        near = DuplicateFinder(user_id).find_many(texts, exclude=list(old))
+        rows = [{'title': title, 'description': description, 'tags': values['tags'], 'status': 'Draft',
+                 'user_id': user_id, 'timestamp': datetime.utcnow()}
+                for (title, description), values, duplicate_of in zip(texts, old.values(), near)
+                if not duplicate_of]
+        result.update(created=0, duplicates=len(old) - len(rows))
+        if rows:
+            new_ids = session.scalars(insert(Idea).returning(Idea.id, sort_by_parameter_order=True), rows).all()
+            notify(session, [IdeaChange.make(id, None, dict(row, deleted_at=None, scheduled_at=None))
+                             for id, row in zip(new_ids, rows)])
+            result['affected'] = result['created'] = len(new_ids)
+        session.commit()
+        return result
+
+    if action == 'status':
+        new = {id: dict(values, status=value) for id, values in old.items() if values['status'] != value}
+        if value == 'Published':
+            # publiée à la main : plus rien à programmer
+            new = {id: dict(values, scheduled_at=None) for id, values in new.items()}
+    elif action == 'reschedule':
+        new = {id: dict(values, scheduled_at=scheduled_at) for id, values in old.items()
+               if values['status'] != 'Published' and values['scheduled_at'] != scheduled_at}
+    elif action == 'delete':
+        now = datetime.utcnow()
+        new = {id: dict(values, deleted_at=now) for id, values in old.items()}
+    else:
+        edit = _add_tag if action == 'add_tag' else _remove_tag
+        new = {id: dict(values, tags=edit(values['tags'], value)) for id, values in old.items()}
+        new = {id: values for id, values in new.items() if values['tags'] != (old[id]['tags'] or '')}
+
+    if new:
+        changed = Idea.id.in_(list(new))
+        if action == 'status':
+            if value == 'Published':
+                published = {'published_at': func.coalesce(Idea.published_at, datetime.utcnow()),
+                             'scheduled_at': None}
+            else:
+                published = {'published_at': None}
+            session.execute(update(Idea).where(owned, changed).values(status=value, **published))
+        elif action == 'reschedule':
+            session.execute(update(Idea).where(owned, changed).values(scheduled_at=scheduled_at))
+        elif action == 'delete':
+            session.execute(update(Idea).where(owned, changed).values(deleted_at=now))
+        else:
+            session.execute(update(Idea), [{'id': id, 'tags': values['tags']} for id, values in new.items()])
+        changes = (IdeaChange.make(id, old[id], values) for id, values in new.items())
+        notify(session, [change for change in changes if change is not None])
+    session.commit()
+    result['affected'] = len(new)
+    return result
@@ -0,0 +1,45 @@
+"""
+Cache en mémoire par utilisateur, partagé par les index de recherche.
+
+Chaque worker garde ses propres entrées : elles sont patchées par les signaux
+d'écriture locaux et reconstruites après ``ttl`` secondes pour rattraper les
+écritures faites par les autres workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PerUserCache:
+    """Valeurs construites par ``loader(user_id)``, en LRU borné à ``max_users``."""
+
+    def __init__(self, loader, ttl, max_users):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_users = max_users
+        self.entries = OrderedDict()  # user_id -> (construit à, valeur)
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """Valeur de l'utilisateur, construite (ou reconstruite après le TTL) si besoin."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.entries.move_to_end(user_id)
+                return entry[1]
+        value = self.loader(user_id)
+        with self.lock:
+            self.entries[user_id] = (time.monotonic(), value)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+        return value
+
+    def peek(self, user_id):
+        """Valeur déjà construite, ou None ; à appeler en tenant ``lock``."""
+        entry = self.entries.get(user_id)
+        return entry[1] if entry is not None else None
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
@@ -0,0 +1,145 @@
+"""
+Flux de modifications des idées (synchronisation incrémentale).
+
+Chaque création, modification ou suppression d'idée ajoute une ligne à
+``IdeaChangeLog`` dans la même transaction (signal ``ideas_flushed``). Un
+client garde le dernier ``cursor`` reçu et demande ensuite
+``/api/ideas/changes?since=<cursor>`` : seules les idées modifiées depuis
+sont relues, une fois chacune, avec leur état actuel ou un tombstone.
+
+Un client neuf (``since=0``) ou trop ancien (entrées compactées) reçoit
+``reset: true`` et un instantané complet, paginé par id.
+
+La compaction (``flask changes compact``) supprime les entrées plus vieilles
+que ``CHANGE_LOG_RETENTION_DAYS``, en gardant toujours la dernière : la plus
+petite ``seq`` restante indique jusqu'où les curseurs restent valides.
+"""
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from app.models import Idea, IdeaChangeLog
+from app.signals import ideas_flushed
+
+changes_cli = AppGroup('changes', help="Journal des modifications d'idées.")
+
+_FIELDS = (Idea.id, Idea.title, Idea.description, Idea.tags, Idea.status, Idea.timestamp)
+
+
+def init_app(app):
+    app.cli.add_command(changes_cli)
+
+
+@ideas_flushed.connect
+def _on_ideas_flushed(session, connection, changes):
+    now = datetime.utcnow()
+    rows = []
+    for change in changes:
+        old, new = change.old, change.new
+        if old is not None and (new is None or old['user_id'] != new['user_id']):
+            rows.append({'user_id': old['user_id'], 'idea_id': change.id, 'deleted': True, 'changed_at': now})
+        if new is not None:
+            rows.append({'user_id': new['user_id'], 'idea_id': change.id, 'deleted': False, 'changed_at': now})
+    if rows:
+        connection.execute(insert(IdeaChangeLog), rows)
+
+
+def _serialize(row):
+    return {
+        'id': row.id,
+        'op': 'upsert',
+        'title': row.title,
+        'description': row.description,
+        'tags': row.tags,
+        'status': row.status,
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+    }
+
+
+def _latest_seq():
+    return db.session.scalar(select(func.max(IdeaChangeLog.seq))) or 0
+
+
+def _oldest_valid_cursor():
+    """Plus petit ``since`` encore servi sans reset."""
+    oldest = db.session.scalar(select(func.min(IdeaChangeLog.seq)))
+    return oldest - 1 if oldest else 0
+
+
+def _snapshot(user_id, cursor, after_id, limit):
+    rows = db.session.execute(
+        select(*_FIELDS).where(Idea.user_id == user_id, Idea.id > after_id)
+        .order_by(Idea.id).limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'cursor': cursor,
+        'reset': True,
+        'changes': [_serialize(row) for row in rows],
+        'next': {'since': cursor, 'after_id': rows[-1].id} if more else None,
+    }
+
+
+def changes_since(user_id, since=0, limit=500, after_id=None):
+    """Modifications des idées de ``user_id`` depuis ``since``.
+
+    ``after_id`` : suite d'un instantané (valeur fournie par ``next``).
+    """
+    if after_id is not None:
+        return _snapshot(user_id, since, after_id, limit)
+    # curseur d'un autre shard (utilisateur déplacé, cf. app/shards.py) : hors de la plage de celui-ci
+    if since <= 0 or since < _oldest_valid_cursor() or since > _latest_seq():
+        return _snapshot(user_id, _latest_seq(), 0, limit)
+
+    # dernière entrée de chaque idée modifiée : une idée modifiée dix fois n'est envoyée qu'une fois
+    latest = (select(IdeaChangeLog.idea_id, func.max(IdeaChangeLog.seq).label('seq'))
+              .where(IdeaChangeLog.user_id == user_id, IdeaChangeLog.seq > since)
+              .group_by(IdeaChangeLog.idea_id)
+              .order_by(func.max(IdeaChangeLog.seq)).limit(limit + 1))
+    entries = db.session.execute(latest).all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return {'cursor': max(since, 0), 'reset': False, 'changes': [], 'next': None}
+    ideas = {row.id: row for row in db.session.execute(
+        select(*_FIELDS).where(Idea.user_id == user_id, Idea.id.in_([e.idea_id for e in entries])))}
+    changes = []
+    for idea_id, seq in entries:
+        row = ideas.get(idea_id)
+        # tombstone : supprimée, ou déplacée vers un autre utilisateur
+        changes.append(dict(_serialize(row), seq=seq) if row else {'id': idea_id, 'op': 'delete', 'seq': seq})
+    cursor = entries[-1].seq
+    return {'cursor': cursor, 'reset': False, 'changes': changes,
+            'next': {'since': cursor} if more else None}
+
+
+def compact(retention_days, batch_size=5000):
+    """Supprime les entrées plus anciennes que ``retention_days`` jours (sauf la dernière)."""
+    cutoff = db.session.scalar(
+        select(func.max(IdeaChangeLog.seq))
+        .where(IdeaChangeLog.changed_at < datetime.utcnow() - timedelta(days=retention_days)))
+    if cutoff is None:
+        return 0
+    cutoff = min(cutoff, _latest_seq() - 1)
+    deleted = 0
+    while True:
+        seqs = db.session.scalars(
+            select(IdeaChangeLog.seq).where(IdeaChangeLog.seq <= cutoff)
+            .order_by(IdeaChangeLog.seq).limit(batch_size)).all()
+        if not seqs:
+            return deleted
+        db.session.execute(delete(IdeaChangeLog).where(IdeaChangeLog.seq.in_(seqs)))
+        db.session.commit()
+        deleted += len(seqs)
+
+
+@changes_cli.command('compact')
+@click.option('--days', type=int, default=None, help='Rétention en jours.')
+def compact_command(days):
+    """Supprime les entrées anciennes du journal des modifications."""
+    days = current_app.config['CHANGE_LOG_RETENTION_DAYS'] if days is None else days
+    click.echo(f'{compact(days)} entrée(s) supprimée(s).')
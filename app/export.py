@@ -0,0 +1,104 @@
+"""
+Export Markdown des idées.
+
+``markdown_document`` rend une idée avec le gabarit ``export/idea.md``,
+partagé par l'export unitaire et l'export en masse.
+
+``zip_stream`` produit une archive ZIP à la volée : un ``.md`` par idée et un
+``index.md``. Les idées sont lues une seule fois, par tranches (pagination
+par clé sur ``Idea.id``, sans curseur ouvert entre deux tranches), et chaque
+fichier est compressé puis envoyé aussitôt. L'index est rempli pendant ce
+même passage (fichier temporaire, en mémoire jusqu'à ``INDEX_SPOOL_BYTES``)
+puis ajouté en dernier : il liste exactement les fichiers de l'archive, même
+si des idées sont créées ou supprimées pendant l'export. Les idées archivées
+(``app/archive.py``) suivent les idées de la table chaude.
+"""
+import re
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+
+from flask import render_template
+from sqlalchemy import select
+
+from app import archive, db
+from app.models import Idea
+from app.tag_stats import split_tags
+
+_COLUMNS = (Idea.id, Idea.title, Idea.description, Idea.tags, Idea.status, Idea.timestamp)
+INDEX_SPOOL_BYTES = 1024 * 1024  # index plus gros : sur disque pendant l'export
+
+
+def markdown_document(idea):
+    """Contenu Markdown d'une idée (objet ``Idea`` ou ligne avec les mêmes attributs)."""
+    return render_template('export/idea.md', idea=idea)
+
+
+def filename(idea):
+    slug = re.sub(r'[^a-z0-9]+', '-', (idea.title or '').lower()).strip('-')[:60] or 'idea'
+    return f'{idea.id:06d}-{slug}.md'
+
+
+class _Chunks:
+    """Fichier en écriture seule dont on récupère le contenu au fur et à mesure."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def _ideas(user_id, tag=None, status=None, since=None, until=None, chunk_size=500):
+    """Idées de l'utilisateur correspondant aux filtres, par tranches de ``chunk_size``."""
+    query = select(*_COLUMNS).where(Idea.user_id == user_id)
+    if status:
+        query = query.where(Idea.status == status)
+    if since:
+        query = query.where(Idea.timestamp >= since)
+    if until:
+        query = query.where(Idea.timestamp < until + timedelta(days=1))
+    if tag:
+        tag = tag.strip().lower()
+        query = query.where(Idea.tags.ilike(f'%{tag}%'))  # préfiltre, vérifié ci-dessous
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(Idea.id > last_id).order_by(Idea.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        yield [row for row in rows if not tag or tag in split_tags(row.tags)]
+    # puis les idées archivées (lecture transparente)
+    for rows in archive.rows(user_id, status, since, until, chunk_size):
+        yield [row for row in rows if not tag or tag in split_tags(row.tags)]
+
+
+def zip_stream(user_id, tag=None, status=None, since=None, until=None, chunk_size=500):
+    """Morceaux (``bytes``) de l'archive ZIP des idées sélectionnées."""
+    sink = _Chunks()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+            tempfile.SpooledTemporaryFile(INDEX_SPOOL_BYTES) as index:
+        index.write(f'# Ideas export ({datetime.utcnow():%Y-%m-%d})\n\n'.encode())
+        for rows in _ideas(user_id, tag, status, since, until, chunk_size):
+            for row in rows:
+                archive.writestr(filename(row), markdown_document(row))
+            index.write(''.join(f'- [{row.title}]({filename(row)}) — {row.status}, '
+                                f'{row.timestamp:%Y-%m-%d}\n' for row in rows).encode())
+            yield sink.take()
+        # l'index en dernier : les idées qu'il liste sont celles écrites ci-dessus
+        index.seek(0)
+        with archive.open('index.md', 'w') as entry:
+            for data in iter(lambda: index.read(64 * 1024), b''):
+                entry.write(data)
+                yield sink.take()
+        yield sink.take()
+    yield sink.take()  # répertoire central
@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, TextAreaField, SelectField, FileField
-from wtforms.validators import DataRequired, Length
+from wtforms import StringField, PasswordField, SubmitField, TextAreaField, SelectField, FileField, DateTimeLocalField
+from wtforms.validators import DataRequired, Length, Optional, ValidationError
 
 class RegisterForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=4, max=64)])
@@ -18,12 +18,17 @@ class IdeaForm(FlaskForm):
     description = TextAreaField('Description', validators=[Length(max=500)])
     tags = StringField('Tags (comma-separated)', validators=[Length(max=200)])
     status = SelectField('Status', choices=[('Draft', 'Draft'), ('To Film', 'To Film'), ('Published', 'Published')], default='Draft')
+    scheduled_at = DateTimeLocalField('Publish at (UTC)', format='%Y-%m-%dT%H:%M', validators=[Optional()])
     submit = SubmitField('Save')
 
     def validate_tags(self, tags):
         if tags.data:
             tags.data = ','.join([t.strip().lower() for t in tags.data.split(',') if t.strip()])
 
+    def validate_scheduled_at(self, scheduled_at):
+        if scheduled_at.data and self.status.data == 'Published':
+            raise ValidationError('This idea is already published.')
+
 
 
 class SearchForm(FlaskForm):
@@ -33,5 +38,5 @@ class SearchForm(FlaskForm):
 
 
 class ImportForm(FlaskForm):
-    file = FileField('CSV File', validators=[DataRequired()])
+    file = FileField('File (CSV, JSONL or ZIP)', validators=[DataRequired()])
     submit = SubmitField('Import')
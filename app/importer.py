@@ -0,0 +1,271 @@
+"""
+Import d'idées en masse : CSV, JSONL ou ZIP de fichiers Markdown.
+
+- Le format est reconnu au contenu (signature ZIP, première ligne JSON),
+  le CSV servant de format par défaut. Chaque format est un parseur
+  enregistré avec ``@register_format`` qui produit des dicts ``title``,
+  ``description``, ``tags``, ``status`` et ``timestamp``.
+- CSV : en-têtes sans tenir compte de la casse ; l'export CSV de
+  l'application se relit tel quel (colonne ``Date`` comprise). JSONL : un
+  objet par ligne, ``tags`` en chaîne ou en liste. ZIP : un ``.md`` par idée
+  au format de l'export Markdown (``index.md`` ignoré).
+- Une archive de plus de ``IMPORT_PARALLEL_MIN_FILES`` fichiers est
+  décompressée et analysée par un pool de ``IMPORT_PROCESSES`` processus.
+- Tags normalisés et doublons écartés sur toutes les lignes à la fois
+  (numpy) : titre déjà présent chez l'utilisateur ou répété dans le fichier.
+  Les quasi-doublons (MinHash, cf. app/similarity.py) restent écartés, avec
+  une requête par tranche de buckets LSH plutôt qu'une par ligne.
+- Écriture par lots de ``IMPORT_BATCH_SIZE`` idées : un ``INSERT``
+  multi-lignes et une transaction courte par lot, les tables dérivées étant
+  prévenues via ``notify``.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, insert, select
+
+from app import db
+from app.bulk import STATUSES
+from app.models import Idea
+from app.signals import IdeaChange, notify
+from app.similarity import DuplicateFinder
+from app.tag_stats import normalize_tag_column
+
+MAX_MEMBER_BYTES = 1024 * 1024  # fichier Markdown plus gros : ignoré
+DATE_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d')  # export CSV, date seule
+
+_FORMATS = []  # (nom, détection, parseur), dans l'ordre d'enregistrement
+_STATUSES = {status.lower(): status for status in STATUSES}
+_FIELD = re.compile(r'^\*\*(Tags|Status|Date):\*\*\s*(.*)$')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class _Pool:
+    """Pool de processus créé au premier import d'une grosse archive (après le fork des workers)."""
+
+    def __init__(self, processes):
+        self.processes = processes
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self.lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.processes or None,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+
+def init_app(app):
+    app.extensions['import_pool'] = _Pool(app.config['IMPORT_PROCESSES'])
+
+
+def register_format(name, detect=None):
+    """Enregistre un parseur ``parse(stream)`` ; ``detect(head)`` reconnaît les premiers octets.
+
+    Sans ``detect``, le format est celui par défaut (le dernier enregistré ainsi).
+    """
+    def decorator(parse):
+        _FORMATS.append((name, detect, parse))
+        return parse
+    return decorator
+
+
+def detect_format(head):
+    """(nom, parseur) du format de ``head`` (premiers octets du fichier)."""
+    for name, detect, parse in _FORMATS:
+        if detect is not None and detect(head):
+            return name, parse
+    for name, detect, parse in reversed(_FORMATS):
+        if detect is None:
+            return name, parse
+    raise ImportFormatError('Unrecognized file format')
+
+
+# ------------------ FORMATS ------------------ #
+
+def _row(title=None, description=None, tags=None, status=None, timestamp=None):
+    return {'title': title, 'description': description, 'tags': tags, 'status': status, 'timestamp': timestamp}
+
+
+@register_format('zip', detect=lambda head: head.startswith(b'PK\x03\x04'))
+def parse_zip(stream):
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ImportFormatError('Invalid ZIP archive')
+    with archive:
+        names = [info.filename for info in archive.infolist() if _is_idea_file(info)]
+        if len(names) < current_app.config['IMPORT_PARALLEL_MIN_FILES']:
+            yield from _parse_members(archive, names)
+            return
+    # les processus du pool relisent l'archive depuis un fichier
+    with tempfile.NamedTemporaryFile(suffix='.zip') as copy:
+        stream.seek(0)
+        shutil.copyfileobj(stream, copy)
+        copy.flush()
+        pool = current_app.extensions['import_pool']
+        size = -(-len(names) // ((pool.processes or os.cpu_count() or 1) * 4))  # ~4 tranches par processus
+        chunks = [names[start:start + size] for start in range(0, len(names), size)]
+        for rows in pool.executor.map(_parse_chunk, [copy.name] * len(chunks), chunks):
+            yield from rows
+
+
+def _is_idea_file(info):
+    name = info.filename
+    return (not info.is_dir() and name.lower().endswith('.md') and os.path.basename(name) != 'index.md'
+            and not name.startswith('__MACOSX/') and info.file_size <= MAX_MEMBER_BYTES)
+
+
+def _parse_chunk(path, names):
+    with zipfile.ZipFile(path) as archive:
+        return list(_parse_members(archive, names))
+
+
+def _parse_members(archive, names):
+    for name in names:
+        yield parse_markdown(archive.read(name).decode('utf-8', errors='replace'), name)
+
+
+def parse_markdown(text, name=''):
+    """Idée d'un fichier Markdown : ``# titre``, description, lignes ``**Tags:**`` / ``**Status:**``."""
+    title, fields, body = None, {}, []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        if title is None and line.startswith('# '):
+            title = line[2:].strip()
+            continue
+        match = _FIELD.match(line.strip())
+        if match:
+            fields[match.group(1).lower()] = match.group(2).strip()
+        else:
+            body.append(line)
+    if title is None:  # titre absent : nom du fichier sans le préfixe d'id de l'export
+        title = re.sub(r'^\d+-', '', os.path.splitext(os.path.basename(name))[0]).replace('-', ' ')
+    # l'export écrit « None » pour un champ vide
+    description = '\n'.join(body).strip()
+    tags = fields.get('tags')
+    return _row(title, '' if description == 'None' else description, None if tags == 'None' else tags,
+                fields.get('status'), fields.get('date'))
+
+
+@register_format('jsonl', detect=lambda head: head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{'))
+def parse_jsonl(stream):
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise ImportFormatError(f'Line {number}: invalid JSON')
+        if not isinstance(item, dict):
+            raise ImportFormatError(f'Line {number}: expected a JSON object')
+        tags = item.get('tags')
+        if isinstance(tags, list):
+            tags = ','.join(str(tag) for tag in tags)
+        yield _row(item.get('title'), item.get('description'), tags, item.get('status'),
+                   item.get('timestamp') or item.get('date'))
+
+
+@register_format('csv')
+def parse_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if not any((field or '').strip().lower() == 'title' for field in reader.fieldnames or ()):
+        raise ImportFormatError('CSV files need a Title column')
+    for row in reader:
+        row = {(key or '').strip().lower(): value for key, value in row.items()}
+        yield _row(row.get('title'), row.get('description'), row.get('tags'), row.get('status'),
+                   row.get('date') or row.get('timestamp'))
+
+
+# ------------------ IMPORT ------------------ #
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ('' if value is None else str(value).strip())
+
+
+def _timestamp(value, default):
+    if isinstance(value, str) and value.strip():
+        value = value.strip()
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+        except ValueError:
+            for fmt in DATE_FORMATS:
+                try:
+                    return datetime.strptime(value, fmt)
+                except ValueError:
+                    pass
+    return default
+
+
+def _existing_titles(user_id):
+    titles = db.session.scalars(select(func.lower(Idea.title)).where(Idea.user_id == user_id)).all()
+    return np.array(titles, dtype=str)
+
+
+def import_file(user_id, stream, batch_size=None):
+    """Importe les idées du fichier ``stream`` pour ``user_id``.
+
+    Retourne ``{'format', 'imported', 'duplicates', 'invalid'}`` ; lève
+    ``ImportFormatError`` si le fichier est illisible.
+    """
+    head = stream.read(512)
+    stream.seek(0)
+    name, parse = detect_format(head)
+    try:
+        rows = list(parse(stream))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFormatError(f'Unreadable {name.upper()} file: {exc}')
+
+    titles = np.array([_text(row['title'])[:100] for row in rows], dtype=str)
+    keys = np.char.lower(titles)
+    # première occurrence de chaque titre, absent des idées de l'utilisateur
+    _, first = np.unique(keys, return_index=True)
+    unique = np.zeros(len(rows), dtype=bool)
+    unique[first] = True
+    valid = keys != ''
+    fresh = valid & unique & ~np.isin(keys, _existing_titles(user_id))
+    tags = normalize_tag_column([_text(row['tags']) for row in rows])
+
+    now = datetime.utcnow()
+    candidates = np.flatnonzero(fresh)
+    texts = [(str(titles[index]), _text(rows[index]['description'])) for index in candidates]
+    near = DuplicateFinder(user_id).find_many(texts)
+    values = []
+    for index, (title, description), duplicate_of in zip(candidates, texts, near):
+        if duplicate_of:
+            continue
+        row = rows[index]
+        values.append({'title': title, 'description': description, 'tags': tags[index],
+                       'status': _STATUSES.get(_text(row['status']).lower(), 'Draft'),
+                       'timestamp': _timestamp(row['timestamp'], now), 'user_id': user_id})
+
+    session = db.session
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        # un seul INSERT multi-lignes : l'ordre des ids renvoyés n'est pas garanti,
+        # les titres (uniques dans l'import) les rattachent aux lignes
+        ids = dict(session.execute(insert(Idea).returning(Idea.title, Idea.id), batch).all())
+        notify(session, [IdeaChange.make(ids[row['title']], None, dict(row, deleted_at=None, scheduled_at=None))
+                         for row in batch])
+        session.commit()
+    invalid = int((~valid).sum())
+    return {'format': name, 'imported': len(values), 'duplicates': len(rows) - invalid - len(values),
+            'invalid': invalid}
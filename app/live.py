@@ -0,0 +1,195 @@
+"""
+Tableau de bord admin en direct (Server-Sent Events).
+
+Un bus d'événements en mémoire (``DashboardFeed``) garde un instantané des
+statistiques du dashboard, calculé une seule fois et partagé par tous les
+onglets ouverts. Les signaux d'écriture (inscription, création, modification
+et suppression d'idées) y appliquent des deltas et réveillent les abonnés :
+la charge sur la base ne dépend pas du nombre de dashboards connectés.
+
+L'instantané est recalculé au plus toutes les ``DASHBOARD_SNAPSHOT_TTL``
+secondes, ce qui corrige la fenêtre glissante des utilisateurs actifs et
+intègre les écritures faites par les autres workers.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import shards
+from app.models import Idea, User
+from app.signals import ideas_committed, users_committed
+
+RECENT_ACTIVITY = 5
+
+
+def init_app(app):
+    app.extensions['dashboard_feed'] = DashboardFeed(app.config['DASHBOARD_SNAPSHOT_TTL'])
+
+
+def build_snapshot():
+    """Statistiques du dashboard lues en base."""
+    return {
+        'total_users': User.query.count(),
+        # jointure : le filtre ORM écarte aussi les idées des utilisateurs supprimés
+        'total_ideas': sum(shards.fan_out(lambda: Idea.query.join(User, User.id == Idea.user_id).count())),
+        'active_users': User.query.filter(
+            User.created_at >= datetime.utcnow() - timedelta(hours=24)
+        ).count(),
+        'recent_activity': [
+            {
+                'type': 'user_registered',
+                'user': user.username,
+                'timestamp': user.created_at.isoformat()
+            }
+            for user in User.query.order_by(User.created_at.desc()).limit(RECENT_ACTIVITY)
+        ]
+    }
+
+
+class DashboardFeed:
+    """Instantané partagé + journal des derniers événements, numérotés par ``version``."""
+
+    def __init__(self, ttl, backlog=100):
+        self.ttl = ttl
+        self.condition = threading.Condition()
+        self.build_lock = threading.Lock()  # un seul recalcul à la fois, hors de ``condition``
+        self.snapshot = None
+        self.built_at = 0
+        self.version = 0
+        self.events = deque(maxlen=backlog)  # (version, type, données)
+
+    def _expired(self):
+        return self.snapshot is None or time.monotonic() - self.built_at > self.ttl
+
+    def current(self):
+        """(version, instantané), recalculé s'il a expiré.
+
+        Les requêtes (et la lecture de chaque shard) se font sans tenir
+        ``condition`` : ``publish``, appelé par les requêtes qui écrivent,
+        n'attend jamais un recalcul. Les deltas publiés pendant celui-ci
+        s'appliquent à l'ancien instantané, que le nouveau remplace.
+        """
+        with self.condition:
+            if not self._expired():
+                return self.version, self._copy()
+        with self.build_lock:
+            with self.condition:
+                if not self._expired():  # recalculé par un autre thread entre-temps
+                    return self.version, self._copy()
+            snapshot = build_snapshot()
+            with self.condition:
+                self.snapshot = snapshot
+                self.built_at = time.monotonic()
+                self._push('snapshot', self._copy())
+                return self.version, self._copy()
+
+    def _copy(self):
+        # les abonnés sérialisent hors du verrou : ils reçoivent une copie
+        return dict(self.snapshot, recent_activity=list(self.snapshot['recent_activity']))
+
+    def expire(self):
+        """Force le recalcul au prochain ``current()`` (delta non calculable sur place)."""
+        with self.condition:
+            self.built_at = 0
+
+    def publish(self, event, apply=None):
+        """Diffuse ``event`` ; ``apply(snapshot)`` met l'instantané à jour."""
+        with self.condition:
+            if self.snapshot is None:  # personne n'écoute encore
+                return
+            if apply is not None:
+                apply(self.snapshot)
+            self._push('delta', {'event': event, 'stats': _totals(self.snapshot)})
+
+    def _push(self, kind, data):
+        self.version += 1
+        self.events.append((self.version, kind, data))
+        self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Événements postérieurs à ``version`` (attend au plus ``timeout`` s).
+
+        Retourne None si l'abonné a pris trop de retard : il doit repartir
+        d'un instantané.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version, timeout)
+            if self.events and self.events[0][0] > version + 1:
+                return None
+            return [event for event in self.events if event[0] > version]
+
+
+def _totals(snapshot):
+    return {key: snapshot[key] for key in ('total_users', 'total_ideas', 'active_users')}
+
+
+def _sse(kind, data, version):
+    return f'id: {version}\nevent: {kind}\ndata: {json.dumps(data)}\n\n'
+
+
+def stream():
+    """Générateur SSE : instantané, puis deltas et battements de cœur.
+
+    La connexion est fermée après ``DASHBOARD_STREAM_TIMEOUT`` secondes pour
+    libérer le thread ; ``EventSource`` se reconnecte de lui-même.
+    """
+    config = current_app.config
+    feed = current_app.extensions['dashboard_feed']
+    deadline = time.monotonic() + config['DASHBOARD_STREAM_TIMEOUT']
+    version, snapshot = feed.current()
+    yield f"retry: {config['DASHBOARD_RETRY_MS']}\n" + _sse('snapshot', snapshot, version)
+    while time.monotonic() < deadline:
+        events = feed.wait(version, config['DASHBOARD_HEARTBEAT'])
+        if events is None:
+            version, snapshot = feed.current()
+            yield _sse('snapshot', snapshot, version)
+            continue
+        if not events:
+            feed.current()  # rafraîchit l'instantané s'il a expiré (une fois pour tous)
+            yield ': keep-alive\n\n'
+            continue
+        for version, kind, data in events:
+            yield _sse(kind, data, version)
+
+
+def _count(key, delta):
+    def apply(snapshot):
+        snapshot[key] += delta
+    return apply
+
+
+@ideas_committed.connect
+def _on_ideas_committed(session, changes):
+    feed = current_app.extensions['dashboard_feed']
+    for change in changes:
+        event = {'id': change.id, 'user_id': change.user_id}
+        if change.old is None:
+            feed.publish(dict(event, type='idea_created', title=change.new['title']),
+                         _count('total_ideas', 1))
+        elif change.new is None:
+            feed.publish(dict(event, type='idea_deleted'), _count('total_ideas', -1))
+        else:
+            feed.publish(dict(event, type='idea_updated', title=change.new['title'],
+                              status=change.new['status']))
+
+
+@users_committed.connect
+def _on_users_committed(session, changes):
+    feed = current_app.extensions['dashboard_feed']
+    for change in changes:
+        if change.kind == 'registered':
+            activity = {'type': 'user_registered', 'user': change.username,
+                        'timestamp': (change.created_at or datetime.utcnow()).isoformat()}
+
+            def apply(snapshot, activity=activity):
+                snapshot['total_users'] += 1
+                snapshot['active_users'] += 1
+                snapshot['recent_activity'] = [activity] + snapshot['recent_activity'][:RECENT_ACTIVITY - 1]
+            feed.publish(activity, apply)
+        else:
+            feed.publish({'type': 'user_deleted', 'user': change.username}, _count('total_users', -1))
+            feed.expire()  # ses idées sortent aussi de ``total_ideas``
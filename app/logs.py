@@ -0,0 +1,241 @@
+"""
+Journalisation structurée, sans I/O sur les threads des requêtes.
+
+Les enregistrements du logger de l'application (et de ses enfants
+``app.*``) passent par une ``QueueHandler`` : la requête ne fait que déposer
+l'enregistrement dans une file. Un ``QueueListener`` les écrit en JSON, une
+ligne par enregistrement, dans ``LOG_FILE`` avec rotation par taille.
+
+Les workers gunicorn écrivent dans le même fichier : chaque écriture se
+fait sous un verrou de fichier (``flock`` sur ``LOG_FILE.lock``). La taille
+est relue sur le disque, le fichier est rouvert s'il a été tourné par un
+autre processus, et une seule rotation a lieu.
+
+``tail`` lit les dernières lignes en partant de la fin du fichier (``mmap``
++ ``rfind``) et s'arrête dès qu'il en a assez : afficher les logs récents ne
+charge jamais le fichier entier. Les fichiers de rotation (``.1``, ``.2``…)
+ne sont ouverts que si nécessaire.
+"""
+import atexit
+import copy
+import json
+import logging
+import mmap
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+try:
+    import fcntl
+except ImportError:  # Windows : un seul processus écrivain
+    fcntl = None
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+_listener = None
+_handler = None
+_formatter = logging.Formatter()
+
+
+def _timestamp(created):
+    return datetime.fromtimestamp(created, timezone.utc).replace(tzinfo=None).isoformat(timespec='milliseconds')
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': _timestamp(record.created),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('method', 'path', 'user_id'):
+            if getattr(record, key, None) is not None:
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif getattr(record, 'exception', None):
+            entry['exception'] = record.exception
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """``RotatingFileHandler`` utilisable par plusieurs processus sur le même fichier."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._pid = None
+        self._lock_file = None
+
+    def _open_lock(self):
+        # un verrou ``flock`` est partagé avec le processus parent après un fork : on rouvre
+        if self._pid != os.getpid():
+            if self._lock_file is not None:
+                self._lock_file.close()
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self._lock_file = open(self.baseFilename + '.lock', 'a')
+            self._pid = os.getpid()
+        return self._lock_file
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            rotated = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = None  # rouvert par ``shouldRollover``
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        try:
+            lock = self._open_lock()
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                super().emit(record)  # taille relue en fin de fichier, rotation, écriture
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self.lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+        super().close()
+
+
+class _RequestQueueHandler(QueueHandler):
+    """Ajoute le contexte de la requête avant de passer au thread d'écriture.
+
+    Message et traceback sont mis en forme ici (les arguments peuvent ne pas
+    être transmissibles) mais gardés séparés pour le JSON.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exception = _formatter.formatException(record.exc_info)
+            record.exc_info = record.exc_text = None
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+            user = g.get('_login_user')  # sans déclencher le chargement de l'utilisateur
+            if user is not None and user.is_authenticated:
+                record.user_id = user.id
+        return record
+
+
+def init_app(app):
+    global _listener, _handler
+    if _listener is not None:  # nouvelle application dans le même processus (tests)
+        _listener.stop()
+        app.logger.removeHandler(_handler)
+        _listener = _handler = None
+    app.extensions['logs'] = None
+    if not app.config['LOG_FILE']:
+        return
+    path = os.path.join(app.instance_path, app.config['LOG_FILE'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_handler = SharedRotatingFileHandler(path, maxBytes=app.config['LOG_MAX_BYTES'],
+                                             backupCount=app.config['LOG_BACKUP_COUNT'], encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    records = queue.SimpleQueue()
+    _handler = _RequestQueueHandler(records)
+    _listener = QueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    app.logger.addHandler(_handler)
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    app.extensions['logs'] = path
+
+
+@atexit.register
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def after_fork():
+    """Dans un processus forké (worker gunicorn) : le thread d'écriture du parent n'y existe pas."""
+    global _listener
+    if _listener is None:
+        return
+    records = queue.SimpleQueue()
+    _handler.queue = records
+    _listener = QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def flush():
+    """Attend que les enregistrements en file soient écrits (tests, CLI)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def _lines_backwards(path):
+    """Lignes du fichier, de la dernière à la première."""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                if mm[end - 1:end] != b'\n':
+                    end = mm.rfind(b'\n', 0, end) + 1  # ligne en cours d'écriture
+                while end > 0:
+                    start = mm.rfind(b'\n', 0, end - 1) + 1
+                    yield mm[start:end - 1]
+                    end = start
+    except FileNotFoundError:
+        return
+
+
+def tail(path, limit=100, level=None, since=None, until=None, search=None, backup_count=10):
+    """Les ``limit`` derniers enregistrements (du plus récent au plus ancien).
+
+    ``level`` : niveau minimal ; ``since``/``until`` : datetimes UTC ;
+    ``search`` : texte recherché dans le message.
+    """
+    if not path:
+        return []
+    min_level = LEVELS.index(level) if level in LEVELS else 0
+    since = since.isoformat(timespec='milliseconds') if since else None
+    until = until.isoformat(timespec='milliseconds') if until else None
+    search = search.lower() if search else None
+    entries = []
+    for name in [path] + [f'{path}.{i}' for i in range(1, backup_count + 1)]:
+        if name != path and not os.path.exists(name):
+            break
+        for line in _lines_backwards(name):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            timestamp = entry.get('timestamp', '')
+            if since and timestamp < since:
+                return entries  # les lignes précédentes sont plus anciennes
+            if until and timestamp > until:
+                continue
+            if entry.get('level') in LEVELS and LEVELS.index(entry['level']) < min_level:
+                continue
+            if search and search not in entry.get('message', '').lower():
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                return entries
+    return entries
@@ -4,34 +4,43 @@ Returns:
     User: The user instance.
 """
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from app import db  # Import db from __init__.py
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+from app import db, passwords  # Import db from __init__.py
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)  # scrypt : 162 caractères
     ideas = db.relationship('Idea', backref='author', lazy=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)
+    deleted_at = db.Column(db.DateTime, index=True)  # suppression logique, cf. app/purge.py
+    shard = db.Column(db.SmallInteger)  # base de ses idées, cf. app/shards.py
+    moving_at = db.Column(db.DateTime)  # déplacement de shard en cours (écritures refusées)
     
     def set_password(self, password):
         """
         configuer le mot de passe en *hashant*
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        """_summary_
+        """Vérifie ``password`` ; recalcule le hash s'il date d'anciens paramètres
+        (à enregistrer par l'appelant).
 
         Args:
-            password (_type_): _description_
+            password (str): mot de passe saisi.
 
         Returns:
-            _type_: _description_
+            bool: True si le mot de passe est correct.
         """
-        return check_password_hash(self.password_hash, password)
+        if not passwords.verify(self.password_hash, password):
+            return False
+        if passwords.needs_rehash(self.password_hash):
+            self.password_hash = passwords.hash_password(password)
+        return True
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -45,6 +54,144 @@ class Idea(db.Model):
     status = db.Column(db.String(20), default='Draft')  # Draft, To Film, Published
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, index=True)
+    scheduled_at = db.Column(db.DateTime)  # publication programmée, cf. app/scheduler.py
+    published_at = db.Column(db.DateTime)  # date de publication (statut Published)
+    description_html = db.Column(db.Text)  # rendu Markdown, cf. app/rendering.py
+    description_hash = db.Column(db.String(32))  # empreinte de la description rendue
+
+    # idées programmées pas encore publiées : seul ensemble parcouru par le planificateur
+    # AUTOINCREMENT : l'id d'une idée archivée ou purgée n'est jamais réattribué
+    __table_args__ = (
+        db.Index('ix_idea_due', 'scheduled_at',
+                 sqlite_where=db.text("status != 'Published'"),
+                 postgresql_where=db.text("status != 'Published'")),
+        {'sqlite_autoincrement': True},
+    )
+
+    def set_status(self, status, now=None):
+        """Change le statut ; ``published_at`` suit l'entrée et la sortie de ``Published``."""
+        self.status = status
+        if status != 'Published':
+            self.published_at = None
+            return
+        self.scheduled_at = None
+        if self.published_at is None:
+            self.published_at = now or datetime.utcnow()
 
     def __repr__(self):
         return f'<Idea {self.title}>'
+
+
+class TagCount(db.Model):
+    """Nombre d'idées par tag (toutes utilisateurs confondus)."""
+    tag = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+
+class UserTagCount(db.Model):
+    """Nombre d'idées par tag pour un utilisateur."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TagPairCount(db.Model):
+    """Co-occurrence de deux tags sur une même idée (tag_a < tag_b)."""
+    tag_a = db.Column(db.String(100), primary_key=True)
+    tag_b = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+
+class TagMonthCount(db.Model):
+    """Nombre d'idées par tag et par mois de création ('YYYY-MM')."""
+    tag = db.Column(db.String(100), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class IdeaSignature(db.Model):
+    """Signature MinHash (titre + description) d'une idée, cf. app/similarity.py."""
+    idea_id = db.Column(db.Integer, db.ForeignKey('idea.id'), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    minhash = db.Column(db.LargeBinary, nullable=False)
+
+
+class IdeaLshBucket(db.Model):
+    """Bucket LSH : les idées partageant une bande de signature sont candidates."""
+    user_id = db.Column(db.Integer, primary_key=True)
+    band = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    idea_id = db.Column(db.Integer, db.ForeignKey('idea.id'), primary_key=True, index=True)
+
+
+class IdeaVector(db.Model):
+    """Sac de mots haché (termes + fréquences) d'une idée, cf. app/related.py."""
+    idea_id = db.Column(db.Integer, db.ForeignKey('idea.id'), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    terms = db.Column(db.LargeBinary, nullable=False)  # uint32 triés
+    weights = db.Column(db.LargeBinary, nullable=False)  # float16, 1 + log(tf)
+
+
+class ArchivedIdea(db.Model):
+    """Idée publiée ancienne sortie de la table ``idea`` (même id), cf. app/archive.py."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    tags = db.Column(db.String(200))
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    payload = db.Column(db.LargeBinary, nullable=False)  # JSON compressé (zlib) des autres colonnes
+
+
+class IdeaChangeLog(db.Model):
+    """Journal des modifications d'idées (synchronisation incrémentale, cf. app/changes.py).
+
+    ``seq`` est strictement croissant (AUTOINCREMENT : jamais réutilisé,
+    même après compaction).
+    """
+    __table_args__ = (
+        db.Index('ix_idea_change_log_user_seq', 'user_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    idea_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)  # tombstone
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class BackfillState(db.Model):
+    """Point de reprise d'une migration de données par lots, cf. app/backfill.py.
+
+    Table centrale : une ligne par backfill et par shard (0 sans répartition).
+    """
+    name = db.Column(db.String(64), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0, server_default='0')
+    status = db.Column(db.String(16), nullable=False, default='pending')  # pending, running, paused, done, failed
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # dernier id traité
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    changed = db.Column(db.Integer, nullable=False, default=0)
+    owner = db.Column(db.String(128))  # processus qui l'exécute (hôte:pid)
+    heartbeat_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _exclude_deleted(execute_state):
+    """Exclut les lignes supprimées logiquement de toutes les requêtes ORM.
+
+    ``execution_options(include_deleted=True)`` désactive le filtre. Les
+    utilisateurs supprimés restent chargeables via une relation (``idea.author``)
+    pour ne pas casser l'affichage pendant la purge de leurs idées.
+    """
+    if not execute_state.is_select or execute_state.is_column_load:
+        return
+    if execute_state.execution_options.get('include_deleted', False):
+        return
+    options = [with_loader_criteria(Idea, Idea.deleted_at.is_(None), include_aliases=True)]
+    if not execute_state.is_relationship_load:
+        options.append(with_loader_criteria(User, User.deleted_at.is_(None), include_aliases=True))
+    execute_state.statement = execute_state.statement.options(*options)
+
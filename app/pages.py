@@ -0,0 +1,115 @@
+"""
+Cache des gabarits compilés et des pages statiques.
+
+- Cache de bytecode Jinja sur disque (``TEMPLATE_CACHE_DIR``, relatif à
+  ``instance/``) : un worker qui démarre charge les gabarits déjà compilés
+  au lieu de recompiler leur source. ``flask templates compile`` remplit ce
+  cache au déploiement, avant le démarrage des workers.
+- ``cached_page`` garde en mémoire la réponse finale (déjà compressée) des
+  pages qui ne dépendent que de l'URL et de l'utilisateur connecté
+  (``/about``, ``/faq``, ``robots.txt``, ``sitemap.xml``) : la clé contient
+  l'URL, l'utilisateur (id, nom, admin), et l'encodage choisi. Une requête
+  avec des messages flash en attente n'est ni servie par le cache ni mise en
+  cache. Désactivé en mode debug (gabarits rechargés à chaud).
+"""
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import click
+from flask import current_app, request, session
+from flask.cli import AppGroup
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.wrappers import Response
+
+from app.assets import compress_response, dynamic_encoding
+
+templates_cli = AppGroup('templates', help='Gabarits Jinja.')
+
+
+class PageCache:
+    """LRU borné de réponses : clé -> (statut, en-têtes, corps)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def init_app(app):
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    if directory:
+        directory = os.path.join(app.instance_path, directory)
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.extensions['pages'] = PageCache(app.config['PAGE_CACHE_SIZE'])
+    app.cli.add_command(templates_cli)
+
+
+def _key():
+    user = None
+    if current_user.is_authenticated:
+        user = (current_user.id, current_user.username, bool(current_user.is_admin))
+    return request.endpoint, request.url, user, dynamic_encoding()
+
+
+def cached_page(view):
+    """Décorateur : réponse mise en cache par URL, utilisateur et encodage."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        app = current_app
+        if app.debug or app.config['TEMPLATES_AUTO_RELOAD'] or '_flashes' in session:
+            return view(*args, **kwargs)
+        cache = app.extensions['pages']
+        key = _key()
+        entry = cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.direct_passthrough = False  # fichiers : lus une fois pour le cache
+            response = compress_response(response)
+            response.add_etag()
+            entry = (response.status_code, list(response.headers.items()), response.get_data())
+            cache.put(key, entry)
+        status, headers, body = entry
+        response = Response(body, status=status, headers=headers)
+        return response.make_conditional(request)
+    return wrapper
+
+
+def compile_templates(env):
+    """Charge tous les gabarits de ``env`` (et remplit son cache de bytecode)."""
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+@templates_cli.command('compile')
+def compile_command():
+    """Compile tous les gabarits dans le cache de bytecode (à lancer au déploiement)."""
+    env = current_app.jinja_env
+    if env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR n\'est pas configuré.')
+    click.echo(f'{compile_templates(env)} gabarit(s) compilé(s).')
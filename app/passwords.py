@@ -0,0 +1,163 @@
+"""
+Hachage des mots de passe : coût configurable, exécution bornée, échecs limités.
+
+- ``PASSWORD_HASH_METHOD`` fixe l'algorithme et son coût (format Werkzeug,
+  ex. ``scrypt:32768:8:1`` ou ``pbkdf2:sha256:600000``). Un hash calculé avec
+  d'autres paramètres est recalculé à la connexion suivante réussie
+  (``User.check_password``) : changer le réglage ne demande pas de migration.
+- Les calculs passent par un pool de ``PASSWORD_HASH_THREADS`` threads par
+  worker (scrypt et pbkdf2 libèrent le GIL) : un pic de connexions occupe au
+  plus ce nombre de cœurs, les autres threads de requête continuent à servir.
+  Quand ``PASSWORD_HASH_QUEUE`` calculs attendent déjà, une requête attend
+  une place au plus ``PASSWORD_HASH_WAIT`` secondes, puis reçoit un 503.
+- Après ``LOGIN_MAX_FAILURES`` échecs sur un nom d'utilisateur (ou
+  ``LOGIN_MAX_FAILURES_PER_IP`` depuis une adresse) dans les
+  ``LOGIN_FAILURE_WINDOW`` dernières secondes, la tentative est refusée
+  (429) avant tout calcul de hash. Les compteurs sont tenus par worker.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    from gevent import get_hub, monkey
+except ImportError:  # gevent est optionnel
+    monkey = None
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'  # défaut de Werkzeug
+
+
+class PasswordBusy(RuntimeError):
+    """Trop de calculs de hash en attente sur ce worker."""
+
+
+def init_app(app):
+    app.extensions['passwords'] = Hasher(app.config['PASSWORD_HASH_THREADS'], app.config['PASSWORD_HASH_QUEUE'],
+                                         app.config['PASSWORD_HASH_WAIT'])
+    app.extensions['login_failures'] = FailureLog(app.config['LOGIN_FAILURE_WINDOW'],
+                                                  app.config['LOGIN_FAILURE_MAX_KEYS'])
+    app.register_error_handler(PasswordBusy, _busy)
+
+
+def _busy(error):
+    return 'Server busy, please retry in a few seconds.', 503, {'Retry-After': '5'}
+
+
+class Hasher:
+    """Pool borné : ``threads`` calculs en parallèle, ``queue`` en attente au plus."""
+
+    def __init__(self, threads, queue, wait):
+        self.wait = wait
+        self.slots = threading.BoundedSemaphore(threads + queue)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='password')
+
+    def run(self, function, *args):
+        if not self.slots.acquire(timeout=self.wait):
+            raise PasswordBusy()
+        try:
+            if monkey is not None and monkey.is_module_patched('threading'):
+                # threads gevent = greenlets : le calcul bloquerait la boucle
+                return get_hub().threadpool.apply(function, args)
+            return self.executor.submit(function, *args).result()
+        finally:
+            self.slots.release()
+
+
+def _run(function, *args):
+    if not has_app_context():  # script hors application
+        return function(*args)
+    return current_app.extensions['passwords'].run(function, *args)
+
+
+def _method():
+    return current_app.config['PASSWORD_HASH_METHOD'] if has_app_context() else DEFAULT_METHOD
+
+
+@lru_cache(maxsize=8)
+def _canonical(method):
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def hash_password(password):
+    """Hash de ``password`` avec ``PASSWORD_HASH_METHOD``."""
+    return _run(generate_password_hash, password, _method())
+
+
+def verify(password_hash, password):
+    """Vrai si ``password`` correspond à ``password_hash``."""
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """Vrai si ``password_hash`` n'a pas été calculé avec les paramètres actuels."""
+    return password_hash.split('$', 1)[0] != _canonical(_method())
+
+
+class FailureLog:
+    """Dates des échecs récents par clé (nom d'utilisateur, adresse), en LRU borné."""
+
+    def __init__(self, window, max_keys):
+        self.window = window
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def _recent(self, key, now):
+        failures = self.entries.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        return failures
+
+    def retry_after(self, key, limit, now=None):
+        """Secondes avant une nouvelle tentative pour ``key``, ou 0."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            failures = self._recent(key, now)
+            if not failures or len(failures) < limit:
+                return 0
+            return max(1, int(failures[-limit] + self.window - now + 1))
+
+    def add(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self.entries[key] = deque()
+            failures.append(now)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+
+    def clear(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+def _keys(username, address):
+    config = current_app.config
+    keys = ((('user', (username or '').lower()), config['LOGIN_MAX_FAILURES']),
+            (('ip', address), config['LOGIN_MAX_FAILURES_PER_IP']))
+    return [(key, limit) for key, limit in keys if limit]
+
+
+def login_retry_after(username, address):
+    """Secondes à attendre avant de vérifier un mot de passe pour ce nom ou cette adresse, ou 0."""
+    failures = current_app.extensions['login_failures']
+    return max((failures.retry_after(key, limit) for key, limit in _keys(username, address)), default=0)
+
+
+def login_failed(username, address):
+    failures = current_app.extensions['login_failures']
+    for key, _limit in _keys(username, address):
+        failures.add(key)
+
+
+def login_succeeded(username):
+    current_app.extensions['login_failures'].clear(('user', (username or '').lower()))
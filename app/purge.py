@@ -0,0 +1,174 @@
+"""
+Purge des lignes supprimées logiquement (``deleted_at``).
+
+Les suppressions côté admin ne font que poser ``deleted_at`` : la requête
+répond tout de suite. La purge supprime ensuite physiquement par petits lots,
+chaque lot dans sa propre transaction courte, avec une pause entre deux lots
+pour laisser passer les écritures des autres workers SQLite.
+
+Lancement : ``flask purge`` (à planifier), ou en tâche de fond après une
+suppression admin si ``PURGE_IN_BACKGROUND`` est activé.
+"""
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy import delete, select
+
+from app import db, shards
+from app.models import ArchivedIdea, Idea, User, UserTagCount
+from app.signals import deleted_changes, notify
+
+_ALL = {'include_deleted': True}
+
+
+class PurgeProgress:
+    """État de la purge en cours (ou de la dernière), partagé avec l'admin."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = False
+        self.ideas = 0
+        self.users = 0
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'running': self.running,
+                'deleted_ideas': self.ideas,
+                'deleted_users': self.users,
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+                'error': self.error,
+            }
+
+
+def init_app(app):
+    app.extensions['purge'] = PurgeProgress()
+    app.cli.add_command(purge_command)
+
+
+def _delete_ideas(ids):
+    db.session.execute(delete(Idea).where(Idea.id.in_(ids)).execution_options(synchronize_session=False))
+
+
+def purge(batch_size=500, pause=0.05, progress=None, report=None):
+    """Supprime physiquement idées et utilisateurs marqués ``deleted_at``.
+
+    ``report(message)`` est appelé après chaque lot. Retourne
+    (idées supprimées, utilisateurs supprimés).
+    """
+    ideas = users = 0
+
+    def batch_done(count, what):
+        nonlocal ideas
+        ideas += count
+        if progress is not None:
+            with progress.lock:
+                progress.ideas += count
+        if report:
+            report(f'{ideas} idée(s) supprimée(s) ({what})')
+        time.sleep(pause)
+
+    # 1. Idées supprimées individuellement : déjà retirées des compteurs dérivés
+    for _shard in shards.each():
+        while True:
+            ids = db.session.scalars(
+                select(Idea.id).where(Idea.deleted_at.isnot(None)).limit(batch_size)
+                .execution_options(**_ALL)).all()
+            if not ids:
+                break
+            _delete_ideas(ids)
+            db.session.commit()
+            batch_done(len(ids), 'idées supprimées')
+
+    # 2. Utilisateurs supprimés : leurs idées, lot par lot, puis le compte
+    #    (relu à chaque tour pour inclure les suppressions faites pendant la purge)
+    while True:
+        user_id = db.session.scalar(
+            select(User.id).where(User.deleted_at.isnot(None)).limit(1).execution_options(**_ALL))
+        if user_id is None:
+            break
+        with shards.use(shards.shard_of(user_id)):
+            while True:
+                ids = db.session.scalars(
+                    select(Idea.id).where(Idea.user_id == user_id).limit(batch_size)
+                    .execution_options(**_ALL)).all()
+                if not ids:
+                    break
+                notify(db.session, deleted_changes(db.session, Idea.id.in_(ids)))
+                _delete_ideas(ids)
+                db.session.commit()
+                batch_done(len(ids), f'utilisateur {user_id}')
+            db.session.execute(delete(ArchivedIdea).where(ArchivedIdea.user_id == user_id))
+            db.session.execute(delete(UserTagCount).where(UserTagCount.user_id == user_id))
+        db.session.execute(delete(User).where(User.id == user_id))
+        db.session.commit()
+        users += 1
+        if progress is not None:
+            with progress.lock:
+                progress.users += 1
+        if report:
+            report(f'utilisateur {user_id} supprimé')
+    return ideas, users
+
+
+def _run(app, progress):
+    with app.app_context():
+        try:
+            purge(app.config['PURGE_BATCH_SIZE'], app.config['PURGE_PAUSE'], progress=progress,
+                  report=app.logger.info)
+        except Exception as exc:  # la purge reprendra au prochain lancement
+            db.session.rollback()
+            app.logger.exception('Purge interrompue')
+            with progress.lock:
+                progress.error = str(exc)
+        finally:
+            db.session.remove()
+            with progress.lock:
+                progress.running = False
+                progress.finished_at = datetime.utcnow()
+
+
+def start_background_purge():
+    """Lance la purge dans un thread si aucune n'est déjà en cours."""
+    app = current_app._get_current_object()
+    progress = app.extensions['purge']
+    with progress.lock:
+        if progress.running:
+            return False
+        progress.running = True
+        progress.ideas = progress.users = 0
+        progress.started_at, progress.finished_at, progress.error = datetime.utcnow(), None, None
+    threading.Thread(target=_run, args=(app, progress), name='purge', daemon=True).start()
+    return True
+
+
+def soft_delete_user(user):
+    """Marque l'utilisateur supprimé ; ses idées sont purgées plus tard."""
+    user.deleted_at = datetime.utcnow()
+    db.session.commit()
+    if current_app.config['PURGE_IN_BACKGROUND']:
+        start_background_purge()
+
+
+def soft_delete_idea(idea):
+    idea.deleted_at = datetime.utcnow()
+    db.session.commit()
+
+
+@click.command('purge')
+@click.option('--batch-size', default=None, type=int, help='Lignes supprimées par transaction.')
+@click.option('--pause', default=None, type=float, help='Pause entre deux lots (secondes).')
+def purge_command(batch_size, pause):
+    """Supprime physiquement les idées et utilisateurs supprimés logiquement."""
+    config = current_app.config
+    ideas, users = purge(batch_size or config['PURGE_BATCH_SIZE'],
+                         config['PURGE_PAUSE'] if pause is None else pause,
+                         report=click.echo)
+    click.echo(f'Purge terminée : {ideas} idée(s), {users} utilisateur(s).')
@@ -0,0 +1,178 @@
+"""
+Lecture rapide des listes (dashboard, calendrier, exports, listes admin).
+
+Ces vues n'affichent que quelques colonnes : plutôt que de construire des
+objets ``Idea`` (identity map, suivi des modifications, ``author`` chargé à la
+demande), elles exécutent un ``select()`` Core sur la connexion de la session
+avec une liste de colonnes explicite et reçoivent des ``Row`` SQLAlchemy
+(tuples nommés, accès par attribut comme un objet). Les jointures utiles
+(nom de l'auteur, nombre d'idées) sont faites dans la même requête.
+
+Le filtre des suppressions logiques (``do_orm_execute``) ne s'applique pas à
+ce chemin : chaque requête exclut ``deleted_at`` elle-même, celui des idées
+comme celui de leur auteur (idées d'un utilisateur supprimé, en attente de
+purge). Les lignes ne sont pas modifiables ; pour écrire, recharger l'``Idea``.
+
+Avec des shards (cf. app/shards.py), les listes admin interrogent chaque
+shard en parallèle puis fusionnent les pages, triées de la même façon.
+"""
+import csv
+import io
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import func, select
+
+from app import db, shards
+from app.models import Idea, User
+
+# colonnes des cartes du dashboard (y compris le HTML stocké, cf. app/rendering.py)
+CARD = (Idea.id, Idea.title, Idea.description, Idea.description_html, Idea.description_hash,
+        Idea.tags, Idea.status, Idea.timestamp)
+CALENDAR = (Idea.id, Idea.title, Idea.description, Idea.tags, Idea.status, Idea.timestamp,
+            Idea.scheduled_at, Idea.published_at)
+CSV = (Idea.title, Idea.description, Idea.tags, Idea.status, Idea.timestamp)
+CSV_HEADER = ['Title', 'Description', 'Tags', 'Status', 'Date']
+
+_visible_idea = Idea.deleted_at.is_(None)
+_visible_user = User.deleted_at.is_(None)
+
+
+def _connection(statement):
+    return db.session.connection(bind_arguments={'clause': statement})
+
+
+def _rows(statement):
+    return _connection(statement).execute(statement).all()
+
+
+def _scalar(statement):
+    return _connection(statement).execute(statement).scalar()
+
+
+def _user_ideas(user_id, tags=()):
+    query = select(Idea.id).where(Idea.user_id == user_id, _visible_idea)
+    for tag in tags:
+        query = query.where(Idea.tags.contains(tag))
+    return query
+
+
+def idea_page(user_id, tags=(), offset=0, limit=10):
+    """(cartes de la page, total) des idées de l'utilisateur, les plus récentes d'abord."""
+    query = _user_ideas(user_id, tags)
+    total = _scalar(select(func.count()).select_from(query.subquery()))
+    rows = _rows(query.with_only_columns(*CARD).order_by(Idea.timestamp.desc()).offset(offset).limit(limit))
+    return rows, total
+
+
+def user_ideas(user_id, columns, order_by=None):
+    query = _user_ideas(user_id).with_only_columns(*columns)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return _rows(query)
+
+
+class _Page(Pagination):
+    """Pagination Flask-SQLAlchemy sur des lignes déjà lues."""
+
+    def __init__(self, items, total, page, per_page):
+        self._items, self._total = items, total
+        super().__init__(page=page, per_page=per_page, error_out=False)
+
+    def _query_items(self):
+        return self._items
+
+    def _query_count(self):
+        return self._total
+
+
+def admin_idea_page(page, per_page=20, status=None, search=None):
+    """Page de la liste admin des idées, avec le nom de l'auteur (jointure, pas de chargement par idée)."""
+    query = select(Idea.id).join(User, User.id == Idea.user_id).where(_visible_idea, _visible_user)
+    if status:
+        query = query.where(Idea.status == status)
+    if search:
+        query = query.where(Idea.title.contains(search))
+    page = max(page, 1)
+    query = query.with_only_columns(Idea.id, Idea.title, Idea.tags, Idea.status, Idea.timestamp,
+                                    User.username.label('author_name'))
+    # avec des shards, chaque shard renvoie ses ``page × per_page`` premières lignes
+    offset = 0 if shards.count() else (page - 1) * per_page
+    parts = shards.fan_out(_slice, query, Idea.timestamp.desc(), offset, page * per_page - offset)
+    rows = shards.merge_sorted([rows for rows, _total in parts], reverse=True,
+                               key=lambda row: row.timestamp or datetime.min)
+    start = (page - 1) * per_page - offset
+    return _Page(rows[start:start + per_page], sum(total for _rows, total in parts), page, per_page)
+
+
+def _slice(query, order_by, offset, limit):
+    """(lignes ``offset`` à ``offset + limit`` de ``query``, total)."""
+    total = _scalar(select(func.count()).select_from(query.subquery()))
+    return _rows(query.order_by(order_by).offset(offset).limit(limit)), total
+
+
+def idea_status_counts():
+    """{statut: nombre d'idées}, en une requête par shard."""
+    counts = {}
+    query = (select(Idea.status, func.count()).join(User, User.id == Idea.user_id)
+             .where(_visible_idea, _visible_user).group_by(Idea.status))
+    for part in shards.fan_out(_rows, query):
+        for status, count in part:
+            counts[status] = counts.get(status, 0) + count
+    return counts
+
+
+_UserRow = namedtuple('_UserRow', 'id username is_admin created_at idea_count')
+
+
+def admin_user_page(page, per_page=20, search=None):
+    """Page de la liste admin des utilisateurs, avec leur nombre d'idées."""
+    idea_count = (select(func.count()).where(Idea.user_id == User.id, _visible_idea)
+                  .correlate(User).scalar_subquery())
+    query = select(User.id).where(_visible_user)
+    if search:
+        query = query.where(User.username.contains(search))
+    page = max(page, 1)
+    total = _scalar(select(func.count()).select_from(query.subquery()))
+    query = (query.with_only_columns(User.id, User.username, User.is_admin, User.created_at,
+                                     idea_count.label('idea_count'))
+             .order_by(User.id).offset((page - 1) * per_page).limit(per_page))
+    # mêmes utilisateurs dans chaque shard (base centrale attachée) : les nombres d'idées s'additionnent
+    parts = shards.fan_out(_rows, query)
+    rows = [_UserRow(*row[:-1], sum(part[index].idea_count for part in parts))
+            for index, row in enumerate(parts[0])] if len(parts) > 1 else parts[0]
+    return _Page(rows, total, page, per_page)
+
+
+def user_counts():
+    """Totaux de la liste admin des utilisateurs, en une requête."""
+    since = datetime.utcnow() - timedelta(days=30)
+    row = _rows(select(func.count(), func.count().filter(User.created_at >= since),
+                       func.count().filter(User.is_admin.is_(True))).where(_visible_user))[0]
+    return {'total': row[0], 'active': row[1], 'admin': row[2]}
+
+
+# ------------------ SÉRIALISATION ------------------ #
+
+def json_rows(rows, fields):
+    """Lignes -> dicts JSON (dates au format ISO)."""
+    return [{field: value.isoformat() if isinstance(value, datetime) else value
+             for field, value in zip(fields, row)} for row in rows]
+
+
+def csv_lines(rows, header=CSV_HEADER):
+    """Morceaux CSV (une ligne par morceau) ; date au format ``%Y-%m-%d %H:%M``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take(values):
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield take(header)
+    for title, description, tags, status, timestamp in rows:
+        yield take([title, description, tags, status, timestamp.strftime('%Y-%m-%d %H:%M')])
@@ -0,0 +1,247 @@
+"""
+Idées liées : similarité TF-IDF sur un sac de mots haché, calculée localement.
+
+Chaque idée a un vecteur creux (termes hachés sur ``DIMENSIONS`` + poids
+``1 + log(tf)``) stocké dans ``IdeaVector``. Pour chaque utilisateur, un index
+en mémoire range tous ses vecteurs par terme (format colonne) : les voisins
+d'une idée s'obtiennent en ne parcourant que les listes des termes de l'idée,
+puis en sommant les contributions avec ``np.bincount``.
+
+Les idées créées ou modifiées après la construction vont dans un petit index
+delta ; au-delà de ``REBUILD_RATIO`` de modifications, l'index est reconstruit.
+Aucun appel à un service externe.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select
+
+from app import db
+from app.caching import PerUserCache
+from app.models import Idea, IdeaVector
+from app.signals import ideas_committed, ideas_flushed
+from app.tag_stats import split_tags
+
+DIMENSIONS = 1 << 20
+TITLE_WEIGHT = 2  # un mot du titre compte double
+TAG_WEIGHT = 2
+REBUILD_RATIO = 0.1
+
+STOPWORDS = frozenset('''
+    the and for with that this from your you are how what why when our its into about
+    les des une pour avec dans sur par pas que qui est son ses aux du de la le un et en
+'''.split())
+
+related_cli = AppGroup('related', help='Idées liées (TF-IDF).')
+
+
+def init_app(app):
+    app.extensions['related'] = PerUserCache(
+        _load_index, app.config['RELATED_INDEX_TTL'], app.config['RELATED_INDEX_MAX_USERS'])
+    app.cli.add_command(related_cli)
+
+
+def _hash(token):
+    return zlib.crc32(token.encode()) % DIMENSIONS
+
+
+def term_frequencies(title, description, tags):
+    """(termes uint32 triés, poids float32) de l'idée ; tableaux vides si aucun mot."""
+    counts = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1)):
+        for word in re.findall(r'[^\W\d_]{3,}', (text or '').lower()):
+            if word not in STOPWORDS:
+                counts[_hash(word)] += weight
+    for tag in split_tags(tags):
+        counts[_hash('#' + tag)] += TAG_WEIGHT
+    terms = np.array(sorted(counts), dtype=np.uint32)
+    weights = np.array([1 + math.log(counts[t]) for t in terms.tolist()], dtype=np.float32)
+    return terms, weights
+
+
+class RelatedIndex:
+    """Vecteurs TF-IDF normalisés des idées d'un utilisateur, rangés par terme."""
+
+    def __init__(self, rows):
+        ids, term_chunks, weight_chunks, row_chunks = [], [], [], []
+        for position, (idea_id, terms, weights) in enumerate(rows):
+            ids.append(idea_id)
+            term_chunks.append(terms)
+            weight_chunks.append(weights.astype(np.float32))
+            row_chunks.append(np.full(len(terms), position, dtype=np.int32))
+        self.ids = np.array(ids, dtype=np.int64)
+        self.position = {idea_id: i for i, idea_id in enumerate(ids)}
+        self.stale = np.zeros(len(ids), dtype=bool)
+        self.delta = {}  # idea_id -> (termes, poids tf) des idées modifiées depuis la construction
+
+        terms = np.concatenate(term_chunks) if term_chunks else np.zeros(0, np.uint32)
+        weights = np.concatenate(weight_chunks) if weight_chunks else np.zeros(0, np.float32)
+        rows_ = np.concatenate(row_chunks) if row_chunks else np.zeros(0, np.int32)
+
+        # idf lissé, calculé une fois par construction
+        self.vocabulary, df = np.unique(terms, return_counts=True)
+        self.idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+        self.default_idf = np.float32(math.log(1 + len(ids)) + 1)
+
+        weights = weights * self.idf[np.searchsorted(self.vocabulary, terms)]
+        norms = np.sqrt(np.bincount(rows_, weights=weights * weights, minlength=len(ids)))
+        weights = weights / np.maximum(norms, 1e-12)[rows_]
+
+        order = np.argsort(terms, kind='stable')
+        self.terms, self.rows, self.weights = terms[order], rows_[order], weights[order].astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def needs_rebuild(self):
+        return len(self.delta) + int(self.stale.sum()) > max(64, REBUILD_RATIO * len(self.ids))
+
+    def vector(self, terms, weights):
+        """Vecteur TF-IDF normalisé (avec l'idf de l'index)."""
+        found = np.searchsorted(self.vocabulary, terms)
+        found = np.minimum(found, max(len(self.vocabulary) - 1, 0))
+        known = (self.vocabulary[found] == terms) if len(self.vocabulary) else np.zeros(len(terms), bool)
+        idf = np.where(known, self.idf[found] if len(self.idf) else 0, self.default_idf)
+        weighted = weights * idf
+        norm = np.sqrt((weighted * weighted).sum())
+        return weighted / norm if norm else weighted
+
+    def update(self, idea_id, terms=None, weights=None):
+        """Enregistre une idée créée/modifiée (``terms`` fourni) ou supprimée."""
+        position = self.position.get(idea_id)
+        if position is not None:
+            self.stale[position] = True
+        if terms is None or not len(terms):
+            self.delta.pop(idea_id, None)
+        else:
+            self.delta[idea_id] = (terms, weights)
+
+    def neighbours(self, idea_id, terms, weights, k=5):
+        """Les ``k`` idées les plus proches : liste de (id, score) décroissante."""
+        if not len(terms):
+            return []
+        query = self.vector(terms, weights)
+        lo = np.searchsorted(self.terms, terms, side='left')
+        hi = np.searchsorted(self.terms, terms, side='right')
+        lengths = hi - lo
+        total = int(lengths.sum())
+        results = []
+        if total:
+            # indices de toutes les listes de termes concernées, sans boucle Python
+            starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+            index = starts + np.arange(total)
+            contributions = self.weights[index] * np.repeat(query, lengths)
+            scores = np.bincount(self.rows[index], weights=contributions, minlength=len(self.ids))
+            scores[self.stale] = 0
+            position = self.position.get(idea_id)
+            if position is not None:
+                scores[position] = 0
+            top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+            results = [(int(self.ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+        for other_id, (other_terms, other_weights) in self.delta.items():
+            if other_id == idea_id:
+                continue
+            other = self.vector(other_terms, other_weights)
+            common, qi, oi = np.intersect1d(terms, other_terms, assume_unique=True, return_indices=True)
+            if len(common):
+                results.append((other_id, float((query[qi] * other[oi]).sum())))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:k]
+
+
+def _load_index(user_id):
+    rows = db.session.execute(
+        select(IdeaVector.idea_id, IdeaVector.terms, IdeaVector.weights)
+        .where(IdeaVector.user_id == user_id))
+    return RelatedIndex((idea_id, np.frombuffer(terms, dtype=np.uint32), np.frombuffer(weights, dtype=np.float16))
+                        for idea_id, terms, weights in rows)
+
+
+def related_ideas(idea, k=5):
+    """Idées de l'auteur les plus proches de ``idea`` (objets ``Idea``)."""
+    cache = current_app.extensions['related']
+    index = cache.get(idea.user_id)
+    terms, weights = term_frequencies(idea.title, idea.description, idea.tags)
+    with cache.lock:
+        scored = index.neighbours(idea.id, terms, weights, k)
+    if not scored:
+        return []
+    ideas = {i.id: i for i in Idea.query.filter(Idea.id.in_([idea_id for idea_id, _ in scored]))}
+    return [ideas[idea_id] for idea_id, _ in scored if idea_id in ideas]
+
+
+def _vector_row(idea_id, user_id, terms, weights):
+    return {'idea_id': idea_id, 'user_id': user_id,
+            'terms': terms.tobytes(), 'weights': weights.astype(np.float16).tobytes()}
+
+
+def _text_changed(change):
+    return change.old is None or change.new is None or change.changed('user_id', 'title', 'description', 'tags')
+
+
+@ideas_flushed.connect
+def _on_ideas_flushed(session, connection, changes):
+    stale, rows = [], []
+    for change in filter(_text_changed, changes):
+        if change.old is not None:
+            stale.append(change.id)
+        if change.new is not None:
+            new = change.new
+            terms, weights = term_frequencies(new['title'], new['description'], new['tags'])
+            if len(terms):
+                rows.append(_vector_row(change.id, new['user_id'], terms, weights))
+    if stale:
+        connection.execute(delete(IdeaVector).where(IdeaVector.idea_id.in_(stale)))
+    if rows:
+        connection.execute(insert(IdeaVector), rows)
+
+
+@ideas_committed.connect
+def _on_ideas_committed(session, changes):
+    cache = current_app.extensions['related']
+    touched = {}
+    with cache.lock:
+        for change in filter(_text_changed, changes):
+            if change.old is not None:
+                index = cache.peek(change.old['user_id'])
+                if index is not None:
+                    index.update(change.id)
+                    touched[change.old['user_id']] = index
+            if change.new is not None:
+                index = cache.peek(change.new['user_id'])
+                if index is not None:
+                    new = change.new
+                    index.update(change.id, *term_frequencies(new['title'], new['description'], new['tags']))
+                    touched[change.new['user_id']] = index
+    for user_id, index in touched.items():
+        if index.needs_rebuild():
+            cache.discard(user_id)
+
+
+def rebuild(batch_size=2000):
+    """Recalcule les vecteurs de toutes les idées."""
+    db.session.execute(delete(IdeaVector))
+    rows = db.session.execute(
+        select(Idea.id, Idea.user_id, Idea.title, Idea.description, Idea.tags)
+        .execution_options(yield_per=batch_size))
+    vectors = []
+    for idea_id, user_id, title, description, tags in rows:
+        terms, weights = term_frequencies(title, description, tags)
+        if len(terms):
+            vectors.append(_vector_row(idea_id, user_id, terms, weights))
+    for start in range(0, len(vectors), batch_size):
+        db.session.execute(insert(IdeaVector), vectors[start:start + batch_size])
+    db.session.commit()
+    return len(vectors)
+
+
+@related_cli.command('rebuild')
+def rebuild_command():
+    """Recalcule les vecteurs TF-IDF des idées existantes."""
+    click.echo(f'{rebuild()} vecteur(s) calculé(s).')
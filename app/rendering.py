@@ -0,0 +1,145 @@
+"""
+Rendu Markdown des descriptions d'idées et des suggestions IA.
+
+- Un seul ``markdown.Markdown`` par thread, réinitialisé (``reset()``) entre
+  deux rendus : l'analyseur et ses extensions ne sont construits qu'une fois.
+- Le HTML brut est échappé et les liens ``javascript:`` (ou autres schémas
+  non listés) sont retirés : les descriptions sont saisies par les
+  utilisateurs.
+- Le HTML d'une description est stocké avec l'idée (``description_html``),
+  avec l'empreinte du texte rendu (``description_hash``). Il est recalculé
+  dans la transaction qui modifie la description (signal ``ideas_flushed``) ;
+  à l'affichage, une empreinte différente (ligne écrite hors ORM, ancienne
+  idée) fait retomber sur un rendu à la volée, gardé en LRU par processus.
+
+Après un changement de ``RENDER_VERSION`` ou de la configuration de
+l'analyseur, relancer ``flask markdown rebuild`` (ou, sans bloquer les
+écritures, ``flask backfill run description_html --restart``).
+"""
+import hashlib
+import html
+import re
+import threading
+from functools import lru_cache
+
+import click
+import markdown
+from flask.cli import AppGroup
+from markdown.treeprocessors import Treeprocessor
+from markupsafe import Markup
+from sqlalchemy import bindparam, select, update
+
+from app.backfill import register, run
+from app.models import Idea
+from app.signals import ideas_flushed
+
+RENDER_VERSION = '2'
+EXTENSIONS = ['fenced_code', 'sane_lists']
+SAFE_SCHEMES = ('http', 'https', 'mailto')
+_IGNORED = re.compile(r'[\x00-\x20\x7f]')  # blancs et caractères de contrôle, ignorés par les navigateurs
+_SCHEME = re.compile(r'^([a-z][a-z0-9+.-]*):')
+
+markdown_cli = AppGroup('markdown', help='Rendu Markdown des descriptions.')
+
+_local = threading.local()
+
+
+def init_app(app):
+    app.add_template_filter(description_html)
+    app.cli.add_command(markdown_cli)
+
+
+class _SafeLinks(Treeprocessor):
+    """Retire les URLs dont le schéma n'est pas dans ``SAFE_SCHEMES``."""
+
+    def run(self, root):
+        for element in root.iter():
+            for attribute in ('href', 'src'):
+                url = element.get(attribute)
+                if url is not None and not safe_url(url):
+                    del element.attrib[attribute]
+
+
+def safe_url(url):
+    """Vrai pour une URL relative ou en ``http:``, ``https:``, ``mailto:``.
+
+    Le schéma est lu comme le ferait le navigateur : entités HTML décodées
+    (``javascript&colon;``), blancs et caractères de contrôle retirés.
+    """
+    url = _IGNORED.sub('', html.unescape(url)).lower()
+    match = _SCHEME.match(url)
+    if match:
+        return match.group(1) in SAFE_SCHEMES
+    return ':' not in re.split(r'[/?#]', url, 1)[0]
+
+
+def _parser():
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = markdown.Markdown(extensions=EXTENSIONS, output_format='html')
+        # pas de HTML brut : il est rendu comme du texte
+        parser.preprocessors.deregister('html_block')
+        parser.inlinePatterns.deregister('html')
+        parser.treeprocessors.register(_SafeLinks(parser), 'safe_links', 0)
+        _local.parser = parser
+    return parser
+
+
+def render(text):
+    """HTML (``Markup``) de ``text``, avec l'analyseur du thread courant."""
+    return Markup(_parser().reset().convert(text or ''))
+
+
+def digest(text):
+    """Empreinte du texte source et de la version du rendu."""
+    return hashlib.blake2b(f'{RENDER_VERSION}\0{text or ""}'.encode(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=2048)
+def _render_cached(text):
+    return render(text)
+
+
+def description_html(idea):
+    """Filtre Jinja : HTML de la description d'une idée."""
+    if not idea.description:
+        return Markup('')
+    if idea.description_html is not None and idea.description_hash == digest(idea.description):
+        return Markup(idea.description_html)
+    return _render_cached(idea.description)
+
+
+_store = (update(Idea.__table__).where(Idea.__table__.c.id == bindparam('b_id'))
+          .values(description_html=bindparam('b_html'), description_hash=bindparam('b_hash')))
+
+
+@ideas_flushed.connect
+def _on_ideas_flushed(session, connection, changes):
+    rows = [{'b_id': change.id, 'b_html': str(render(change.new['description'])),
+             'b_hash': digest(change.new['description'])}
+            for change in changes
+            if change.new is not None and (change.old is None or change.changed('description'))]
+    if rows:
+        connection.execute(_store, rows)
+
+
+@register('description_html', 'Calcule le HTML stocké des descriptions (idea.description_html)')
+def _render_batch(session, ids):
+    rows = session.execute(select(Idea.id, Idea.description, Idea.description_hash)
+                           .where(Idea.id.in_(ids)).execution_options(include_deleted=True))
+    stale = [{'b_id': row.id, 'b_html': str(render(row.description)), 'b_hash': digest(row.description)}
+             for row in rows if row.description_hash != digest(row.description)]
+    if stale:
+        session.execute(_store, stale)
+    return len(stale)
+
+
+def rebuild(batch_size=500):
+    """Recalcule le HTML des descriptions dont l'empreinte ne correspond plus."""
+    return run('description_html', batch_size, pause=0, duty_cycle=1, restart=True).changed
+
+
+@markdown_cli.command('rebuild')
+def rebuild_command():
+    """Recalcule le HTML stocké des descriptions."""
+    click.echo(f'{rebuild()} description(s) rendue(s).')
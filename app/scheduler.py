@@ -0,0 +1,158 @@
+"""
+Publication programmée des idées (``Idea.scheduled_at``).
+
+Le planificateur tourne dans son propre processus (``flask scheduler run``) :
+
+- il charge les échéances de la fenêtre à venir (``SCHEDULER_HORIZON``) par
+  une requête d'intervalle sur l'index partiel ``ix_idea_due``, qui ne
+  contient que les idées non publiées : le coût ne dépend pas du nombre
+  d'idées déjà publiées ;
+- il garde ces échéances dans un tas ``(scheduled_at, id)`` et dort jusqu'à la
+  prochaine (ou jusqu'au prochain rechargement, ``SCHEDULER_REFRESH``) : au
+  repos, aucune requête ni calcul entre deux réveils ;
+- les idées échues sont publiées par lots avec un seul ``UPDATE ... WHERE
+  status != 'Published' AND scheduled_at <= now RETURNING id`` : cette
+  condition sert de réservation. Si plusieurs planificateurs tournent, une
+  idée n'est publiée (et notifiée) que par celui dont l'``UPDATE`` l'a
+  effectivement modifiée. La date programmée passe dans ``published_at`` et
+  ``scheduled_at`` est vidé : une idée repassée en brouillon n'est pas
+  republiée, ``scheduled_at`` ne désignant que des publications à venir.
+
+Une idée programmée ou reprogrammée depuis le web est prise en compte au
+rechargement suivant (au plus ``SCHEDULER_REFRESH`` secondes de retard).
+``flask scheduler run --once`` publie les idées échues puis s'arrête (cron).
+"""
+import heapq
+import signal
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+
+from app import db
+from app.backfill import register
+from app.models import Idea
+from app.signals import IdeaChange, notify, tracked_values
+
+scheduler_cli = AppGroup('scheduler', help='Publication programmée des idées.')
+
+
+def init_app(app):
+    app.cli.add_command(scheduler_cli)
+
+
+def _due(until):
+    # mêmes termes que le prédicat de ix_idea_due, pour que l'index partiel soit utilisé
+    return Idea.status != 'Published', Idea.scheduled_at <= until
+
+
+def publish(ids, now=None):
+    """Publie celles des idées ``ids`` qui sont échues ; retourne le nombre publié ici."""
+    now = now or datetime.utcnow()
+    session = db.session
+    due = (*_due(now), Idea.id.in_(ids))
+    old = tracked_values(session, *due)
+    if not old:
+        session.rollback()
+        return 0
+    # réservation : un autre planificateur a pu publier entre-temps, seul l'UPDATE fait foi
+    claimed = session.scalars(
+        update(Idea).where(*due, Idea.id.in_(list(old)), Idea.deleted_at.is_(None))
+        .values(status='Published', published_at=Idea.scheduled_at, scheduled_at=None).returning(Idea.id)).all()
+    changes = (IdeaChange.make(id, old[id], dict(old[id], status='Published', scheduled_at=None))
+               for id in claimed)
+    notify(session, [change for change in changes if change is not None])
+    session.commit()
+    return len(claimed)
+
+
+@register('published_at', 'Reporte dans idea.published_at la date programmée des idées déjà publiées')
+def _published_at_batch(session, ids):
+    published = (Idea.id.in_(ids), Idea.status == 'Published', Idea.scheduled_at.isnot(None))
+    old = tracked_values(session, *published)
+    if old:
+        session.execute(update(Idea).where(*published).values(
+            published_at=func.coalesce(Idea.published_at, Idea.scheduled_at), scheduled_at=None))
+        changes = (IdeaChange.make(id, values, dict(values, scheduled_at=None)) for id, values in old.items())
+        notify(session, [change for change in changes if change is not None])
+    return len(old)
+
+
+def publish_due(now=None, batch_size=500):
+    """Publie toutes les idées échues à ``now``, par lots de ``batch_size``."""
+    now = now or datetime.utcnow()
+    published = 0
+    while True:
+        ids = db.session.scalars(
+            select(Idea.id).where(*_due(now)).order_by(Idea.scheduled_at).limit(batch_size)).all()
+        if not ids:
+            db.session.rollback()
+            return published
+        published += publish(ids, now)
+
+
+class Scheduler:
+    """Boucle du planificateur : tas des échéances proches, sommeil jusqu'à la suivante."""
+
+    def __init__(self, horizon=3600, refresh=30, batch_size=500, max_items=10000,
+                 clock=datetime.utcnow):
+        self.horizon = timedelta(seconds=horizon)
+        self.refresh = timedelta(seconds=refresh)
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.clock = clock
+        self.heap = []
+        self.next_load = None
+        self.truncated = False
+        self.published = 0
+
+    def load(self, now):
+        """Recharge le tas avec les échéances de ``[.., now + horizon]``."""
+        rows = db.session.execute(
+            select(Idea.scheduled_at, Idea.id).where(*_due(now + self.horizon))
+            .order_by(Idea.scheduled_at).limit(self.max_items)).all()
+        db.session.rollback()  # pas de transaction ouverte pendant le sommeil
+        self.heap = [tuple(row) for row in rows]  # déjà trié : c'est un tas valide
+        self.truncated = len(rows) == self.max_items
+        self.next_load = now + self.refresh
+
+    def tick(self, now):
+        """Publie les échéances passées ; retourne le délai (s) avant le prochain réveil."""
+        if self.next_load is None or now >= self.next_load or (self.truncated and not self.heap):
+            self.load(now)
+        ids = []
+        while self.heap and self.heap[0][0] <= now:
+            ids.append(heapq.heappop(self.heap)[1])
+        for start in range(0, len(ids), self.batch_size):
+            self.published += publish(ids[start:start + self.batch_size], now)
+        wake = self.next_load
+        if self.heap:
+            wake = min(wake, self.heap[0][0])
+        return max((wake - now).total_seconds(), 0)
+
+    def run(self, stop):
+        """Tourne jusqu'à ``stop.set()``."""
+        while not stop.is_set():
+            stop.wait(self.tick(self.clock()))
+
+
+@scheduler_cli.command('run')
+@click.option('--once', is_flag=True, help='Publie les idées échues puis s\'arrête.')
+def run_command(once):
+    """Publie les idées programmées à leur échéance."""
+    config = current_app.config
+    if once:
+        click.echo(f'{publish_due(batch_size=config["SCHEDULER_BATCH_SIZE"])} idée(s) publiée(s).')
+        return
+    scheduler = Scheduler(horizon=config['SCHEDULER_HORIZON'], refresh=config['SCHEDULER_REFRESH'],
+                          batch_size=config['SCHEDULER_BATCH_SIZE'],
+                          max_items=config['SCHEDULER_MAX_ITEMS'])
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    current_app.logger.info('Planificateur démarré')
+    scheduler.run(stop)
+    current_app.logger.info('Planificateur arrêté : %d idée(s) publiée(s)', scheduler.published)
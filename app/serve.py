@@ -0,0 +1,171 @@
+"""
+Lancement en production : ``flask serve`` (gunicorn, application préchargée).
+
+- L'application est créée et préchauffée une seule fois dans le processus
+  maître, avant le fork (``preload_app``) : imports, mappers SQLAlchemy,
+  gabarits compilés, empreintes des fichiers statiques et pages en cache
+  (l'URL fait partie de leur clé : elles ne sont préparées que pour
+  ``PREFERRED_URL_SCHEME://SERVER_NAME``, si ``SERVER_NAME`` est défini).
+  Les objets sont ensuite gelés (``gc.freeze()``) : les workers partagent ces
+  pages mémoire avec le maître au lieu de les recopier, et leur première
+  requête ne paie plus la compilation des gabarits.
+- Nombre de workers et de threads calculé depuis les CPU disponibles
+  (``SERVE_WORKERS`` / ``SERVE_THREADS`` pour forcer une valeur).
+- Un worker dont la mémoire résidente dépasse ``SERVE_MAX_RSS_MB`` termine
+  sa requête puis est remplacé ; ``SERVE_MAX_REQUESTS`` recycle aussi les
+  workers périodiquement.
+- Arrêt propre : sur SIGTERM, les requêtes en cours ont
+  ``SERVE_GRACEFUL_TIMEOUT`` secondes pour se terminer.
+
+Le mode gevent (``GUNICORN_WORKER_CLASS=gevent``) reste lancé par
+``gunicorn -c gunicorn.conf.py run:app`` : le monkey-patching doit précéder
+l'import de l'application, ce que le préchargement ne permet pas.
+"""
+import contextvars
+import gc
+import os
+
+import click
+from flask import current_app
+from gunicorn.app.base import BaseApplication
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers
+
+from app import assets, db, logs, pages, shards
+
+PAGES = ('/about', '/faq', '/robots.txt', '/sitemap.xml')
+ENCODINGS = ('br, gzip', 'gzip', None)
+
+
+def init_app(app):
+    app.cli.add_command(serve_command)
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        return os.cpu_count() or 1
+
+
+def tune(worker_class, cpus, workers=None, threads=None, max_workers=None):
+    """(workers, threads) : 2 × CPU + 1 workers en synchrone, CPU + 1 workers threadés sinon."""
+    if worker_class == 'sync':
+        workers, threads = workers or 2 * cpus + 1, 1
+    else:
+        workers, threads = workers or cpus + 1, threads or 4
+    if max_workers:
+        workers = min(workers, max_workers)
+    return workers, threads
+
+
+def rss_bytes():
+    """Mémoire résidente actuelle du processus."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # pic, en Kio sous Linux
+
+
+def warmup(app):
+    """Prépare dans le processus courant ce que chaque worker ferait à sa première requête."""
+    with app.app_context():
+        configure_mappers()
+        db.session.execute(select(1))
+        db.session.remove()
+        templates = pages.compile_templates(app.jinja_env)
+        static = 0
+        for root, _dirs, files in os.walk(app.static_folder):
+            for name in files:
+                filename = os.path.relpath(os.path.join(root, name), app.static_folder)
+                static += assets.static_digest(filename) is not None
+        # aucune connexion ouverte ne doit être partagée avec les workers
+        db.engine.dispose()
+        shards.dispose()
+    server_name = app.config['SERVER_NAME']
+    if server_name:
+        base_url = f"{app.config['PREFERRED_URL_SCHEME']}://{server_name}"
+        client = app.test_client()
+        for path in PAGES:
+            for encoding in ENCODINGS:
+                client.get(path, base_url=base_url, headers={'Accept-Encoding': encoding} if encoding else {})
+    gc.collect()
+    gc.freeze()
+    return templates, static
+
+
+class Server(BaseApplication):
+    """Application gunicorn qui sert ``app`` déjà chargée."""
+
+    def __init__(self, app, options):
+        self.app = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        for hook in ('post_fork', 'post_request', 'worker_exit'):
+            self.cfg.set(hook, getattr(self, hook))
+
+    def load(self):
+        return self.app
+
+    def post_fork(self, server, worker):
+        logs.after_fork()
+        with self.app.app_context():
+            db.engine.dispose(close=False)
+            shards.dispose(close=False)
+
+    def post_request(self, worker, req, environ, resp):
+        limit = self.app.config['SERVE_MAX_RSS_MB']
+        if limit and rss_bytes() > limit * 2 ** 20:
+            worker.log.info('worker %s : mémoire au-delà de %d Mio, recyclage', worker.pid, limit)
+            worker.alive = False  # sort après cette requête, le maître en relance un
+
+    def worker_exit(self, server, worker):
+        logs.flush()
+
+
+def options(config, bind, worker_class, workers, threads):
+    """Réglages gunicorn de ``flask serve``."""
+    workers, threads = tune(worker_class, cpu_count(), workers or config['SERVE_WORKERS'],
+                            threads or config['SERVE_THREADS'], config['SERVE_MAX_WORKERS'])
+    max_requests = config['SERVE_MAX_REQUESTS']
+    return {
+        'bind': bind,
+        'worker_class': worker_class,
+        'workers': workers,
+        'threads': threads,
+        'preload_app': True,
+        'timeout': 120,  # générations IA lentes
+        'graceful_timeout': config['SERVE_GRACEFUL_TIMEOUT'],
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests // 10,
+    }
+
+
+@click.command('serve')
+@click.option('--bind', default=lambda: os.environ.get('GUNICORN_BIND', '127.0.0.1:8000'), show_default='127.0.0.1:8000')
+@click.option('--worker-class', type=click.Choice(['sync', 'gthread']), default='gthread', show_default=True)
+@click.option('--workers', type=int, default=None, help='Par défaut : selon les CPU disponibles.')
+@click.option('--threads', type=int, default=None, help='Threads par worker (gthread).')
+@click.option('--no-warmup', is_flag=True, help='Ne préchauffe pas avant le fork (comparaison).')
+def serve_command(bind, worker_class, workers, threads, no_warmup):
+    """Sert l'application avec gunicorn."""
+    app = current_app._get_current_object()
+    settings = options(app.config, bind, worker_class, workers, threads)
+    # hors du contexte d'application de la commande : sinon chaque requête d'un
+    # worker synchrone le réutiliserait (et son ``g``)
+    contextvars.Context().run(_serve, app, settings, not no_warmup)
+
+
+def _serve(app, settings, preheat):
+    if preheat:
+        templates, static = warmup(app)
+        click.echo(f'Préchauffage : {templates} gabarit(s), {static} fichier(s) statique(s).')
+    click.echo(f'{settings["workers"]} worker(s) {settings["worker_class"]} × {settings["threads"]} '
+               f'thread(s) sur {settings["bind"]}')
+    Server(app, settings).run()
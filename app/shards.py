@@ -0,0 +1,558 @@
+"""
+Idées réparties par utilisateur entre plusieurs bases SQLite (optionnel).
+
+Avec une seule base, toutes les écritures de tous les utilisateurs passent
+par le même verrou SQLite. Avec ``IDEA_SHARDS = N`` (N > 0) :
+
+- les comptes (table ``user``) et les points de reprise des backfills
+  (``backfill_state``, une ligne par shard) restent dans la base centrale
+  (``SQLALCHEMY_DATABASE_URI``) ; toutes les autres tables (idées, archives,
+  compteurs, signatures, journal…) existent dans chacun des N fichiers
+  ``IDEA_SHARD_DIR/ideas-<k>.db`` (relatif à ``instance/``), créés au
+  démarrage depuis les modèles ;
+- les migrations Alembic ne portent que sur la base centrale. Au démarrage,
+  le schéma de chaque shard est comparé aux modèles : les tables, colonnes et
+  index nouveaux y sont ajoutés, toute autre différence (colonne retirée ou
+  modifiée…) empêche le démarrage (``ShardError``). Les changements de
+  données passent par les backfills (``flask backfill run``, cf. app/backfill.py) ;
+- chaque utilisateur appartient à un shard (``User.shard``, attribué à
+  l'inscription au shard qui a le moins de comptes) : pendant une requête,
+  la session envoie les requêtes sur ces tables au shard de l'utilisateur
+  connecté (``Session.get_bind``). Ailleurs (CLI, threads, générateur d'une
+  réponse en flux, qui s'exécute après la fin de la requête), le shard est
+  choisi avec ``use(k)`` ;
+- la base centrale est attachée à chaque shard (``ATTACH … AS central``) :
+  une jointure idée/utilisateur reste une seule requête ;
+- les ids (``idea.id``, ``idea_change_log.seq``) du shard k commencent à
+  k × 2**40 : ils restent uniques entre shards ;
+- les vues admin agrégées interrogent tous les shards en parallèle
+  (``fan_out``, ``SHARD_FANOUT_THREADS`` threads) puis fusionnent ;
+- pendant un déplacement (``User.moving_at``), les écritures de l'utilisateur
+  reçoivent un 503 : la copie lue reste celle qui est écrite dans le shard cible.
+
+Commandes : ``flask shards init`` (répartit les idées de la base centrale),
+``flask shards status``, ``flask shards move``, ``flask shards rebalance``,
+et ``flask shards each [--shard k] <commande>`` pour lancer une commande
+(``scheduler run``, ``archive run``, ``backfill run``, ``purge``…) sur chaque
+shard.
+"""
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import click
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from flask import current_app, g, has_app_context, request
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import MetaData, create_engine, delete, event, func, insert, inspect, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.util import find_tables
+
+from app import db
+from app.models import ArchivedIdea, Idea, IdeaChangeLog, User, UserTagCount
+from app.signals import IdeaChange, TRACKED_FIELDS, deleted_changes, notify
+
+shards_cli = AppGroup('shards', help='Idées réparties entre plusieurs bases SQLite.')
+
+CENTRAL_TABLES = {'user', 'backfill_state'}
+ID_STRIDE = 2 ** 40
+
+_current = ContextVar('idea_shard', default=None)
+
+# colonnes copiées lors d'un déplacement (l'id est réattribué par le shard cible)
+_IDEA_COLUMNS = [column for column in Idea.__table__.c if column.name != 'id']
+_ARCHIVED_COLUMNS = list(ArchivedIdea.__table__.c)
+
+
+class ShardError(RuntimeError):
+    pass
+
+
+class Shards:
+    """Moteurs des shards et pool de threads des requêtes parallèles."""
+
+    def __init__(self, engines, threads):
+        self.engines = engines
+        self.lock = threading.Lock()
+        self.threads = threads
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self.lock:
+            if self._executor is None:  # créé après le fork des workers
+                self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='shard')
+            return self._executor
+
+    def engine_for(self, mapper, clause):
+        """Moteur du shard courant si la requête lit ou écrit une table répartie, sinon None."""
+        tables = set()
+        if mapper is not None:
+            tables.add(inspect(mapper).local_table.name)
+        if clause is not None:
+            tables.update(table.name for table in find_tables(clause, include_crud=True))
+        shard = _current.get()
+        if not tables:  # session.connection() : shard courant s'il y en a un
+            return None if shard is None else self.engines[shard]
+        if tables <= CENTRAL_TABLES:
+            return None
+        if shard is None:
+            raise ShardError(f'Aucun shard choisi pour {sorted(tables - CENTRAL_TABLES)}')
+        return self.engines[shard]
+
+
+def init_app(app):
+    count = app.config['IDEA_SHARDS']
+    if not count:
+        return
+    directory = os.path.join(app.instance_path, app.config['IDEA_SHARD_DIR'])
+    os.makedirs(directory, exist_ok=True)
+    with app.app_context():
+        central = db.engine.url.database
+    engines = []
+    for index in range(count):
+        engine = create_engine(f'sqlite:///{os.path.join(directory, f"ideas-{index}.db")}')
+        event.listen(engine, 'connect', _connect_listener(central))
+        _create_schema(engine, index)
+        engines.append(engine)
+    app.extensions['shards'] = Shards(engines, min(app.config['SHARD_FANOUT_THREADS'], count))
+    app.before_request(_route_request)
+    app.teardown_request(_end_request)
+    app.cli.add_command(shards_cli)
+
+
+def _connect_listener(central):
+    def connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('ATTACH DATABASE ? AS central', (central,))
+        cursor.close()
+    return connect
+
+
+def _create_schema(engine, index):
+    """Tables réparties (depuis les modèles), ids du shard à partir de ``index × ID_STRIDE``."""
+    metadata = MetaData()
+    for table in db.metadata.sorted_tables:
+        table.to_metadata(metadata)  # ``user`` copiée pour les clés étrangères, pas créée
+    tables = [table for table in metadata.sorted_tables if table.name not in CENTRAL_TABLES]
+    sequences = [table.name for table in tables if table.autoincrement_column is not None]
+    for name in sequences:
+        metadata.tables[name].dialect_kwargs['sqlite_autoincrement'] = True
+    metadata.create_all(engine, tables=tables)
+    _upgrade_schema(engine, metadata, index)
+    with engine.begin() as connection:
+        for name in sequences:
+            connection.execute(text(
+                'INSERT INTO sqlite_sequence (name, seq) SELECT :name, :seq '
+                'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)'),
+                {'name': name, 'seq': index * ID_STRIDE})
+
+
+def _schema_diff(connection, metadata):
+    """Différences (format Alembic) entre les tables réparties des modèles et celles du shard."""
+    def include(obj, name, type_, reflected, compare_to):
+        table = name if type_ == 'table' else getattr(getattr(obj, 'table', None), 'name', None)
+        return table not in CENTRAL_TABLES
+    context = MigrationContext.configure(connection, opts={'include_object': include})
+    return compare_metadata(context, metadata)
+
+
+def _upgrade_schema(engine, metadata, index):
+    """Ajoute au shard les colonnes et index des modèles qui lui manquent (tables : ``create_all``).
+
+    Toute autre différence lève ``ShardError`` : l'application ne démarre pas
+    sur un shard dont le schéma ne correspond plus aux modèles.
+    """
+    with engine.begin() as connection:
+        diff = _schema_diff(connection, metadata)
+        additive = [change for change in diff if isinstance(change, tuple)
+                    and change[0] in ('add_column', 'add_index')]
+        try:
+            operations = Operations(MigrationContext.configure(connection))
+            for change in additive:
+                if change[0] == 'add_column':
+                    operations.add_column(change[2], change[3]._copy())
+                else:
+                    change[1].create(connection)
+        except OperationalError as exc:  # NOT NULL sans défaut, ou déjà ajoutée par un autre processus
+            error = exc
+        else:
+            error = None
+    with engine.connect() as connection:
+        left = _schema_diff(connection, metadata)
+    if left:
+        raise ShardError(f'Schéma du shard {index} différent des modèles : {left}'
+                         + (f' ({error.orig})' if error is not None else ''))
+
+
+def count():
+    """Nombre de shards (0 : idées dans la base centrale)."""
+    shards = current_app.extensions.get('shards')
+    return len(shards.engines) if shards is not None else 0
+
+
+def current():
+    """Shard sélectionné (None : aucun)."""
+    return _current.get()
+
+
+def engines():
+    shards = current_app.extensions.get('shards') if has_app_context() else None
+    return shards.engines if shards is not None else []
+
+
+def dispose(close=True):
+    """Ferme les connexions des shards (avant/après un fork)."""
+    for engine in engines():
+        engine.dispose(close=close)
+
+
+def shard_of(user):
+    """Shard de ``user`` (objet ou id), ou None sans répartition."""
+    total = count()
+    if not total:
+        return None
+    if not isinstance(user, User):
+        user = db.session.scalar(select(User).where(User.id == user).execution_options(include_deleted=True))
+        if user is None:
+            return None
+    return user.shard if user.shard is not None else user.id % total
+
+
+@contextmanager
+def use(shard):
+    """Envoie les requêtes sur les tables réparties au shard ``shard`` (None : inchangé)."""
+    if shard is None:
+        yield
+        return
+    token = _current.set(shard)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def each():
+    """Itère sur les shards, chacun sélectionné à son tour (une fois, sans effet, sans répartition)."""
+    total = count()
+    if not total:
+        yield None
+        return
+    for index in range(total):
+        with use(index):
+            yield index
+
+
+def fan_out(function, *args):
+    """``[function(*args)]`` exécutée sur chaque shard en parallèle (une fois sans répartition).
+
+    Chaque appel a son contexte d'application et sa session : ``function``
+    doit renvoyer des valeurs simples (lignes Core, nombres), pas des objets ORM.
+    """
+    app = current_app._get_current_object()
+    shards = app.extensions.get('shards')
+    if shards is None:
+        return [function(*args)]
+
+    def run(index):
+        with app.app_context(), use(index):
+            try:
+                return function(*args)
+            finally:
+                db.session.remove()
+    return list(shards.executor.map(run, range(len(shards.engines))))
+
+
+def locate(idea_id):
+    """Shard qui contient l'idée ``idea_id`` (None sans répartition, ou si elle n'existe pas)."""
+    if not count():
+        return None
+    found = fan_out(lambda: db.session.scalar(
+        select(Idea.id).where(Idea.id == idea_id).execution_options(include_deleted=True)))
+    return next((index for index, value in enumerate(found) if value is not None), None)
+
+
+def merge_sorted(parts, key, reverse=False):
+    """Fusionne des listes déjà triées (résultats de ``fan_out``)."""
+    return list(heapq.merge(*parts, key=key, reverse=reverse))
+
+
+def _route_request():
+    if count() and current_user.is_authenticated:
+        if current_user.moving_at is not None and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return 'Account being moved, please retry in a few seconds.', 503, {'Retry-After': '5'}
+        g._idea_shard = _current.set(shard_of(current_user))
+
+
+def _end_request(error=None):
+    token = g.pop('_idea_shard', None)
+    if token is not None:
+        _current.reset(token)
+
+
+@event.listens_for(User, 'before_insert')
+def _assign_shard(mapper, connection, user):
+    if user.shard is not None or not has_app_context() or not count():
+        return
+    users = dict(connection.execute(select(User.shard, func.count()).group_by(User.shard)).all())
+    user.shard = min(range(count()), key=lambda index: users.get(index, 0))
+
+
+# ------------------ DÉPLACEMENTS ------------------ #
+
+def _remove(user_id, ids=None, archived_ids=None):
+    """Retire du shard courant les données de ``user_id`` (seulement ``ids`` et
+    ``archived_ids`` s'ils sont donnés) ; retourne le nombre d'idées restantes."""
+    session = db.session
+    ideas = [Idea.user_id == user_id] + ([Idea.id.in_(ids)] if ids is not None else [])
+    archived = [ArchivedIdea.user_id == user_id] + (
+        [ArchivedIdea.id.in_(archived_ids)] if archived_ids is not None else [])
+    notify(session, deleted_changes(session, *ideas))
+    session.execute(delete(Idea).where(*ideas).execution_options(synchronize_session=False))
+    session.execute(delete(ArchivedIdea).where(*archived))
+    left = session.scalar(select(func.count(Idea.id)).where(Idea.user_id == user_id)
+                          .execution_options(include_deleted=True))
+    if not left:  # sinon les compteurs restent tenus à jour par ``notify``
+        session.execute(delete(UserTagCount).where(UserTagCount.user_id == user_id))
+    session.commit()
+    return left
+
+
+def _insert(ideas, archived, keep_ids):
+    """Écrit ``ideas`` et ``archived`` dans le shard courant (les compteurs dérivés suivent).
+
+    Les curseurs de synchronisation (``seq``) d'un autre shard sont hors de la
+    plage de celui-ci : les clients de l'utilisateur repartent d'un instantané.
+    """
+    session = db.session
+    if keep_ids:
+        ids = [row['id'] for row in ideas]
+        if ideas:
+            session.execute(insert(Idea), ideas)
+    else:
+        values = [{key: value for key, value in row.items() if key != 'id'} for row in ideas]
+        ids = [row.id for row in session.execute(
+            insert(Idea).returning(Idea.id, sort_by_parameter_order=True), values)] if values else []
+        # ids réservés dans la séquence du shard pour les idées archivées
+        if archived:
+            last = session.execute(text("UPDATE sqlite_sequence SET seq = seq + :n WHERE name = 'idea' "
+                                        'RETURNING seq'), {'n': len(archived)}).scalar_one()
+            archived = [dict(row, id=new_id) for row, new_id in zip(archived, range(last - len(archived) + 1, last + 1))]
+    if archived:
+        session.execute(insert(ArchivedIdea), archived)
+    notify(session, [IdeaChange.make(new, None, {field: row[field] for field in TRACKED_FIELDS})
+                     for row, new in zip(ideas, ids)])
+    session.commit()
+
+
+def _read(user_id, connection=None):
+    """(idées visibles, idées archivées) de ``user_id``, en dicts de colonnes."""
+    execute = connection.execute if connection is not None else db.session.connection().execute
+    ideas = [dict(row._mapping) for row in execute(
+        select(Idea.__table__).where(Idea.user_id == user_id, Idea.deleted_at.is_(None)).order_by(Idea.id))]
+    archived = [dict(row._mapping) for row in execute(
+        select(ArchivedIdea.__table__).where(ArchivedIdea.user_id == user_id))]
+    return ideas, archived
+
+
+def move_user(user_id, target):
+    """Déplace les idées de ``user_id`` vers le shard ``target`` ; retourne le nombre d'idées.
+
+    Les idées reçoivent de nouveaux ids dans le shard cible. Les écritures de
+    l'utilisateur sont refusées (503) pendant le déplacement ; après
+    ``SHARD_MOVE_GRACE`` secondes laissées aux requêtes en cours, seules les
+    lignes copiées sont retirées du shard source. Une idée écrite malgré tout
+    après la lecture y reste (``ShardError``) : relancer le déplacement la copie.
+    """
+    user = db.session.scalar(select(User).where(User.id == user_id).execution_options(include_deleted=True))
+    if user is None:
+        raise ShardError(f'Utilisateur inconnu : {user_id}')
+    source = shard_of(user)
+    if not 0 <= target < count():
+        raise ShardError(f'Shard inconnu : {target}')
+    if source == target:
+        return 0
+    user.moving_at = datetime.utcnow()
+    db.session.commit()
+    try:
+        time.sleep(current_app.config['SHARD_MOVE_GRACE'])
+        with use(source):
+            ideas, archived = _read(user_id)
+            # supprimées logiquement : non copiées, retirées avec le reste
+            dropped = db.session.scalars(select(Idea.id).where(Idea.user_id == user_id, Idea.deleted_at.isnot(None))
+                                         .execution_options(include_deleted=True)).all()
+            db.session.rollback()
+        with use(target):
+            _remove(user_id)  # restes d'un déplacement interrompu
+            _insert(ideas, archived, keep_ids=False)
+        user.shard = target
+        db.session.commit()
+        with use(source):
+            left = _remove(user_id, [row['id'] for row in ideas] + dropped, [row['id'] for row in archived])
+    finally:
+        db.session.rollback()
+        user.moving_at = None
+        db.session.commit()
+    if left:
+        raise ShardError(f'{left} idée(s) écrite(s) pendant le déplacement restée(s) dans le shard {source}')
+    return len(ideas)
+
+
+def initialize(report=None):
+    """Répartit les idées encore dans la base centrale (ids conservés) ; retourne le nombre d'utilisateurs."""
+    central = db.engine
+    with central.connect() as connection:
+        users = connection.execute(
+            select(User.id, func.count(Idea.id)).outerjoin(Idea, Idea.user_id == User.id)
+            .where(User.shard.is_(None), User.deleted_at.is_(None)).group_by(User.id)
+            .order_by(func.count(Idea.id).desc())).all()
+        loads = fan_out(_live_count)
+        for user_id, ideas_count in users:
+            target = min(range(count()), key=loads.__getitem__)
+            ideas, archived = _read(user_id, connection)
+            with use(target):
+                _remove(user_id)
+                _insert(ideas, archived, keep_ids=True)
+            db.session.execute(update(User).where(User.id == user_id).values(shard=target))
+            db.session.commit()
+            loads[target] += ideas_count
+            if report:
+                report(f'utilisateur {user_id} : {len(ideas)} idée(s) -> shard {target}')
+        # le shard 0 alloue ses ids après ceux de la base centrale
+        floors = {'idea': max(connection.execute(select(func.max(Idea.id))).scalar() or 0,
+                              connection.execute(select(func.max(ArchivedIdea.id))).scalar() or 0),
+                  'idea_change_log': connection.execute(select(func.max(IdeaChangeLog.seq))).scalar() or 0}
+    with use(0):
+        for table, floor in floors.items():
+            db.session.execute(text('UPDATE sqlite_sequence SET seq = max(seq, :floor) WHERE name = :name'),
+                               {'floor': floor, 'name': table})
+        db.session.commit()
+    return len(users)
+
+
+def _live_count():
+    return db.session.scalar(select(func.count()).select_from(Idea).where(Idea.deleted_at.is_(None)))
+
+
+def _user_loads():
+    return dict(db.session.execute(
+        select(Idea.user_id, func.count()).where(Idea.deleted_at.is_(None)).group_by(Idea.user_id)).all())
+
+
+def plan_rebalance(tolerance=0.1):
+    """Déplacements [(user_id, source, cible, idées)] qui rapprochent chaque shard de la moyenne.
+
+    Tant que l'écart entre le shard le plus chargé et le moins chargé dépasse
+    ``tolerance`` × moyenne, le plus gros utilisateur du shard chargé dont le
+    déplacement réduit cet écart part vers le shard le moins chargé.
+    """
+    per_shard = fan_out(_user_loads)
+    loads = [sum(users.values()) for users in per_shard]
+    mean = sum(loads) / len(loads) if loads else 0
+    moves = []
+    while loads:
+        heavy = max(range(len(loads)), key=loads.__getitem__)
+        light = min(range(len(loads)), key=loads.__getitem__)
+        gap = loads[heavy] - loads[light]
+        if gap <= tolerance * mean:
+            break
+        candidates = [(n, user_id) for user_id, n in per_shard[heavy].items() if 0 < n < gap]
+        if not candidates:
+            break
+        n, user_id = max(candidates)
+        del per_shard[heavy][user_id]
+        per_shard[light][user_id] = n
+        loads[heavy] -= n
+        loads[light] += n
+        moves.append((user_id, heavy, light, n))
+    return moves
+
+
+# ------------------ CLI ------------------ #
+
+def _require_shards():
+    if not count():
+        raise click.ClickException('IDEA_SHARDS vaut 0 : les idées sont dans la base centrale.')
+
+
+@shards_cli.command('init')
+def init_command():
+    """Répartit entre les shards les idées des utilisateurs encore dans la base centrale.
+
+    Les idées sont copiées avec leurs ids ; la base centrale garde les siennes
+    (plus lues) comme sauvegarde.
+    """
+    _require_shards()
+    click.echo(f'{initialize(report=click.echo)} utilisateur(s) réparti(s).')
+
+
+@shards_cli.command('status')
+def status_command():
+    """Utilisateurs et idées par shard."""
+    _require_shards()
+    users = [0] * count()
+    for user in db.session.scalars(select(User)):
+        users[shard_of(user)] += 1
+    ideas = fan_out(_live_count)
+    for index, engine in enumerate(engines()):
+        size = os.path.getsize(engine.url.database) / 2 ** 20
+        click.echo(f'shard {index} : {users[index]} utilisateur(s), {ideas[index]} idée(s), {size:.1f} Mio')
+
+
+@shards_cli.command('move')
+@click.argument('user_id', type=int)
+@click.argument('target', type=int)
+def move_command(user_id, target):
+    """Déplace un utilisateur vers un autre shard."""
+    _require_shards()
+    try:
+        moved = move_user(user_id, target)
+    except ShardError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f'{moved} idée(s) déplacée(s).')
+
+
+@shards_cli.command('rebalance')
+@click.option('--tolerance', type=float, default=0.1, show_default=True,
+              help="Écart max (part de la moyenne) entre shards.")
+@click.option('--dry-run', is_flag=True, help="Affiche les déplacements sans les faire.")
+def rebalance_command(tolerance, dry_run):
+    """Déplace des utilisateurs pour équilibrer le nombre d'idées par shard."""
+    _require_shards()
+    moves = plan_rebalance(tolerance)
+    for user_id, source, target, n in moves:
+        click.echo(f'utilisateur {user_id} : {n} idée(s), shard {source} -> {target}')
+        if not dry_run:
+            try:
+                move_user(user_id, target)
+            except ShardError as exc:
+                click.echo(str(exc), err=True)
+    click.echo(f'{len(moves)} déplacement(s){" prévu(s)" if dry_run else ""}.')
+
+
+@shards_cli.command('each', context_settings={'ignore_unknown_options': True, 'allow_interspersed_args': False})
+@click.option('--shard', 'only', type=int, multiple=True, help='Limite à ce(s) shard(s).')
+@click.argument('command', nargs=-1, required=True, type=click.UNPROCESSED)
+@click.pass_context
+def each_command(ctx, only, command):
+    """Lance une commande flask sur chaque shard (ex. ``flask shards each scheduler run --once``)."""
+    _require_shards()
+    app = current_app._get_current_object()
+    root = ctx.find_root()
+    for index in only or range(count()):
+        click.echo(f'--- shard {index}')
+        with app.app_context(), use(index):
+            try:
+                with root.command.make_context(root.info_name, list(command), obj=root.obj) as sub:
+                    root.command.invoke(sub)
+            finally:
+                db.session.remove()
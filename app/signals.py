@@ -0,0 +1,158 @@
+"""
+Signaux émis à chaque écriture (ORM) sur les idées.
+
+- ``ideas_flushed`` : envoyé après chaque flush, dans la transaction en cours.
+  Les abonnés reçoivent ``connection`` et peuvent y écrire des tables dérivées.
+- ``ideas_committed`` : envoyé après le commit, pour les caches en mémoire.
+
+Chaque abonné reçoit ``changes``, une liste d'``IdeaChange``.
+``users_committed`` signale de même les inscriptions et suppressions de comptes
+(``changes`` : liste d'``UserChange``).
+Les écritures en masse (``query.update()``, ``query.delete()``, Core) ne passent
+pas par le flush : elles doivent envoyer ces signaux elles-mêmes via ``notify``.
+"""
+from collections import namedtuple
+
+from blinker import Namespace
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes
+
+from app.models import Idea, User
+
+_signals = Namespace()
+ideas_flushed = _signals.signal('ideas-flushed')
+ideas_committed = _signals.signal('ideas-committed')
+users_committed = _signals.signal('users-committed')
+
+TRACKED_FIELDS = ('user_id', 'title', 'description', 'tags', 'status', 'timestamp', 'deleted_at', 'scheduled_at')
+
+_PENDING_KEY = 'pending_idea_changes'
+_PENDING_USERS_KEY = 'pending_user_changes'
+
+# kind : 'registered' ou 'deleted'
+UserChange = namedtuple('UserChange', 'id username created_at kind')
+
+
+class IdeaChange(namedtuple('IdeaChange', 'id old new')):
+    """Modification d'une idée : ``old`` vaut None pour une création,
+    ``new`` vaut None pour une suppression. Sinon, dicts de ``TRACKED_FIELDS``.
+
+    Une idée supprimée logiquement (``deleted_at``) est vue comme absente.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def make(cls, id, old, new):
+        """IdeaChange, ou None si l'idée n'est visible ni avant ni après."""
+        if old is not None and old['deleted_at'] is not None:
+            old = None
+        if new is not None and new['deleted_at'] is not None:
+            new = None
+        if old is None and new is None:
+            return None
+        return cls(id, old, new)
+
+    @property
+    def user_id(self):
+        return (self.new or self.old)['user_id']
+
+    def changed(self, *fields):
+        """Vrai si l'un des champs diffère entre ``old`` et ``new``."""
+        if self.old is None or self.new is None:
+            return True
+        return any(self.old[f] != self.new[f] for f in fields)
+
+
+def _noop(*args):
+    pass
+
+
+# active_history : l'ancienne valeur est chargée même si l'attribut était expiré,
+# sinon une modification après un commit ne laisserait pas de trace de l'ancien état.
+for _field in TRACKED_FIELDS:
+    event.listen(getattr(Idea, _field), 'set', _noop, active_history=True)
+
+
+def _values(obj, index):
+    """Valeurs suivies avant (index=0) ou après (index=1) le flush."""
+    values = {}
+    for field in TRACKED_FIELDS:
+        added, unchanged, deleted = attributes.get_history(
+            obj, field, passive=attributes.PASSIVE_NO_INITIALIZE)
+        if index == 0 and deleted:
+            values[field] = deleted[0]
+        elif index == 1 and added:
+            values[field] = added[0]
+        elif unchanged:
+            values[field] = unchanged[0]
+        else:
+            values[field] = (added or deleted or [None])[0]
+    return values
+
+
+def notify(session, changes):
+    """Envoie ``ideas_flushed`` et prépare ``ideas_committed`` pour ``changes``."""
+    if not changes:
+        return
+    ideas_flushed.send(session, connection=session.connection(), changes=changes)
+    session.info.setdefault(_PENDING_KEY, []).extend(changes)
+
+
+def tracked_values(session, *criteria):
+    """{id: valeurs suivies} des idées correspondant à ``criteria``, à lire
+    avant une écriture en masse pour construire les ``IdeaChange``."""
+    columns = [getattr(Idea, field) for field in TRACKED_FIELDS]
+    rows = session.execute(select(Idea.id, *columns).where(*criteria).order_by(Idea.id))
+    return {row[0]: dict(zip(TRACKED_FIELDS, row[1:])) for row in rows}
+
+
+def deleted_changes(session, *criteria):
+    """``IdeaChange`` de suppression des idées correspondant à ``criteria``,
+    à notifier avant un ``DELETE`` en masse."""
+    changes = (IdeaChange.make(id, old, None) for id, old in tracked_values(session, *criteria).items())
+    return [change for change in changes if change is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Idea):
+            changes.append(IdeaChange.make(obj.id, None, _values(obj, 1)))
+    for obj in session.dirty:
+        if isinstance(obj, Idea) and session.is_modified(obj, include_collections=False):
+            change = IdeaChange.make(obj.id, _values(obj, 0), _values(obj, 1))
+            if change is not None and change.changed(*TRACKED_FIELDS):
+                changes.append(change)
+    for obj in session.deleted:
+        if isinstance(obj, Idea):
+            changes.append(IdeaChange.make(obj.id, _values(obj, 0), None))
+    notify(session, [change for change in changes if change is not None])
+
+    users = [UserChange(obj.id, obj.username, obj.created_at, 'registered')
+             for obj in session.new if isinstance(obj, User)]
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            added = attributes.get_history(obj, 'deleted_at', passive=attributes.PASSIVE_NO_INITIALIZE).added
+            if added and added[0] is not None:
+                users.append(UserChange(obj.id, obj.username, obj.created_at, 'deleted'))
+    users.extend(UserChange(obj.id, obj.username, obj.created_at, 'deleted')
+                 for obj in session.deleted if isinstance(obj, User) and obj.deleted_at is None)
+    if users:
+        session.info.setdefault(_PENDING_USERS_KEY, []).extend(users)
+
+
+@event.listens_for(Session, 'after_commit')
+def _send_committed(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        ideas_committed.send(session, changes=changes)
+    users = session.info.pop(_PENDING_USERS_KEY, None)
+    if users:
+        users_committed.send(session, changes=users)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_USERS_KEY, None)
@@ -0,0 +1,285 @@
+"""
+Détection des idées quasi identiques (MinHash + LSH).
+
+Chaque idée a une signature MinHash de ``NUM_PERM`` entiers calculée sur les
+5-grammes de caractères de son titre et de sa description. La signature est
+découpée en ``BANDS`` bandes ; deux idées qui partagent une bande tombent dans
+le même bucket LSH et sont comparées. Seuls les candidats sont lus, la
+recherche reste donc sous-linéaire en nombre d'idées.
+
+Avec 8 bandes de 8 lignes, deux idées similaires à 80 % sont candidates dans
+~97 % des cas, à 50 % dans ~3 % des cas.
+"""
+import re
+import zlib
+from collections import defaultdict
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select, tuple_
+
+from app import db
+from app.models import Idea, IdeaLshBucket, IdeaSignature
+from app.signals import ideas_flushed
+
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = np.uint64(4294967291)  # plus grand nombre premier < 2**32
+_rng = np.random.RandomState(0x1DEA)  # graine fixe : signatures stables entre processus
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)[:, None]
+
+duplicates_cli = AppGroup('duplicates', help='Idées quasi identiques.')
+
+
+def init_app(app):
+    app.cli.add_command(duplicates_cli)
+
+
+def _normalize(text):
+    return re.sub(r'\W+', ' ', (text or '').lower()).strip()
+
+
+def signature(title, description=None):
+    """Signature MinHash (``uint32[NUM_PERM]``), ou None si le texte est vide."""
+    text = _normalize(f'{title or ""} {description or ""}')
+    if not text:
+        return None
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p tient dans 64 bits : a < 2**31 et x < 2**32
+    return ((_A * hashes + _B) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(sig):
+    """Clé de bucket de chaque bande (entiers positifs sur 31 bits)."""
+    return [zlib.crc32(sig[band * ROWS:(band + 1) * ROWS].tobytes()) & 0x7fffffff
+            for band in range(BANDS)]
+
+
+def similarity(sig, others):
+    """Similarité de Jaccard estimée entre ``sig`` et chaque ligne de ``others``."""
+    return (np.asarray(others) == sig).mean(axis=1)
+
+
+def _from_blob(blob):
+    return np.frombuffer(blob, dtype=np.uint32)
+
+
+class DuplicateFinder:
+    """Recherche de quasi-doublons pour un utilisateur.
+
+    Les idées acceptées via ``add`` sont retenues en mémoire : un import peut
+    ainsi écarter les doublons internes au fichier sans flush intermédiaire.
+    """
+
+    def __init__(self, user_id, threshold=None):
+        self.user_id = user_id
+        self.threshold = current_app.config['DUPLICATE_THRESHOLD'] if threshold is None else threshold
+        self.pending = defaultdict(list)  # (band, bucket) -> signatures en attente
+
+    def find(self, title, description=None, exclude=None):
+        """(signature, id de l'idée la plus proche ou None ; -1 si c'est une idée en attente).
+
+        ``exclude`` : id d'une idée à ignorer (l'original d'une copie).
+        """
+        sig = signature(title, description)
+        if sig is None:
+            return None, None
+        keys = list(enumerate(band_buckets(sig)))
+        if self._pending_match(sig, keys):
+            return sig, -1
+        rows = db.session.execute(
+            select(IdeaSignature.idea_id, IdeaSignature.minhash)
+            .join(IdeaLshBucket, IdeaLshBucket.idea_id == IdeaSignature.idea_id)
+            .where(IdeaLshBucket.user_id == self.user_id,
+                   IdeaLshBucket.idea_id != exclude,
+                   tuple_(IdeaLshBucket.band, IdeaLshBucket.bucket).in_(keys))
+            .distinct()).all()
+        if not rows:
+            return sig, None
+        scores = similarity(sig, np.stack([_from_blob(blob) for _, blob in rows]))
+        best = int(scores.argmax())
+        return sig, (rows[best][0] if scores[best] >= self.threshold else None)
+
+    def find_many(self, texts, chunk_size=500, exclude=None):
+        """``find`` pour une liste de (titre, description), chaque entrée non écartée étant ajoutée.
+
+        Les signatures stockées des buckets concernés sont lues en une requête
+        par tranche de ``chunk_size`` buckets, au lieu d'une requête par entrée.
+        ``exclude`` : pour chaque entrée, id d'une idée à ignorer (comme ``find``).
+        Retourne pour chaque entrée l'id du quasi-doublon, -1 ou None.
+        """
+        sigs = [signature(title, description) for title, description in texts]
+        buckets = [None if sig is None else list(enumerate(band_buckets(sig))) for sig in sigs]
+        wanted = list({key for keys in buckets if keys for key in keys})
+        stored = defaultdict(dict)  # (band, bucket) -> {idea_id: signature}
+        for start in range(0, len(wanted), chunk_size):
+            rows = db.session.execute(
+                select(IdeaLshBucket.band, IdeaLshBucket.bucket, IdeaSignature.idea_id, IdeaSignature.minhash)
+                .join(IdeaSignature, IdeaSignature.idea_id == IdeaLshBucket.idea_id)
+                .where(IdeaLshBucket.user_id == self.user_id,
+                       tuple_(IdeaLshBucket.band, IdeaLshBucket.bucket).in_(wanted[start:start + chunk_size])))
+            for band, bucket, idea_id, blob in rows:
+                stored[(band, bucket)][idea_id] = blob
+        results = []
+        for sig, keys, excluded in zip(sigs, buckets, exclude or [None] * len(texts)):
+            duplicate = None
+            if sig is not None:
+                candidates = {idea_id: blob for key in keys for idea_id, blob in stored.get(key, {}).items()
+                              if idea_id != excluded}
+                if self._pending_match(sig, keys):
+                    duplicate = -1
+                elif candidates:
+                    scores = similarity(sig, np.stack([_from_blob(blob) for blob in candidates.values()]))
+                    best = int(scores.argmax())
+                    duplicate = list(candidates)[best] if scores[best] >= self.threshold else None
+                if duplicate is None:
+                    self.add(sig)
+            results.append(duplicate)
+        return results
+
+    def _pending_match(self, sig, keys):
+        return any(similarity(sig, [other])[0] >= self.threshold
+                   for key in keys for other in self.pending.get(key, ()))
+
+    def add(self, sig):
+        if sig is not None:
+            for key in enumerate(band_buckets(sig)):
+                self.pending[key].append(sig)
+
+
+def find_duplicate(user_id, title, description=None, exclude=None):
+    """Id d'une idée existante quasi identique, ou None."""
+    return DuplicateFinder(user_id).find(title, description, exclude)[1]
+
+
+def _index_rows(idea_id, user_id, sig):
+    buckets = [{'user_id': user_id, 'band': band, 'bucket': bucket, 'idea_id': idea_id}
+               for band, bucket in enumerate(band_buckets(sig))]
+    return {'idea_id': idea_id, 'user_id': user_id, 'minhash': sig.tobytes()}, buckets
+
+
+@ideas_flushed.connect
+def _on_ideas_flushed(session, connection, changes):
+    stale, signatures, buckets = [], [], []
+    for change in changes:
+        if change.old is not None and change.new is not None \
+                and not change.changed('user_id', 'title', 'description'):
+            continue
+        if change.old is not None:
+            stale.append(change.id)
+        if change.new is not None:
+            sig = signature(change.new['title'], change.new['description'])
+            if sig is not None:
+                row, bucket_rows = _index_rows(change.id, change.new['user_id'], sig)
+                signatures.append(row)
+                buckets.extend(bucket_rows)
+    if stale:
+        connection.execute(delete(IdeaLshBucket).where(IdeaLshBucket.idea_id.in_(stale)))
+        connection.execute(delete(IdeaSignature).where(IdeaSignature.idea_id.in_(stale)))
+    if signatures:
+        connection.execute(insert(IdeaSignature), signatures)
+        connection.execute(insert(IdeaLshBucket), buckets)
+
+
+def duplicate_clusters(user_id, threshold=None):
+    """Groupes d'idées quasi identiques d'un utilisateur (listes d'ids).
+
+    Calcul par lot : toutes les signatures sont chargées dans une matrice,
+    les paires candidates viennent des bandes identiques et leur similarité
+    est comparée en une seule opération vectorisée.
+    """
+    threshold = current_app.config['DUPLICATE_THRESHOLD'] if threshold is None else threshold
+    rows = db.session.execute(
+        select(IdeaSignature.idea_id, IdeaSignature.minhash)
+        .where(IdeaSignature.user_id == user_id)
+        .order_by(IdeaSignature.idea_id)).all()
+    if len(rows) < 2:
+        return []
+    ids = np.array([idea_id for idea_id, _ in rows])
+    matrix = np.stack([_from_blob(blob) for _, blob in rows])
+
+    pairs = set()
+    for band in range(BANDS):
+        block = np.ascontiguousarray(matrix[:, band * ROWS:(band + 1) * ROWS])
+        _, groups = np.unique(block.view(np.dtype((np.void, block.dtype.itemsize * ROWS))).ravel(),
+                              return_inverse=True)
+        order = np.argsort(groups, kind='stable')
+        sorted_groups = groups[order]
+        for start, end in _runs(sorted_groups):
+            members = order[start:end]
+            pairs.update((int(a), int(b)) for i, a in enumerate(members) for b in members[i + 1:])
+    if not pairs:
+        return []
+    left, right = np.array(sorted(pairs)).T
+    scores = (matrix[left] == matrix[right]).mean(axis=1)
+
+    parent = list(range(len(ids)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(left[scores >= threshold], right[scores >= threshold]):
+        parent[root(a)] = root(b)
+    clusters = defaultdict(list)
+    for i in range(len(ids)):
+        clusters[root(i)].append(int(ids[i]))
+    return sorted((c for c in clusters.values() if len(c) > 1), key=len, reverse=True)
+
+
+def _runs(sorted_values):
+    """(début, fin) des séquences de valeurs égales de longueur > 1."""
+    boundaries = np.flatnonzero(np.diff(sorted_values)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(sorted_values)]))
+    return [(s, e) for s, e in zip(starts, ends) if e - s > 1]
+
+
+def rebuild(batch_size=2000):
+    """Recalcule toutes les signatures depuis la table ``idea``."""
+    db.session.execute(delete(IdeaLshBucket))
+    db.session.execute(delete(IdeaSignature))
+    rows = db.session.execute(
+        select(Idea.id, Idea.user_id, Idea.title, Idea.description)
+        .execution_options(yield_per=batch_size))
+    signatures, buckets = [], []
+    for idea_id, user_id, title, description in rows:
+        sig = signature(title, description)
+        if sig is not None:
+            row, bucket_rows = _index_rows(idea_id, user_id, sig)
+            signatures.append(row)
+            buckets.extend(bucket_rows)
+    for start in range(0, len(signatures), batch_size):
+        db.session.execute(insert(IdeaSignature), signatures[start:start + batch_size])
+    for start in range(0, len(buckets), batch_size * BANDS):
+        db.session.execute(insert(IdeaLshBucket), buckets[start:start + batch_size * BANDS])
+    db.session.commit()
+    return len(signatures)
+
+
+@duplicates_cli.command('rebuild')
+def rebuild_command():
+    """Recalcule les signatures MinHash des idées existantes."""
+    click.echo(f'{rebuild()} signature(s) calculée(s).')
+
+
+@duplicates_cli.command('report')
+@click.option('--threshold', type=float, default=None, help='Similarité minimale (0-1).')
+def report_command(threshold):
+    """Affiche les groupes de quasi-doublons de chaque utilisateur."""
+    user_ids = db.session.scalars(select(IdeaSignature.user_id).distinct()).all()
+    for user_id in user_ids:
+        for cluster in duplicate_clusters(user_id, threshold):
+            click.echo(f'utilisateur {user_id} : idées {", ".join(map(str, cluster))}')
@@ -0,0 +1,154 @@
+"""
+Suggestions IA pour plusieurs jeux de tags en une requête.
+
+Les jeux de tags sont regroupés par ``SUGGEST_BATCH_SETS_PER_CALL`` dans un
+seul prompt numéroté, avec une réponse JSON structurée (``_SCHEMA``) : un
+appel au modèle au lieu d'un par jeu. La réponse est redécoupée par numéro de
+jeu et chaque idée devient un enregistrement ``title`` / ``description`` /
+``tags`` / ``hashtags``, directement utilisable par ``create_from_suggestion``.
+
+Si la réponse d'un lot est illisible, ou si un jeu y manque, ces jeux sont
+redemandés un par un avec le prompt libre de ``/idea/suggest``, analysé
+ligne à ligne.
+"""
+import json
+import re
+
+from flask import current_app
+from google.genai import types
+
+from app import ai
+
+
+class SuggestionError(ValueError):
+    pass
+
+
+_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    required=['results'],
+    properties={'results': types.Schema(
+        type=types.Type.ARRAY,
+        items=types.Schema(
+            type=types.Type.OBJECT,
+            required=['set', 'ideas'],
+            properties={
+                'set': types.Schema(type=types.Type.INTEGER),
+                'ideas': types.Schema(type=types.Type.ARRAY, items=types.Schema(
+                    type=types.Type.OBJECT,
+                    required=['title', 'hashtags'],
+                    properties={
+                        'title': types.Schema(type=types.Type.STRING),
+                        'description': types.Schema(type=types.Type.STRING),
+                        'hashtags': types.Schema(type=types.Type.ARRAY,
+                                                 items=types.Schema(type=types.Type.STRING)),
+                    })),
+            }),
+    )},
+)
+
+_HASHTAG = re.compile(r'#(\w+)')
+
+
+def normalize(tag_set):
+    """Jeu de tags (liste ou texte séparé par des virgules) -> liste de tags en minuscules."""
+    if isinstance(tag_set, str):
+        tag_set = tag_set.split(',')
+    if not isinstance(tag_set, list):
+        raise SuggestionError('Each tag set must be a list or a comma-separated string')
+    tags = []
+    for tag in tag_set:
+        tag = str(tag).strip().lstrip('#').lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    if not tags:
+        raise SuggestionError('Empty tag set')
+    return tags
+
+
+def batch_prompt(tag_sets):
+    lines = ['Suggest creative content ideas for each of the following tag sets.',
+             'Answer in JSON: for every set, its number and 3 to 5 ideas, each with a short title, '
+             'a one-sentence description and a few hashtags (without #).', '']
+    lines += [f'Set {number}: {", ".join(tags)}' for number, tags in enumerate(tag_sets, 1)]
+    return '\n'.join(lines)
+
+
+def single_prompt(tags):
+    # même prompt que /idea/suggest
+    return f"Suggest creative content ideas for these tags: {', '.join(tags)}. Return a list of hashtags and titles."
+
+
+def _record(title, description, hashtags, tags):
+    hashtags = [h.strip().lstrip('#').lower() for h in hashtags if h and h.strip().lstrip('#')]
+    return {
+        'title': title.strip()[:100],
+        'description': (description or '').strip()[:500],
+        'hashtags': hashtags,
+        'tags': ','.join(dict.fromkeys(tags + hashtags)),
+    }
+
+
+def parse_batch(text, tag_sets):
+    """{numéro de jeu (à partir de 1): [enregistrements]} ; ``SuggestionError`` si illisible."""
+    try:
+        results = json.loads(text)['results']
+        parsed = {}
+        for result in results:
+            number = int(result['set'])
+            if 1 <= number <= len(tag_sets):
+                parsed[number] = [_record(idea['title'], idea.get('description'), idea.get('hashtags') or [],
+                                          tag_sets[number - 1])
+                                  for idea in result['ideas'] if str(idea.get('title') or '').strip()]
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise SuggestionError(f'Unreadable batch response: {exc}') from exc
+    return {number: ideas for number, ideas in parsed.items() if ideas}
+
+
+def parse_lines(text, tags):
+    """Enregistrements extraits d'une réponse libre : une idée par ligne de liste."""
+    records = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not re.match(r'^([-*+]|\d+[.)])\s+', line):
+            continue
+        line = re.sub(r'^([-*+]|\d+[.)])\s+', '', line)
+        hashtags = _HASHTAG.findall(line)
+        title = re.sub(r'[*_`]', '', _HASHTAG.sub('', line)).strip(' :-—')
+        if title:
+            records.append(_record(title, '', hashtags, tags))
+    return records
+
+
+def suggest_batch(tag_sets):
+    """Suggestions pour chaque jeu de ``tag_sets``, dans l'ordre.
+
+    Retourne ``{'results': [{'tags': ..., 'ideas': [...], 'fallback': bool}], 'calls': n}``.
+    """
+    config = current_app.config
+    if not isinstance(tag_sets, list) or not tag_sets:
+        raise SuggestionError('tag_sets must be a non-empty list')
+    if len(tag_sets) > config['SUGGEST_BATCH_MAX_SETS']:
+        raise SuggestionError(f'At most {config["SUGGEST_BATCH_MAX_SETS"]} tag sets per request')
+    tag_sets = [normalize(tag_set) for tag_set in tag_sets]
+
+    ideas, calls = {}, 0
+    size = config['SUGGEST_BATCH_SETS_PER_CALL']
+    for start in range(0, len(tag_sets), size):
+        chunk = tag_sets[start:start + size]
+        calls += 1
+        try:
+            parsed = parse_batch(''.join(ai.generate(batch_prompt(chunk), schema=_SCHEMA)), chunk)
+        except SuggestionError as exc:
+            current_app.logger.warning('Suggestions groupées illisibles, repli jeu par jeu : %s', exc)
+            parsed = {}
+        ideas.update({start + number - 1: records for number, records in parsed.items()})
+
+    results = []
+    for index, tags in enumerate(tag_sets):
+        fallback = index not in ideas
+        if fallback:
+            calls += 1
+            ideas[index] = parse_lines('\n'.join(ai.generate(single_prompt(tags))), tags)
+        results.append({'tags': ','.join(tags), 'ideas': ideas[index], 'fallback': fallback})
+    return {'results': results, 'calls': calls}
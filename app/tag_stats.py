@@ -0,0 +1,223 @@
+"""
+Statistiques de tags maintenues incrémentalement.
+
+Les compteurs (par tag, par utilisateur, par paire de tags et par mois) sont
+mis à jour dans la même transaction que l'écriture de l'idée, via le signal
+``ideas_flushed``. Les pages d'analytics lisent ces petites tables au lieu de
+charger toutes les idées. Avec des shards (cf. app/shards.py), chaque shard
+tient ses compteurs : les statistiques globales les additionnent.
+"""
+from collections import Counter
+from itertools import combinations
+
+import click
+import numpy as np
+from flask.cli import AppGroup
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db, shards
+from app.backfill import register
+from app.models import Idea, TagCount, TagMonthCount, TagPairCount, UserTagCount
+from app.signals import IdeaChange, ideas_flushed, notify, tracked_values
+
+tags_cli = AppGroup('tags', help='Statistiques de tags.')
+
+# table -> colonnes de la clé primaire
+_KEYS = {
+    TagCount.__table__: ('tag',),
+    UserTagCount.__table__: ('user_id', 'tag'),
+    TagPairCount.__table__: ('tag_a', 'tag_b'),
+    TagMonthCount.__table__: ('tag', 'month'),
+}
+
+
+def init_app(app):
+    app.cli.add_command(tags_cli)
+
+
+def split_tags(tags):
+    """Tags normalisés (minuscules, sans doublons) d'une chaîne 'a, b,c'."""
+    if not tags:
+        return []
+    result = []
+    for tag in tags.split(','):
+        tag = tag.strip().lower()[:100]
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def normalize_tags(tags):
+    """Forme stockée des tags : 'a,b,c' (comme ``IdeaForm.validate_tags``)."""
+    return ','.join(split_tags(tags)) or None
+
+
+def normalize_tag_column(values):
+    """``normalize_tags`` sur toute une colonne (imports) : une passe numpy sur tous les tags."""
+    parts = [(tags or '').split(',') for tags in values]
+    rows = np.repeat(np.arange(len(parts)), [len(tags) for tags in parts])
+    flat = np.char.lower(np.char.strip(np.array([tag for tags in parts for tag in tags], dtype=str)))
+    flat = flat.astype('<U100')
+    # premier exemplaire de chaque (ligne, tag) non vide, dans l'ordre d'origine
+    tags, codes = np.unique(flat, return_inverse=True)
+    _, first = np.unique(rows * len(tags) + codes, return_index=True)
+    keep = np.sort(first[flat[first] != ''])
+    result = [None] * len(parts)
+    if keep.size:
+        kept_rows = rows[keep]
+        starts = np.flatnonzero(np.r_[True, kept_rows[1:] != kept_rows[:-1]])
+        for row, group in zip(kept_rows[starts], np.split(flat[keep], starts[1:])):
+            result[row] = ','.join(group)
+    return result
+
+
+@register('tags_normalize', 'Réécrit idea.tags sous forme normalisée (minuscules, sans doublons)')
+def _normalize_batch(session, ids):
+    old = tracked_values(session, Idea.id.in_(ids))
+    new = {id: dict(values, tags=normalize_tags(values['tags'])) for id, values in old.items()
+           if values['tags'] and values['tags'] != normalize_tags(values['tags'])}
+    if new:
+        session.execute(update(Idea), [{'id': id, 'tags': values['tags']} for id, values in new.items()])
+        changes = (IdeaChange.make(id, old[id], values) for id, values in new.items())
+        notify(session, [change for change in changes if change is not None])
+    return len(new)
+
+
+def _idea_deltas(deltas, user_id, tags, timestamp, sign):
+    tags = split_tags(tags)
+    if not tags:
+        return
+    month = timestamp.strftime('%Y-%m') if timestamp else None
+    for tag in tags:
+        deltas[TagCount.__table__][(tag,)] += sign
+        deltas[UserTagCount.__table__][(user_id, tag)] += sign
+        if month:
+            deltas[TagMonthCount.__table__][(tag, month)] += sign
+    for pair in combinations(sorted(tags), 2):
+        deltas[TagPairCount.__table__][pair] += sign
+
+
+def apply_changes(connection, changes):
+    """Répercute une liste d'``IdeaChange`` sur les compteurs."""
+    deltas = {table: Counter() for table in _KEYS}
+    for change in changes:
+        if not change.changed('user_id', 'tags', 'timestamp'):
+            continue
+        if change.old is not None:
+            old = change.old
+            _idea_deltas(deltas, old['user_id'], old['tags'], old['timestamp'], -1)
+        if change.new is not None:
+            new = change.new
+            _idea_deltas(deltas, new['user_id'], new['tags'], new['timestamp'], 1)
+    for table, counter in deltas.items():
+        _apply_table(connection, table, {k: v for k, v in counter.items() if v})
+
+
+def _apply_table(connection, table, counter):
+    if not counter:
+        return
+    keys = _KEYS[table]
+    rows = [dict(zip(keys, key), count=delta) for key, delta in counter.items()]
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_ = (sqlite if dialect == 'sqlite' else postgresql).insert
+        stmt = insert_(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={'count': table.c.count + stmt.excluded.count})
+        connection.execute(stmt, rows)
+    else:
+        match = and_(*(table.c[k] == db.bindparam('k_' + k) for k in keys))
+        for row in rows:
+            params = {'k_' + k: row[k] for k in keys}
+            updated = connection.execute(
+                update(table).where(match).values(count=table.c.count + row['count']), params)
+            if updated.rowcount == 0:
+                connection.execute(insert(table), row)
+    # les compteurs tombés à zéro sont supprimés pour garder les tables compactes
+    emptied = [row for row in rows if row['count'] < 0]
+    if emptied:
+        match = and_(*(table.c[k] == db.bindparam('k_' + k) for k in keys), table.c.count <= 0)
+        connection.execute(delete(table).where(match),
+                           [{'k_' + k: row[k] for k in keys} for row in emptied])
+
+
+@ideas_flushed.connect
+def _on_ideas_flushed(session, connection, changes):
+    apply_changes(connection, changes)
+
+
+def _execute(query):
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def _summed(query, n):
+    """Lignes (clé..., count) de chaque shard additionnées, les ``n`` plus grandes d'abord."""
+    totals = Counter()
+    for part in shards.fan_out(_execute, query):
+        for *key, count in part:
+            totals[tuple(key)] += count
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return [(*key, count) for key, count in ranked[:n]]
+
+
+def top_tags(n=5, user_id=None):
+    """Les ``n`` tags les plus utilisés : liste de (tag, count)."""
+    if user_id is not None:
+        query = select(UserTagCount.tag, UserTagCount.count).where(UserTagCount.user_id == user_id)
+        with shards.use(shards.shard_of(user_id)):
+            return _execute(query.order_by(UserTagCount.count.desc(), 'tag').limit(n))
+    query = select(TagCount.tag, TagCount.count)
+    if shards.count():
+        return _summed(query, n)
+    return _execute(query.order_by(TagCount.count.desc(), 'tag').limit(n))
+
+
+def tag_pairs(n=10):
+    """Les ``n`` paires de tags apparaissant le plus souvent ensemble."""
+    query = select(TagPairCount.tag_a, TagPairCount.tag_b, TagPairCount.count)
+    if shards.count():
+        return _summed(query, n)
+    return _execute(query.order_by(TagPairCount.count.desc(), TagPairCount.tag_a, TagPairCount.tag_b).limit(n))
+
+
+def tag_trends(tags, since_month=None):
+    """Nombre d'idées par mois pour chaque tag : {tag: [(month, count), ...]}."""
+    query = select(TagMonthCount.tag, TagMonthCount.month, TagMonthCount.count).where(
+        TagMonthCount.tag.in_(tags))
+    if since_month:
+        query = query.where(TagMonthCount.month >= since_month)
+    months = {tag: Counter() for tag in tags}
+    for part in shards.fan_out(_execute, query):
+        for tag, month, count in part:
+            months[tag][month] += count
+    return {tag: sorted(counter.items()) for tag, counter in months.items()}
+
+
+def rebuild(batch_size=5000):
+    """Recalcule tous les compteurs à partir de la table ``idea``."""
+    for table in _KEYS:
+        db.session.execute(delete(table))
+    deltas = {table: Counter() for table in _KEYS}
+    rows = db.session.execute(
+        select(Idea.user_id, Idea.tags, Idea.timestamp)
+        .where(Idea.tags.isnot(None))
+        .execution_options(yield_per=batch_size))
+    total = 0
+    for user_id, tags, timestamp in rows:
+        _idea_deltas(deltas, user_id, tags, timestamp, 1)
+        total += 1
+    connection = db.session.connection()
+    for table, counter in deltas.items():
+        _apply_table(connection, table, counter)
+    db.session.commit()
+    return total
+
+
+@tags_cli.command('rebuild')
+def rebuild_command():
+    """Recalcule les statistiques de tags depuis les idées existantes."""
+    total = rebuild()
+    count = db.session.scalar(select(func.count()).select_from(TagCount))
+    click.echo(f'{total} idée(s) analysée(s), {count} tag(s) distinct(s).')
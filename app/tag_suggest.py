@@ -0,0 +1,82 @@
+"""
+Autocomplétion des tags à partir d'un index de préfixes en mémoire.
+
+Chaque utilisateur a un tableau trié de ses tags (recherche par ``bisect``) et
+leurs fréquences. L'index est construit depuis ``UserTagCount`` au premier
+appel, puis tenu à jour par le signal ``ideas_committed`` : les frappes au
+clavier ne touchent pas la base. ``TAG_INDEX_TTL`` borne le décalage avec les
+écritures faites par les autres workers.
+"""
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+
+from flask import current_app
+
+from app import db
+from app.caching import PerUserCache
+from app.models import UserTagCount
+from app.signals import ideas_committed
+from app.tag_stats import split_tags
+
+
+class TagIndex:
+    """Tags d'un utilisateur, triés, avec leur nombre d'idées."""
+    __slots__ = ('counts', 'sorted_tags')
+
+    def __init__(self, counts):
+        self.counts = dict(counts)
+        self.sorted_tags = sorted(self.counts)
+
+    def suggest(self, prefix, limit=8):
+        """Tags commençant par ``prefix``, les plus fréquents d'abord."""
+        lo = bisect_left(self.sorted_tags, prefix)
+        hi = bisect_left(self.sorted_tags, prefix + '\U0010ffff', lo)
+        # nlargest est stable : à fréquence égale, l'ordre alphabétique est conservé
+        tags = heapq.nlargest(limit, self.sorted_tags[lo:hi], key=self.counts.__getitem__)
+        return [(tag, self.counts[tag]) for tag in tags]
+
+    def apply(self, deltas):
+        for tag, delta in deltas.items():
+            count = self.counts.get(tag, 0) + delta
+            if count > 0:
+                if tag not in self.counts:
+                    insort(self.sorted_tags, tag)
+                self.counts[tag] = count
+            elif tag in self.counts:
+                del self.counts[tag]
+                del self.sorted_tags[bisect_left(self.sorted_tags, tag)]
+
+
+def _load_index(user_id):
+    rows = db.session.query(UserTagCount.tag, UserTagCount.count).filter_by(user_id=user_id)
+    return TagIndex(rows)
+
+
+def init_app(app):
+    app.extensions['tag_suggest'] = PerUserCache(
+        _load_index, app.config['TAG_INDEX_TTL'], app.config['TAG_INDEX_MAX_USERS'])
+
+
+def suggest(user_id, query, limit=8):
+    """Suggestions pour le dernier tag en cours de saisie dans ``query``."""
+    prefix = query.rsplit(',', 1)[-1].strip().lower()
+    return current_app.extensions['tag_suggest'].get(user_id).suggest(prefix, limit)
+
+
+@ideas_committed.connect
+def _on_ideas_committed(session, changes):
+    deltas = {}
+    for change in changes:
+        if not change.changed('user_id', 'tags'):
+            continue
+        if change.old is not None:
+            deltas.setdefault(change.old['user_id'], Counter()).subtract(split_tags(change.old['tags']))
+        if change.new is not None:
+            deltas.setdefault(change.new['user_id'], Counter()).update(split_tags(change.new['tags']))
+    cache = current_app.extensions['tag_suggest']
+    with cache.lock:
+        for user_id, counter in deltas.items():
+            index = cache.peek(user_id)
+            if index is not None:
+                index.apply(counter)
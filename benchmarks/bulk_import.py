@@ -0,0 +1,130 @@
+"""
+Import en masse : débit selon le format et le chemin d'écriture.
+
+Génère ``--rows`` idées (tags en casse mélangée, 10 % de titres répétés)
+puis mesure, sur une base SQLite vide à chaque fois :
+
+- l'ancien chemin CSV (une ``Idea`` ORM et une recherche de quasi-doublon
+  par ligne, un seul commit) ;
+- ``importer.import_file`` en CSV, JSONL et ZIP Markdown, l'archive étant
+  analysée dans le processus puis par le pool de processus.
+
+    python -m benchmarks.bulk_import --rows 5000 --processes 4
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import zipfile
+
+from app import create_app, db, importer
+from app.models import Idea, User
+from app.similarity import DuplicateFinder
+from config import TestConfig
+
+
+WORDS = ('video', 'camera', 'editing', 'light', 'story', 'sound', 'travel', 'food', 'review', 'setup',
+         'budget', 'studio', 'vlog', 'tutorial', 'interview', 'drone', 'color', 'script', 'music', 'launch')
+
+
+def _ideas(count):
+    rng = random.Random(0)
+    ideas = []
+    for i in range(count):
+        title = ' '.join(rng.choices(WORDS, k=4)) + f' {i}'
+        if i % 10 == 0 and ideas:  # 10 % de titres déjà vus
+            title = ideas[rng.randrange(len(ideas))]['title'].upper()
+        ideas.append({'title': title, 'description': ' '.join(rng.choices(WORDS, k=30)),
+                      'tags': f'Video, TIPS,topic-{i % 50},video', 'status': 'Draft'})
+    return ideas
+
+
+def _csv(ideas):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, ['Title', 'Description', 'Tags', 'Status'])
+    writer.writeheader()
+    writer.writerows({key.capitalize(): value for key, value in idea.items()} for idea in ideas)
+    return buffer.getvalue().encode()
+
+
+def _jsonl(ideas):
+    return '\n'.join(json.dumps(idea) for idea in ideas).encode()
+
+
+def _zip(ideas):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for i, idea in enumerate(ideas):
+            archive.writestr(f'{i:06d}-idea.md', f"# {idea['title']}\n\n{idea['description']}\n\n"
+                                                 f"**Tags:** {idea['tags']}\n**Status:** {idea['status']}")
+    return buffer.getvalue()
+
+
+def _row_by_row(user_id, data):
+    """Ancien ``import_ideas`` : une ligne à la fois, par l'ORM."""
+    finder = DuplicateFinder(user_id)
+    count = 0
+    for row in csv.DictReader(io.StringIO(data.decode())):
+        signature, duplicate_of = finder.find(row['Title'], row.get('Description', ''))
+        if duplicate_of:
+            continue
+        finder.add(signature)
+        db.session.add(Idea(title=row['Title'], description=row.get('Description', ''), tags=row.get('Tags', ''),
+                            status=row.get('Status', 'Draft'), user_id=user_id))
+        count += 1
+    db.session.commit()
+    return count
+
+
+def _measure(directory, label, function, processes, min_files):
+    class BenchConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, f"{label}.db")}'
+        IMPORT_PROCESSES = processes
+        IMPORT_PARALLEL_MIN_FILES = min_files
+        LOG_FILE = ''
+    app = create_app(BenchConfig)
+    app.logger.setLevel(logging.ERROR)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        if min_files == 0:
+            app.extensions['import_pool'].executor.submit(int).result()  # processus démarrés hors mesure
+        start = time.perf_counter()
+        imported = function(user.id)
+        elapsed = time.perf_counter() - start
+        if min_files == 0:
+            app.extensions['import_pool'].executor.shutdown()
+        db.session.remove()
+    return imported, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    ideas = _ideas(args.rows)
+    files = {'csv': _csv(ideas), 'jsonl': _jsonl(ideas), 'zip': _zip(ideas)}
+    runs = [
+        ('csv ligne à ligne (ancien)', lambda uid: _row_by_row(uid, files['csv']), 10 ** 9),
+        ('csv', lambda uid: importer.import_file(uid, io.BytesIO(files['csv']))['imported'], 10 ** 9),
+        ('jsonl', lambda uid: importer.import_file(uid, io.BytesIO(files['jsonl']))['imported'], 10 ** 9),
+        ('zip (un processus)', lambda uid: importer.import_file(uid, io.BytesIO(files['zip']))['imported'], 10 ** 9),
+        ('zip (pool)', lambda uid: importer.import_file(uid, io.BytesIO(files['zip']))['imported'], 0),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (label, function, min_files) in enumerate(runs):
+            imported, elapsed = _measure(directory, str(index), function, args.processes, min_files)
+            print(f'{label:<28} {imported:6d} idée(s) en {elapsed:6.2f} s  ({imported / elapsed:8.0f} idées/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Faux serveur Gemini (API REST ``generateContent``) avec latence injectée.
+
+Utilisé par les benchmarks et les tests : pointez ``GEMINI_BASE_URL`` sur
+``server.url``. Chaque réponse attend ``latency`` secondes puis renvoie
+``reply(prompt)`` (texte) ou, par défaut, une liste d'idées factice.
+
+    python -m benchmarks.fake_model_server --port 8765 --latency 0.5
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_reply(prompt):
+    return '- **#video** Tutorial ideas\n- **#shorts** Behind the scenes'
+
+
+class FakeModelServer:
+    def __init__(self, latency=0.0, reply=default_reply, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.reply = reply
+        self.requests = 0
+        self.last_request = None  # corps JSON de la dernière requête
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+        self._thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                with server._lock:
+                    server.requests += 1
+                    server.last_request = body
+                prompt = ''.join(part.get('text', '') for content in body.get('contents', [])
+                                 for part in content.get('parts', []))
+                time.sleep(server.latency)
+                payload = json.dumps({
+                    'candidates': [{'content': {'role': 'model', 'parts': [{'text': server.reply(prompt)}]},
+                                    'finishReason': 'STOP'}],
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    args = parser.parse_args()
+    server = FakeModelServer(args.latency, port=args.port)
+    print(f'Faux modèle sur {server.url} (latence {args.latency}s)')
+    server.httpd.serve_forever()
@@ -0,0 +1,67 @@
+"""
+Coût du rendu Markdown des descriptions pour une page d'idées.
+
+Trois variantes sur les mêmes descriptions :
+
+- ``markdown.markdown`` à chaque appel (analyseur reconstruit à chaque fois) ;
+- analyseur partagé du thread (``rendering.render``) ;
+- HTML stocké avec l'idée (filtre ``description_html``), le cas normal.
+
+    python -m benchmarks.markdown_render --page-size 200 --pages 20
+"""
+import argparse
+import time
+
+import markdown
+
+from app import create_app, db
+from app.models import Idea, User
+from app.rendering import description_html, render
+from config import TestConfig
+
+DESCRIPTION = """Plan for the **{n}th** video:
+
+- hook in the first 5 seconds
+- show the *before/after*
+- link to [the shop](https://example.com/{n})
+
+```
+ffmpeg -i clip{n}.mp4 -vf scale=1080:-1 out.mp4
+```
+"""
+
+
+def _time(pages, render_page):
+    start = time.perf_counter()
+    for _ in range(pages):
+        render_page()
+    return (time.perf_counter() - start) / pages * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password_hash='x')
+        db.session.add_all(Idea(title=f'Idea {n}', description=DESCRIPTION.format(n=n), author=user)
+                           for n in range(args.page_size))
+        db.session.commit()
+        ideas = Idea.query.all()
+
+        results = {
+            'markdown.markdown': _time(args.pages, lambda: [
+                markdown.markdown(idea.description, extensions=['fenced_code', 'sane_lists']) for idea in ideas]),
+            'analyseur partagé': _time(args.pages, lambda: [render(idea.description) for idea in ideas]),
+            'HTML stocké': _time(args.pages, lambda: [description_html(idea) for idea in ideas]),
+        }
+    for name, ms in results.items():
+        print(f'{name:<20} {ms:8.2f} ms / page de {args.page_size} idées')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Coût des connexions selon ``PASSWORD_HASH_METHOD``.
+
+Pour chaque réglage, mesure ``check_password_hash`` seul puis ``POST
+/login`` complet (client de test, un thread) et affiche les connexions par
+seconde et par cœur. Mesure aussi le débit des tentatives refusées après
+``LOGIN_MAX_FAILURES`` échecs, qui ne calculent aucun hash.
+
+    python -m benchmarks.password_hash --methods scrypt:32768:8:1 scrypt:16384:8:1 pbkdf2:sha256:600000
+"""
+import argparse
+import logging
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import create_app, db
+from app.models import User
+from config import TestConfig
+
+
+def _rate(function, count):
+    start = time.process_time()
+    for _ in range(count):
+        function()
+    return count / (time.process_time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--methods', nargs='+',
+                        default=['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000'])
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app(TestConfig)
+    app.logger.setLevel(logging.ERROR)
+    with app.app_context():
+        db.create_all()
+        print(f'{"réglage":<24} {"hash seul":>12} {"POST /login":>12}  (connexions/s/cœur)')
+        for method in args.methods:
+            password_hash = generate_password_hash('secret', method)
+            alone = _rate(lambda: check_password_hash(password_hash, 'secret'), args.logins)
+
+            app.config['PASSWORD_HASH_METHOD'] = method
+            username = f'bench-{method}'
+            user = User(username=username)
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.commit()
+            client = app.test_client()
+            data = {'username': username, 'password': 'secret'}
+
+            def login():
+                assert client.post('/login', data=data).status_code == 302
+                client.get('/logout')
+            logins = _rate(login, args.logins)
+            print(f'{method:<24} {alone:12.1f} {logins:12.1f}')
+
+        app.config['LOGIN_MAX_FAILURES_PER_IP'] = 10 ** 9
+        client = app.test_client()
+        data = {'username': 'bench-throttled', 'password': 'wrong'}
+        for _ in range(app.config['LOGIN_MAX_FAILURES']):
+            client.post('/login', data=data)
+        throttled = _rate(lambda: client.post('/login', data=data), args.logins * 10)
+        print(f'tentatives refusées (429, sans hash) : {throttled:.0f}/s/cœur')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Chemin de lecture des listes : objets ORM ``Idea`` contre lignes Core.
+
+Pour chaque taille, lit toutes les idées d'un utilisateur et les sérialise
+en JSON (comme ``/debug/ideas``), d'abord via ``Idea.query`` puis via
+``app.read_models``. Affiche le temps CPU par ligne et le pic mémoire
+(``tracemalloc``).
+
+    python -m benchmarks.read_path --rows 10000 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import create_app, db, read_models
+from app.models import Idea, User
+from config import TestConfig
+
+FIELDS = ('id', 'title', 'status', 'timestamp')
+
+
+def orm_path(user_id):
+    ideas = Idea.query.filter_by(user_id=user_id).all()
+    return [{'id': idea.id, 'title': idea.title, 'status': idea.status,
+             'timestamp': idea.timestamp.isoformat()} for idea in ideas]
+
+
+def core_path(user_id):
+    rows = read_models.user_ideas(user_id, (Idea.id, Idea.title, Idea.status, Idea.timestamp))
+    return read_models.json_rows(rows, FIELDS)
+
+
+def peak_memory(path, user_id):
+    db.session.remove()
+    gc.collect()
+    tracemalloc.start()
+    assert path(user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for count in args.rows:
+            user = User(username=f'bench{count}', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            db.session.execute(insert(Idea), [
+                {'title': f'Idea {i}', 'description': 'x' * 200, 'tags': 'video, tips', 'status': 'Draft',
+                 'timestamp': datetime(2026, 1, 1), 'user_id': user_id} for i in range(count)])
+            db.session.commit()
+            # tracemalloc ralentit les deux chemins : temps mesurés sans lui
+            cpu = {}
+            for name, path in (('ORM', orm_path), ('Core', core_path)):
+                db.session.remove()
+                start = time.process_time()
+                path(user_id)
+                cpu[name] = time.process_time() - start
+            memory = {name: peak_memory(path, user_id) for name, path in (('ORM', orm_path), ('Core', core_path))}
+            for name in ('ORM', 'Core'):
+                print(f'{count:>7} lignes  {name:<5} {cpu[name] / count * 1e6:7.2f} µs/ligne  '
+                      f'pic {memory[name] / 2 ** 20:7.1f} Mio')
+
+
+if __name__ == '__main__':
+    main()
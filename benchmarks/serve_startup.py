@@ -0,0 +1,97 @@
+"""
+``flask serve`` : premières requêtes et mémoire des workers, avec ou sans préchauffage.
+
+Lance ``flask serve`` deux fois (préchauffage avant le fork, puis
+``--no-warmup``) avec un cache de bytecode vide, et mesure le délai entre le
+lancement et la première réponse, la latence de la première requête de
+chaque page, puis la mémoire de chaque worker après quelques requêtes :
+RSS, PSS (pages partagées réparties entre les processus) et mémoire privée.
+
+    python -m benchmarks.serve_startup --workers 2
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.suggest_concurrency import ROOT, _free_port, _prepare_database
+
+PAGES = ('/login', '/register', '/about', '/faq')
+
+
+def _memory(pid):
+    """RSS, PSS et mémoire privée (Mio) d'un processus, d'après ``smaps_rollup``."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[key] = int(rest.split()[0]) / 1024
+    return values['Rss'], values['Pss'], values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+
+
+def _workers(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def run_mode(warmup, args, env):
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}'
+    command = [sys.executable, '-m', 'flask', '--app', 'benchmarks.suggest_concurrency:bench_app()', 'serve',
+               '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), '--worker-class', 'sync']
+    if not warmup:
+        command.append('--no-warmup')
+    with tempfile.TemporaryDirectory() as cache:
+        started = time.perf_counter()
+        server = subprocess.Popen(command, cwd=ROOT, env=dict(env, TEMPLATE_CACHE_DIR=cache, SERVER_NAME=f'127.0.0.1:{port}'),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    requests.get(url + '/robots.txt', timeout=1)
+                    break
+                except requests.RequestException:
+                    if time.perf_counter() - started > 60:
+                        raise RuntimeError(f'flask serve ne répond pas sur {url}')
+                    time.sleep(0.02)
+            ready = time.perf_counter() - started
+            first = {}
+            for path in PAGES:
+                request_start = time.perf_counter()
+                requests.get(url + path).raise_for_status()
+                first[path] = (time.perf_counter() - request_start) * 1000
+            for _ in range(args.requests):
+                for path in PAGES:
+                    requests.get(url + path)
+            memory = [_memory(pid) for pid in _workers(server.pid)]
+        finally:
+            server.terminate()
+            server.wait()
+    return ready, first, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--requests', type=int, default=50, help='Tours de requêtes avant la mesure mémoire.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        _prepare_database(uri)
+        env = dict(os.environ, BENCH_DATABASE_URI=uri, SECRET_KEY='benchmark', PYTHONPATH=ROOT, LOG_FILE='')
+        for warmup in (True, False):
+            ready, first, memory = run_mode(warmup, args, env)
+            print(f'{"préchauffé" if warmup else "sans préchauffage"} : première réponse après {ready:.2f} s')
+            print('  première requête : ' + ', '.join(f'{path} {ms:.1f} ms' for path, ms in first.items()))
+            for rss, pss, private in memory:
+                print(f'  worker : RSS {rss:6.1f} Mio  PSS {pss:6.1f} Mio  privée {private:6.1f} Mio')
+
+
+if __name__ == '__main__':
+    main()
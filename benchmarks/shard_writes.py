@@ -0,0 +1,87 @@
+"""
+Débit d'écriture des idées selon ``IDEA_SHARDS``.
+
+Pour chaque nombre de shards, ``--processes`` processus écrivent en boucle
+pendant ``--duration`` secondes, chacun pour son propre utilisateur : une
+idée par transaction, avec les écritures dérivées (compteurs de tags,
+journal des modifications, signatures). Toutes les bases sont en WAL.
+Affiche les commits par seconde, tous processus confondus.
+
+    python -m benchmarks.shard_writes --shards 0 2 4 --processes 8 --duration 5
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from config import TestConfig
+
+
+def _config(directory, count):
+    class ShardConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "central.db")}'
+        IDEA_SHARDS = count
+        IDEA_SHARD_DIR = os.path.join(directory, 'shards')
+        LOG_FILE = ''
+    return ShardConfig
+
+
+def _prepare(directory, count, users):
+    from sqlalchemy import text
+
+    from app import create_app, db
+    from app.models import User
+    app = create_app(_config(directory, count))
+    with app.app_context():
+        db.create_all()
+        db.session.execute(text('PRAGMA journal_mode=WAL'))
+        for index in range(users):
+            db.session.add(User(username=f'writer-{index}', password_hash='x'))
+        db.session.commit()
+        return [user.id for user in User.query.order_by(User.id)]
+
+
+def _init(barrier):
+    global _barrier
+    _barrier = barrier
+
+
+def _write(args):
+    directory, count, user_id, duration = args
+    from app import create_app, db, shards
+    from app.models import Idea
+    app = create_app(_config(directory, count))
+    commits = 0
+    with app.app_context(), shards.use(shards.shard_of(user_id)):
+        _barrier.wait()  # toutes les applications créées
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            db.session.add(Idea(title=f'Idea {commits}', description='Benchmark idea with a few words.',
+                                tags='video,tech', status='Draft', user_id=user_id))
+            db.session.commit()
+            commits += 1
+        db.session.remove()
+    return commits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 2, 4])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    for count in args.shards:
+        with tempfile.TemporaryDirectory() as directory:
+            user_ids = _prepare(directory, count, args.processes)
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(args.processes, _init, (context.Barrier(args.processes),)) as pool:
+                commits = pool.map(_write, [(directory, count, user_id, args.duration) for user_id in user_ids],
+                                   chunksize=1)
+        print(f'IDEA_SHARDS={count:<3} {sum(commits) / args.duration:8.0f} commits/s '
+              f'({args.processes} processus)')
+
+
+if __name__ == '__main__':
+    main()
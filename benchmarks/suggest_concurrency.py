@@ -0,0 +1,133 @@
+"""
+Débit de ``/idea/suggest`` sous charge : mode synchrone contre mode gevent.
+
+Le modèle est remplacé par ``FakeModelServer`` avec une latence fixe, puis
+l'application est lancée sous gunicorn dans chaque mode avec le même nombre
+de workers. Chaque requête attend le modèle : en mode synchrone le débit
+plafonne à ``workers / latence``, en mode gevent il suit la concurrence.
+
+    pip install gunicorn gevent
+    python -m benchmarks.suggest_concurrency --latency 0.5 --concurrency 32 --requests 128
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fake_model_server import FakeModelServer
+from config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BenchConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'benchmark')  # partagée par tous les workers
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URI', 'sqlite:///:memory:')
+    GEMINI_API_KEY = 'benchmark'  # faux modèle local
+    GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL')
+    WTF_CSRF_ENABLED = False
+
+
+def bench_app():
+    """Fabrique utilisée par gunicorn : ``benchmarks.suggest_concurrency:bench_app()``."""
+    from app import create_app
+    return create_app(BenchConfig)
+
+
+def _prepare_database(uri):
+    from app import create_app, db
+    from app.models import User
+    BenchConfig.SQLALCHEMY_DATABASE_URI = uri
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url + '/login', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn ne répond pas sur {url}')
+
+
+def run_mode(worker_class, args, env):
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_BIND=f'127.0.0.1:{port}',
+               WEB_CONCURRENCY=str(args.workers))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning',
+         'benchmarks.suggest_concurrency:bench_app()'], cwd=ROOT, env=env)
+    try:
+        _wait_ready(url)
+        session = requests.Session()
+        session.post(url + '/login', data={'username': 'bench', 'password': 'bench'})
+        cookies = session.cookies.get_dict()
+
+        def one(i):
+            started = time.perf_counter()
+            response = requests.post(url + '/idea/suggest', data={'tags': f'video,{i}'},
+                                     cookies=cookies, timeout=300)
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            latencies = sorted(pool.map(one, range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'mode': worker_class,
+        'req/s': args.requests / elapsed,
+        'p50 (s)': latencies[len(latencies) // 2],
+        'p95 (s)': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5, help='Latence du faux modèle (s).')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=128)
+    parser.add_argument('--modes', default='sync,gevent')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeModelServer(args.latency) as model:
+        uri = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        _prepare_database(uri)
+        env = dict(os.environ, BENCH_DATABASE_URI=uri, GEMINI_BASE_URL=model.url,
+                   SECRET_KEY='benchmark', PYTHONPATH=ROOT)
+        results = [run_mode(mode, args, env) for mode in args.modes.split(',')]
+
+    print(f'{args.requests} requêtes, concurrence {args.concurrency}, '
+          f'{args.workers} workers, latence modèle {args.latency}s')
+    for result in results:
+        print('  '.join(f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}'
+                        for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Chargement des gabarits : compilation à froid, cache de bytecode, cache mémoire.
+
+Pour chaque gabarit, mesure le temps de ``get_template`` dans un
+environnement neuf sans cache (premier rendu d'un worker sans cache de
+bytecode), dans un environnement neuf avec le cache de bytecode déjà rempli
+(``flask templates compile``), puis une fois le gabarit en mémoire. Mesure
+ensuite une requête ``/about`` et ``/faq`` : rendu complet puis réponse
+servie par le cache de pages.
+
+    python -m benchmarks.template_render
+"""
+import argparse
+import tempfile
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+from app import create_app
+from config import TestConfig
+
+
+def _load_ms(app, name, bytecode_cache=None, repeat=5):
+    total = 0
+    for _ in range(repeat):
+        # même configuration que ``app.jinja_env`` (filtres compris), sans gabarit en mémoire
+        env = app.jinja_env.overlay(cache_size=0, bytecode_cache=bytecode_cache)
+        start = time.perf_counter()
+        env.get_template(name)
+        total += time.perf_counter() - start
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(TestConfig)
+    with app.app_context(), tempfile.TemporaryDirectory() as directory:
+        bytecode_cache = FileSystemBytecodeCache(directory)
+        names = sorted(name for name in app.jinja_env.list_templates() if name.endswith('.html'))
+        warm_env = app.jinja_env.overlay(cache_size=400, bytecode_cache=None)
+        for name in names:
+            _load_ms(app, name, bytecode_cache, repeat=1)  # remplit le cache de bytecode
+            warm_env.get_template(name)
+        print(f'{"gabarit":<28} {"à froid":>9} {"bytecode":>9} {"mémoire":>9}  (ms)')
+        for name in names:
+            start = time.perf_counter()
+            warm_env.get_template(name)
+            warm = (time.perf_counter() - start) * 1000
+            print(f'{name:<28} {_load_ms(app, name, None, args.repeat):9.2f} '
+                  f'{_load_ms(app, name, bytecode_cache, args.repeat):9.2f} {warm:9.3f}')
+
+    client = app.test_client()
+    print()
+    for path in ('/about', '/faq'):
+        app.extensions['pages'].clear()
+        start = time.perf_counter()
+        client.get(path)
+        miss = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            client.get(path)
+        hit = (time.perf_counter() - start) / args.repeat * 1000
+        print(f'{path:<8} rendu {miss:6.2f} ms, depuis le cache de pages {hit:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
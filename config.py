@@ -11,4 +11,119 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
     SQLALCHEMY_DATABASE_URI = 'sqlite:///site.db'  # DB locale SQLite
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    PERMANENT_SESSION_LIFETIME = timedelta(hours=2) # Exemple de 2 heures
\ No newline at end of file
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=2) # Exemple de 2 heures
+
+    # Idées réparties entre plusieurs bases SQLite (cf. app/shards.py), 0 : tout dans la base centrale
+    IDEA_SHARDS = int(os.environ.get('IDEA_SHARDS', 0))
+    IDEA_SHARD_DIR = 'shards'  # relatif à instance/
+    SHARD_FANOUT_THREADS = 8  # requêtes simultanées des vues admin agrégées
+    SHARD_MOVE_GRACE = 2  # secondes laissées aux requêtes en cours avant de copier un utilisateur
+
+    # Compression des réponses dynamiques (gzip / brotli)
+    COMPRESS_MIN_SIZE = 500  # octets
+    COMPRESS_LEVEL = 6
+    COMPRESS_MIMETYPES = {
+        'text/html', 'text/css', 'text/plain', 'text/csv', 'text/markdown',
+        'text/xml', 'application/json', 'application/javascript', 'application/xml',
+    }
+    # Fichiers statiques versionnés (?v=<hash>) : cache navigateur d'un an
+    STATIC_MAX_AGE = 365 * 24 * 3600
+
+    # Autocomplétion des tags (index en mémoire par worker)
+    TAG_INDEX_TTL = 300  # secondes avant reconstruction depuis la base
+    TAG_INDEX_MAX_USERS = 5000
+
+    # Purge des suppressions logiques (cf. app/purge.py)
+    PURGE_BATCH_SIZE = 500
+    PURGE_PAUSE = 0.05  # secondes entre deux lots
+    PURGE_IN_BACKGROUND = True
+
+    # Quasi-doublons : similarité MinHash (0-1) au-delà de laquelle deux idées sont identiques
+    DUPLICATE_THRESHOLD = 0.8
+
+    # Import en masse (CSV, JSONL, ZIP de fichiers Markdown), cf. app/importer.py
+    IMPORT_BATCH_SIZE = 1000  # idées par INSERT et par transaction
+    IMPORT_PARALLEL_MIN_FILES = 500  # fichiers d'une archive à partir desquels l'analyse passe par le pool
+    IMPORT_PROCESSES = None  # taille du pool, None : nombre de CPU
+
+    # Idées liées (index TF-IDF en mémoire par worker)
+    RELATED_INDEX_TTL = 600
+    RELATED_INDEX_MAX_USERS = 200
+
+    # Dashboard admin en direct (SSE)
+    DASHBOARD_SNAPSHOT_TTL = 60  # secondes avant recalcul des statistiques
+    DASHBOARD_HEARTBEAT = 15
+    DASHBOARD_STREAM_TIMEOUT = 300  # le navigateur se reconnecte ensuite
+    DASHBOARD_RETRY_MS = 3000
+
+    # Modèle IA (Gemini). GEMINI_BASE_URL : serveur compatible (tests, benchmarks)
+    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')  # obligatoire pour les suggestions
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
+    GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL')
+    GEMINI_TIMEOUT = 60  # secondes
+    SUGGEST_BATCH_SETS_PER_CALL = 10  # jeux de tags par appel au modèle (/idea/suggest/batch)
+    SUGGEST_BATCH_MAX_SETS = 50
+
+    # Logs JSON (une ligne par enregistrement), relatifs au dossier instance/
+    LOG_FILE = os.environ.get('LOG_FILE', 'logs/app.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+
+    # Journal des modifications d'idées (/api/ideas/changes)
+    CHANGE_LOG_RETENTION_DAYS = 30
+
+    # Publication programmée (flask scheduler run)
+    SCHEDULER_HORIZON = 3600  # secondes d'échéances chargées en mémoire
+    SCHEDULER_REFRESH = 30  # secondes entre deux rechargements
+    SCHEDULER_BATCH_SIZE = 500
+    SCHEDULER_MAX_ITEMS = 10000
+
+    # Archivage des idées publiées anciennes (flask archive run)
+    ARCHIVE_AFTER_DAYS = 365
+
+    # Migrations de données par lots (flask backfill run)
+    BACKFILL_BATCH_SIZE = 1000
+    BACKFILL_PAUSE = 0.05  # secondes minimum entre deux lots
+    BACKFILL_DUTY_CYCLE = 0.5  # part du temps passée à traiter des lots
+    BACKFILL_LEASE = 300  # secondes sans nouvelle avant qu'un autre processus reprenne
+
+    # Cache de bytecode Jinja (relatif à instance/, None pour désactiver) et pages statiques en mémoire
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', 'jinja_cache')
+    PAGE_CACHE_SIZE = 512  # réponses gardées par worker
+
+    # Mots de passe : coût du hash (format Werkzeug), recalculé à la connexion s'il change
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_THREADS = 2  # calculs simultanés par worker
+    PASSWORD_HASH_QUEUE = 32  # calculs en attente avant de faire patienter la requête
+    PASSWORD_HASH_WAIT = 10  # secondes d'attente d'une place, puis 503
+    LOGIN_MAX_FAILURES = 5  # par nom d'utilisateur, sur la fenêtre
+    LOGIN_MAX_FAILURES_PER_IP = 20  # 0 pour désactiver (derrière un proxy, toutes les requêtes ont son adresse)
+    LOGIN_FAILURE_WINDOW = 300  # secondes
+    LOGIN_FAILURE_MAX_KEYS = 100000
+
+    # flask serve (gunicorn) : workers et threads calculés depuis les CPU si None
+    SERVE_WORKERS = int(os.environ['WEB_CONCURRENCY']) if os.environ.get('WEB_CONCURRENCY') else None
+    SERVE_THREADS = None
+    SERVE_MAX_WORKERS = 16
+    SERVE_MAX_RSS_MB = 512  # un worker au-delà est recyclé après sa requête
+    SERVE_MAX_REQUESTS = 10000  # recyclage périodique (± 10 %)
+    SERVE_GRACEFUL_TIMEOUT = 30  # secondes laissées aux requêtes en cours à l'arrêt
+    # hôte public (ideas.example.com) : les pages en cache sont préparées pour ces URLs
+    SERVER_NAME = os.environ.get('SERVER_NAME')
+    PREFERRED_URL_SCHEME = os.environ.get('PREFERRED_URL_SCHEME', 'http')
+
+
+class TestConfig(Config):
+    """
+    Configuration utilisée par la suite de tests.
+    """
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    PURGE_IN_BACKGROUND = False
+    SHARD_MOVE_GRACE = 0
+    LOG_FILE = None
+    TEMPLATE_CACHE_DIR = None
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # hash rapide pour les tests
+    GEMINI_API_KEY = 'test-key'  # faux modèle local (benchmarks/fake_model_server.py)
@@ -0,0 +1,30 @@
+"""
+Configuration gunicorn.
+
+    gunicorn -c gunicorn.conf.py run:app
+
+En mode synchrone ou threadé, ``flask serve`` (app/serve.py) lance gunicorn
+avec l'application préchargée, préchauffée et des workers dimensionnés
+selon les CPU.
+
+Mode synchrone (défaut) : un worker par requête en cours ; une suggestion IA
+de plusieurs secondes bloque son worker pendant tout ce temps.
+
+Mode asynchrone : ``GUNICORN_WORKER_CLASS=gevent`` (``pip install gevent``).
+Chaque requête tourne dans une greenlet et les sockets sont coopératives :
+pendant qu'un appel au modèle, un export ou un flux SSE attend le réseau,
+le worker sert les autres requêtes.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class == 'gevent':
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+    # importé avant le monkey-patching des workers : httpcore charge trio s'il est
+    # installé, et trio a besoin du select.epoll d'origine
+    import httpcore  # noqa: F401
+elif worker_class == 'gthread':
+    threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 120  # générations IA lentes en mode synchrone
@@ -0,0 +1,41 @@
+"""Idea ids never reused (SQLite AUTOINCREMENT)
+
+Revision ID: 4e2b7c91a0d3
+Revises: d8eb1bdbd646
+Create Date: 2026-10-19 16:20:11.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e2b7c91a0d3'
+down_revision = 'd8eb1bdbd646'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return  # séquences : ids déjà jamais réutilisés
+    # l'index partiel est recréé à la main : son WHERE n'est pas relu par la réflexion
+    with op.batch_alter_table('idea', schema=None) as batch_op:
+        batch_op.drop_index('ix_idea_due')
+    with op.batch_alter_table('idea', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        batch_op.create_index('ix_idea_due', ['scheduled_at'], unique=False, sqlite_where=sa.text("status != 'Published'"))
+    # la séquence repart après les idées archivées
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'idea'")
+    op.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'idea', max("
+               "coalesce((SELECT max(id) FROM idea), 0), coalesce((SELECT max(id) FROM archived_idea), 0))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('idea', schema=None) as batch_op:
+        batch_op.drop_index('ix_idea_due')
+    with op.batch_alter_table('idea', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        batch_op.create_index('ix_idea_due', ['scheduled_at'], unique=False, sqlite_where=sa.text("status != 'Published'"))
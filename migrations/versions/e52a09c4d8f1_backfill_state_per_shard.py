@@ -0,0 +1,30 @@
+"""Backfill state per shard
+
+Revision ID: e52a09c4d8f1
+Revises: c3f81d6b2e47
+Create Date: 2026-10-19 19:02:51.604718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e52a09c4d8f1'
+down_revision = 'c3f81d6b2e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # clé primaire (name, shard) : table recréée, les lignes existantes vont au shard 0
+    with op.batch_alter_table('backfill_state', schema=None, recreate='always') as batch_op:
+        batch_op.add_column(sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+        batch_op.create_primary_key('pk_backfill_state', ['name', 'shard'])
+
+
+def downgrade():
+    op.execute('DELETE FROM backfill_state WHERE shard != 0')
+    with op.batch_alter_table('backfill_state', schema=None, recreate='always') as batch_op:
+        batch_op.drop_column('shard')
+        batch_op.create_primary_key('pk_backfill_state', ['name'])
@@ -0,0 +1,38 @@
+import pytest
+from app import create_app, db
+from app.models import User
+from config import TestConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def logged_client(app):
+    """Client connecté avec un utilisateur 'testuser'."""
+    user = User(username='testuser')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'testuser', 'password': 'testpass'})
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    """Client connecté avec un administrateur 'admin'."""
+    admin = User(username='admin', is_admin=True)
+    admin.set_password('adminpass')
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'adminpass'})
+    return client
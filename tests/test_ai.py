@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.fake_model_server import FakeModelServer
+
+
+@pytest.fixture
+def model(app):
+    with FakeModelServer(reply=lambda prompt: f'**Idea** for {prompt[-60:]}') as server:
+        app.config['GEMINI_BASE_URL'] = server.url
+        yield server
+
+
+def test_suggest_uses_shared_client(logged_client, model):
+    for _ in range(2):
+        response = logged_client.post('/idea/suggest', data={'tags': 'video, shorts'})
+        assert response.status_code == 200
+        assert '<strong>Idea</strong>' in response.get_data(as_text=True)
+    assert model.requests == 2
+    assert logged_client.application.extensions['ai']['client'] is not None
+
+
+def test_missing_api_key_fails_clearly(logged_client, app):
+    app.config['GEMINI_API_KEY'] = None
+    response = logged_client.post('/idea/suggest', data={'tags': 'video'})
+    assert response.status_code == 200
+    assert 'GEMINI_API_KEY is not set' in response.get_data(as_text=True)
+    response = logged_client.post('/idea/suggest/batch', json={'tag_sets': [['video']]})
+    assert response.status_code == 503
+    assert app.extensions['ai']['client'] is None
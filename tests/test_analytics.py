@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from app import db
+from app.analytics import activity_heatmap
+from app.models import Idea, User
+
+
+def _add_ideas(user, *timestamps):
+    for ts in timestamps:
+        db.session.add(Idea(title='idea', author=user, timestamp=ts))
+    db.session.commit()
+
+
+def test_activity_heatmap_groups_by_weekday_and_hour(app):
+    alice, bob = User(username='alice', password_hash='x'), User(username='bob', password_hash='x')
+    db.session.add_all([alice, bob])
+    # 2024-01-01 est un lundi, 2024-01-07 un dimanche
+    _add_ideas(alice, datetime(2024, 1, 1, 9, 15), datetime(2024, 1, 8, 9, 45), datetime(2024, 1, 7, 23, 0))
+    _add_ideas(bob, datetime(2024, 1, 3, 14, 0))
+
+    matrix = activity_heatmap()
+    assert len(matrix) == 7 and all(len(row) == 24 for row in matrix)
+    assert matrix[0][9] == 2
+    assert matrix[6][23] == 1
+    assert matrix[2][14] == 1
+    assert sum(map(sum, matrix)) == 4
+
+    assert sum(map(sum, activity_heatmap(bob.id))) == 1
+
+
+def test_activity_heatmap_endpoint(admin_client):
+    admin = User.query.filter_by(username='admin').first()
+    _add_ideas(admin, datetime(2024, 1, 5, 8, 0))
+    response = admin_client.get('/admin/api/charts/activity-heatmap')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == 1
+    assert data['weekday_totals'][4] == 1
+    assert data['matrix'][4][8] == 1
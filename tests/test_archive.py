@@ -0,0 +1,77 @@
+import io
+import zipfile
+from datetime import datetime, timedelta
+
+from app import db
+import pytest
+
+from app.archive import ArchiveError, archive, restore
+from app.models import ArchivedIdea, Idea, IdeaVector, TagCount, User
+
+OLD = datetime.utcnow() - timedelta(days=800)
+
+
+def _ideas(user):
+    old = Idea(title='Old video', description='*archived*', tags='video, travel', status='Published',
+               timestamp=OLD, author=user)
+    draft = Idea(title='Old draft', tags='video', status='Draft', timestamp=OLD, author=user)
+    newest = Idea(title='Fresh', tags='video', status='Published', author=user)
+    db.session.add_all([old, draft, newest])
+    db.session.commit()
+    return old.id, draft.id, newest.id
+
+
+def test_archive_moves_old_published_ideas(app):
+    user = User(username='alice', password_hash='x')
+    old_id, draft_id, newest_id = _ideas(user)
+
+    assert archive(days=365) == 1
+    assert db.session.get(Idea, old_id) is None and db.session.get(Idea, draft_id) is not None
+    assert db.session.get(ArchivedIdea, old_id).tags == 'video, travel'
+    assert db.session.get(IdeaVector, old_id) is None
+    assert db.session.get(TagCount, 'travel') is None  # compteurs limités à la table chaude
+    assert archive(days=365) == 0
+
+    assert restore([old_id]) == 1
+    idea = db.session.get(Idea, old_id)
+    assert idea.title == 'Old video' and idea.timestamp == OLD and idea.status == 'Published'
+    assert db.session.get(TagCount, 'travel').count == 1 and ArchivedIdea.query.count() == 0
+
+
+
+def test_archived_ids_are_never_reused(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    _, _, newest_id = _ideas(user)
+    db.session.get(Idea, newest_id).timestamp = OLD  # l'idée d'id maximal
+    db.session.commit()
+    assert archive(days=365) == 2
+    fresh = Idea(title='New', author=user)
+    db.session.add(fresh)
+    db.session.commit()
+    assert fresh.id > newest_id
+
+    # base antérieure à AUTOINCREMENT : id déjà repris par une autre idée
+    db.session.add(Idea(id=newest_id, title='Reused', author=user))
+    db.session.commit()
+    with pytest.raises(ArchiveError):
+        restore([newest_id])
+    response = logged_client.post(f'/idea/{newest_id}/restore', follow_redirects=True)
+    assert response.status_code == 200 and b'already used' in response.data
+    assert db.session.get(ArchivedIdea, newest_id) is not None
+
+
+def test_archived_ideas_are_read_through(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    old_id, _, _ = _ideas(user)
+    archive(days=365)
+
+    html = logged_client.get(f'/idea/{old_id}').get_data(as_text=True)
+    assert 'Archived' in html and '<em>archived</em>' in html
+    assert b'Old video' in logged_client.get(f'/ideas/{old_id}/export_md').data
+    html = logged_client.post('/', data={'tags': 'travel'}).get_data(as_text=True)
+    assert 'id="archived-ideas"' in html and 'Old video' in html
+    names = zipfile.ZipFile(io.BytesIO(logged_client.get('/ideas/export.zip?tag=travel').data)).namelist()
+    assert len(names) == 2
+
+    logged_client.post(f'/idea/{old_id}/restore')
+    assert db.session.get(Idea, old_id) is not None
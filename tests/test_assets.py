@@ -0,0 +1,56 @@
+import gzip
+import os
+
+from flask import url_for
+
+
+def test_large_html_is_gzipped(app):
+    client = app.test_client()
+    response = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'<html' in gzip.decompress(response.data)
+
+
+def test_no_compression_without_accept_encoding(app):
+    response = app.test_client().get('/about')
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_small_response_not_compressed(app):
+    app.config['COMPRESS_MIN_SIZE'] = 10 ** 9
+    response = app.test_client().get('/about', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_static_url_is_fingerprinted_and_immutable(app):
+    with app.test_request_context():
+        url = url_for('static', filename='robots.txt')
+    assert '?v=' in url
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == app.config['STATIC_MAX_AGE']
+    response.close()
+
+
+def test_stale_fingerprint_is_not_immutable(app):
+    response = app.test_client().get('/static/robots.txt?v=deadbeef')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    response.close()
+
+
+def test_precompressed_static_is_served(app, tmp_path):
+    with open(os.path.join(app.static_folder, 'manifest.json'), 'rb') as f:
+        original = f.read()
+    app.static_folder = str(tmp_path)
+    (tmp_path / 'manifest.json').write_bytes(original)
+    (tmp_path / 'manifest.json.gz').write_bytes(gzip.compress(original))
+    response = app.test_client().get('/static/manifest.json',
+                                      headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'application/json'
+    assert gzip.decompress(response.data) == original
+    response.close()
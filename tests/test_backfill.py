@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from app.backfill import REGISTRY, BackfillError, register, run
+from app.models import BackfillState, Idea, IdeaChangeLog, User
+
+
+@pytest.fixture
+def ideas(app):
+    user = User(username='alice', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    db.session.execute(insert(Idea), [{'title': f'Idea {i}', 'tags': ' Video, video ,TIPS', 'user_id': user.id}
+                                      for i in range(25)])
+    db.session.commit()
+
+
+def test_backfill_resumes_from_checkpoint(app, ideas):
+    state = run('tags_normalize', batch_size=10, pause=0, max_batches=2)
+    assert (state.status, state.last_id, state.processed, state.changed) == ('paused', 20, 20, 20)
+    assert Idea.query.filter_by(tags='video,tips').count() == 20
+
+    state = run('tags_normalize', batch_size=10, pause=0)
+    assert (state.status, state.processed, state.owner) == ('done', 25, None)
+    assert Idea.query.filter_by(tags='video,tips').count() == 25
+    assert IdeaChangeLog.query.count() == 25  # écritures notifiées comme les autres
+    assert run('tags_normalize').processed == 25  # déjà terminé : rien à refaire
+
+
+def test_backfill_is_claimed_by_one_process(app, ideas):
+    db.session.add(BackfillState(name='tags_normalize', status='running', owner='other:1',
+                                 heartbeat_at=db.func.now()))
+    db.session.commit()
+    with pytest.raises(BackfillError):
+        run('tags_normalize', pause=0)
+
+
+def test_failed_batch_keeps_previous_checkpoint(app, ideas):
+    calls = []
+
+    @register('flaky', 'test')
+    def flaky(session, ids):
+        calls.append(ids)
+        if len(calls) == 2:
+            raise RuntimeError('boom')
+        return 0
+
+    try:
+        with pytest.raises(RuntimeError):
+            run('flaky', batch_size=10, pause=0)
+        state = db.session.get(BackfillState, ('flaky', 0))
+        assert (state.status, state.last_id, state.error) == ('failed', 10, 'boom')
+        assert run('flaky', batch_size=10, pause=0).status == 'done'
+        assert calls[2][0] == 11
+    finally:
+        del REGISTRY['flaky']
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+
+from app import db
+from app.models import Idea, User, UserTagCount
+from app.tag_stats import top_tags
+
+
+def _ideas(user, n=5):
+    ideas = [Idea(title=f'Idea {i}', description='x', tags='video, Tips', status='Draft', author=user)
+             for i in range(n)]
+    db.session.add_all(ideas)
+    db.session.commit()
+    return [idea.id for idea in ideas]
+
+
+def test_bulk_status_is_one_update(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ids = _ideas(user)
+    other = User(username='bob', password_hash='x')
+    foreign = _ideas(other, 1)
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    response = logged_client.post('/ideas/bulk', json={'action': 'status', 'ids': ids + foreign, 'value': 'Published'})
+    assert response.get_json() == {'selected': 5, 'affected': 5}
+    assert len([s for s in statements if s.startswith('UPDATE idea')]) == 1
+    assert Idea.query.filter_by(status='Published').count() == 5
+    assert db.session.get(Idea, foreign[0]).status == 'Draft'
+
+
+def test_bulk_tags_and_delete_keep_stats_in_sync(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ids = _ideas(user, 3)
+    assert logged_client.post('/ideas/bulk', json={'action': 'add_tag', 'ids': ids[:2], 'value': 'shorts'}) \
+        .get_json()['affected'] == 2
+    assert logged_client.post('/ideas/bulk', json={'action': 'add_tag', 'ids': ids, 'value': 'VIDEO'}) \
+        .get_json()['affected'] == 0
+    assert logged_client.post('/ideas/bulk', json={'action': 'remove_tag', 'ids': ids, 'value': 'tips'}) \
+        .get_json()['affected'] == 3
+    assert db.session.get(Idea, ids[0]).tags == 'video, shorts'
+    assert dict(top_tags(10, user.id)) == {'video': 3, 'shorts': 2}
+
+    assert logged_client.post('/ideas/bulk', json={'action': 'delete', 'ids': ids[1:]}).get_json()['affected'] == 2
+    assert Idea.query.count() == 1
+    assert dict(top_tags(10, user.id)) == {'video': 1, 'shorts': 1}
+
+
+def test_bulk_duplicate_and_form_post(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ids = _ideas(user, 2)
+    response = logged_client.post('/ideas/bulk', data={'action': 'duplicate', 'ids': [str(i) for i in ids]})
+    assert response.status_code == 302
+    copies = Idea.query.filter(Idea.title.like('%(copy)')).all()
+    assert len(copies) == 2 and all(copy.status == 'Draft' for copy in copies)
+    assert db.session.get(UserTagCount, (user.id, 'video')).count == 4
+
+    response = logged_client.post('/ideas/bulk', json={'action': 'status', 'ids': ids, 'value': 'Nope'})
+    assert response.status_code == 400
+
+
+def test_bulk_duplicate_skips_existing_copies_and_bad_json(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ids = _ideas(user, 2)
+    db.session.add(Idea(title='Idea 0 (copy)', description='x', author=user))
+    db.session.commit()
+    response = logged_client.post('/ideas/bulk', json={'action': 'duplicate', 'ids': ids})
+    assert response.get_json() == {'selected': 2, 'affected': 1, 'created': 1, 'duplicates': 1}
+    assert Idea.query.filter_by(title='Idea 1 (copy)').count() == 1
+    assert logged_client.post('/ideas/bulk', json=[1, 2]).status_code == 400
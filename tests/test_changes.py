@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.changes import changes_since, compact
+from app.models import Idea, IdeaChangeLog, User
+
+
+def _sync(client, **params):
+    return client.get('/api/ideas/changes', query_string=params).get_json()
+
+
+def test_snapshot_then_deltas_with_tombstones(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ideas = [Idea(title=f'Idea {i}', author=user) for i in range(3)]
+    db.session.add_all(ideas)
+    db.session.commit()
+
+    first = _sync(logged_client, since=0, limit=2)
+    assert first['reset'] and len(first['changes']) == 2
+    rest = _sync(logged_client, **first['next'], limit=2)
+    assert [c['title'] for c in rest['changes']] == ['Idea 2'] and rest['next'] is None
+    cursor = rest['cursor']
+    assert _sync(logged_client, since=cursor)['changes'] == []
+
+    for i in range(3):
+        ideas[0].title = f'Renamed {i}'
+        db.session.commit()
+    ideas[1].deleted_at = datetime.utcnow()
+    db.session.commit()
+    delta = _sync(logged_client, since=cursor)
+    assert not delta['reset']
+    assert [(c['id'], c['op']) for c in delta['changes']] == [(ideas[0].id, 'upsert'), (ideas[1].id, 'delete')]
+    assert delta['changes'][0]['title'] == 'Renamed 2'
+    assert _sync(logged_client, since=delta['cursor'])['changes'] == []
+
+
+def test_changes_are_per_user_and_paginated(app):
+    alice, bob = User(username='alice', password_hash='x'), User(username='bob', password_hash='x')
+    db.session.add_all([Idea(title=f'A{i}', author=alice) for i in range(5)] + [Idea(title='B', author=bob)])
+    db.session.commit()
+    page = changes_since(alice.id, since=0, limit=10)
+    cursor = page['cursor']
+    for idea in Idea.query.all():
+        idea.status = 'Published'
+    db.session.commit()
+    page = changes_since(alice.id, since=cursor, limit=3)
+    assert len(page['changes']) == 3 and page['next']
+    page = changes_since(alice.id, since=page['next']['since'], limit=3)
+    assert len(page['changes']) == 2 and page['next'] is None
+
+
+def test_compaction_forces_reset_for_stale_cursors(app):
+    user = User(username='alice', password_hash='x')
+    idea = Idea(title='Old', author=user)
+    db.session.add(idea)
+    db.session.commit()
+    stale_cursor = changes_since(user.id)['cursor']
+    for title in ('One', 'Two', 'Three'):
+        idea.title = title
+        db.session.commit()
+    IdeaChangeLog.query.update({'changed_at': datetime.utcnow() - timedelta(days=60)})
+    db.session.commit()
+    assert compact(30) == 3  # la dernière entrée est conservée
+    assert changes_since(user.id, since=stale_cursor)['reset']
+    latest = IdeaChangeLog.query.one().seq
+    assert not changes_since(user.id, since=latest - 1)['reset']
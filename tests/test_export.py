@@ -0,0 +1,73 @@
+import io
+import zipfile
+from datetime import datetime
+
+from app import db
+from app.export import zip_stream
+from app.models import Idea, User
+
+
+def _add_ideas(user):
+    db.session.add_all([
+        Idea(title='Video tips', description='Cut faster', tags='video, editing', status='Draft',
+             timestamp=datetime(2026, 1, 5), author=user),
+        Idea(title='Sourdough', description='Flour and water', tags='food', status='Published',
+             timestamp=datetime(2026, 2, 5), author=user),
+        Idea(title='Video lighting', description='Softboxes', tags='videography', status='Published',
+             timestamp=datetime(2026, 3, 5), author=user),
+    ])
+    db.session.commit()
+
+
+def test_single_export_uses_shared_template(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    _add_ideas(user)
+    idea = Idea.query.filter_by(title='Video tips').first()
+    response = logged_client.get(f'/ideas/{idea.id}/export_md')
+    assert response.get_data(as_text=True) == \
+        '# Video tips\n\nCut faster\n\n**Tags:** video, editing\n**Status:** Draft'
+
+
+def test_zip_export_streams_filtered_ideas(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    _add_ideas(user)
+    response = logged_client.get('/ideas/export.zip')
+    assert response.is_streamed and response.mimetype == 'application/zip'
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    names = archive.namelist()
+    assert names[-1] == 'index.md' and len(names) == 4
+    assert 'Flour and water' in archive.read([n for n in names if 'sourdough' in n][0]).decode()
+    assert '[Video lighting](' in archive.read('index.md').decode()
+
+    # 'video' ne correspond pas à 'videography'
+    archive = zipfile.ZipFile(io.BytesIO(logged_client.get('/ideas/export.zip?tag=Video').data))
+    assert [n for n in archive.namelist() if n != 'index.md'] == [n for n in names if 'video-tips' in n]
+    archive = zipfile.ZipFile(io.BytesIO(
+        logged_client.get('/ideas/export.zip?status=Published&since=2026-03-01&until=2026-03-05').data))
+    assert len(archive.namelist()) == 2
+
+
+def test_zip_stream_yields_per_chunk(app):
+    user = User(username='alice', password_hash='x')
+    db.session.add_all([Idea(title=f'Idea {i}', description='x' * 200, author=user) for i in range(25)])
+    db.session.commit()
+    with app.test_request_context():
+        chunks = list(zip_stream(user.id, chunk_size=10))
+    assert len([c for c in chunks if c]) >= 4
+    assert len(zipfile.ZipFile(io.BytesIO(b''.join(chunks))).namelist()) == 26
+
+
+def test_zip_index_matches_files_when_ideas_change_during_export(app):
+    user = User(username='alice', password_hash='x')
+    _add_ideas(user)
+    chunks = zip_stream(user.id, chunk_size=1)
+    data = [next(chunks)]
+    # pendant l'export : une idée supprimée, une autre créée
+    db.session.delete(Idea.query.filter_by(title='Video lighting').one())
+    db.session.add(Idea(title='Late idea', author=user, timestamp=datetime(2026, 4, 5)))
+    db.session.commit()
+    data.extend(chunks)
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(data)))
+    files = sorted(name for name in archive.namelist() if name != 'index.md')
+    index = archive.read('index.md').decode()
+    assert sorted(line.split('](')[1].split(')')[0] for line in index.splitlines() if line.startswith('- [')) == files
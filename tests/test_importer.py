@@ -0,0 +1,102 @@
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import db, importer
+from app.export import zip_stream
+from app.models import Idea, User, UserTagCount
+
+
+def _user(name):
+    user = User(username=name, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _titles(user):
+    return sorted(db.session.scalars(db.select(Idea.title).where(Idea.user_id == user.id)))
+
+
+def test_import_page_accepts_jsonl(logged_client):
+    lines = [{'title': 'Lighting setup', 'description': 'Softboxes', 'tags': ['Video', 'gear'], 'status': 'To Film',
+              'timestamp': '2026-02-01T10:00:00Z'},
+             {'title': 'Sourdough', 'tags': 'food'}]
+    data = '\n'.join(json.dumps(line) for line in lines).encode()
+    response = logged_client.post('/ideas/import', data={'file': (io.BytesIO(data), 'ideas.jsonl')},
+                                  content_type='multipart/form-data', follow_redirects=True)
+    assert '2 idea(s) imported (JSONL)' in response.get_data(as_text=True)
+    idea = Idea.query.filter_by(title='Lighting setup').one()
+    assert (idea.tags, idea.status, idea.timestamp) == ('video,gear', 'To Film', datetime(2026, 2, 1, 10))
+
+    response = logged_client.post('/ideas/import', data={'file': (io.BytesIO(b'{"title": '), 'bad.jsonl')},
+                                  content_type='multipart/form-data')
+    assert 'Line 1: invalid JSON' in response.get_data(as_text=True)
+
+
+def test_csv_import_dedupes_and_normalizes_in_batches(app):
+    user = _user('alice')
+    db.session.add(Idea(title='Existing idea', author=user))
+    db.session.commit()
+    data = ('title,DESCRIPTION,tags,status,Date\n'
+            'EXISTING IDEA,again,,Draft,\n'
+            'Editing tips,Cut faster,"Video, TIPS,video",published,2026-01-05 09:30\n'
+            'Editing tips,Cut faster,video,Draft,\n'
+            ',no title,,Draft,\n'
+            'Lighting,Softboxes,gear,Nope,\n'
+            'Sourdough,Flour and water,food,Draft,\n')
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    result = importer.import_file(user.id, io.BytesIO(data.encode()), batch_size=2)
+    assert result == {'format': 'csv', 'imported': 3, 'duplicates': 2, 'invalid': 1}
+    assert len([s for s in statements if s.startswith('INSERT INTO idea ')]) == 2
+    assert _titles(user) == ['Editing tips', 'Existing idea', 'Lighting', 'Sourdough']
+    tips = Idea.query.filter_by(title='Editing tips').one()
+    assert (tips.tags, tips.status, tips.timestamp) == ('video,tips', 'Published', datetime(2026, 1, 5, 9, 30))
+    assert Idea.query.filter_by(title='Lighting').one().status == 'Draft'
+    assert db.session.get(UserTagCount, (user.id, 'video')).count == 1
+
+    with pytest.raises(importer.ImportFormatError):
+        importer.import_file(user.id, io.BytesIO(b'Name,Body\nx,y\n'))
+
+
+def _export_zip(app, user):
+    with app.test_request_context():
+        return b''.join(zip_stream(user.id))
+
+
+def test_markdown_export_round_trips(app):
+    bob, carol = _user('bob'), _user('carol')
+    db.session.add_all([Idea(title='Video tips', description='Cut faster\n\nTwo paragraphs', tags='video,editing',
+                             status='Published', author=bob),
+                        Idea(title='No description', author=bob)])
+    db.session.commit()
+
+    result = importer.import_file(carol.id, io.BytesIO(_export_zip(app, bob)))
+    assert result == {'format': 'zip', 'imported': 2, 'duplicates': 0, 'invalid': 0}
+    idea = Idea.query.filter_by(user_id=carol.id, title='Video tips').one()
+    assert (idea.description, idea.tags, idea.status) == ('Cut faster\n\nTwo paragraphs', 'video,editing', 'Published')
+    empty = Idea.query.filter_by(user_id=carol.id, title='No description').one()
+    assert (empty.description, empty.tags) == ('', None)
+
+
+def test_large_archive_is_parsed_by_the_process_pool(app):
+    user = _user('dave')
+    app.config.update(IMPORT_PARALLEL_MIN_FILES=4, IMPORT_PROCESSES=2)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('index.md', '# Ideas export\n')
+        for i in range(6):
+            archive.writestr(f'ideas/{i:06d}-idea-{i}.md', f'# Idea {i}\n\nBody {i}\n\n**Tags:** t{i}\n**Status:** Draft')
+        archive.writestr('notes/untitled-plan.md', 'Just a body')
+    try:
+        result = importer.import_file(user.id, io.BytesIO(buffer.getvalue()))
+    finally:
+        app.extensions['import_pool'].executor.shutdown()
+    assert result['imported'] == 7
+    assert _titles(user) == [f'Idea {i}' for i in range(6)] + ['untitled plan']
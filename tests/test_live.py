@@ -0,0 +1,78 @@
+import json
+import threading
+
+from sqlalchemy import event
+
+from app import db, live
+from app.models import Idea, User
+
+
+def _read_event(stream):
+    chunk = next(stream)
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith('retry'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_snapshot_is_shared_between_subscribers(admin_client, app):
+    queries = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+    feed = app.extensions['dashboard_feed']
+    first = feed.current()
+    count = len(queries)
+    for _ in range(10):
+        assert feed.current() == first
+    assert len(queries) == count
+    assert admin_client.get('/admin/api/dashboard/stats').get_json()['total_users'] == 1
+
+
+def test_stream_pushes_deltas(admin_client, app):
+    app.config['DASHBOARD_HEARTBEAT'] = 0.01
+    response = admin_client.get('/admin/api/dashboard/stream', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    kind, snapshot = _read_event(stream)
+    assert kind == 'snapshot' and snapshot['total_users'] == 1 and snapshot['total_ideas'] == 0
+
+    user = User(username='alice', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    kind, data = _read_event(stream)
+    assert kind == 'delta' and data['event']['type'] == 'user_registered'
+    assert data['stats']['total_users'] == 2
+
+    db.session.add(Idea(title='Live idea', author=user))
+    db.session.commit()
+    kind, data = _read_event(stream)
+    assert data['event']['type'] == 'idea_created' and data['stats']['total_ideas'] == 1
+    response.close()
+
+
+def test_publish_does_not_wait_for_a_rebuild(app, monkeypatch):
+    feed = app.extensions['dashboard_feed']
+    feed.current()
+    started, release = threading.Event(), threading.Event()
+    build = live.build_snapshot
+
+    def slow_build():
+        started.set()
+        release.wait(5)
+        return build()
+    monkeypatch.setattr(live, 'build_snapshot', slow_build)
+    feed.built_at = 0  # instantané expiré
+    rebuild = threading.Thread(target=_current_in_context, args=(app, feed))
+    rebuild.start()
+    assert started.wait(5)
+    done = threading.Thread(target=feed.publish, args=({'type': 'idea_created'},))
+    done.start()
+    done.join(1)
+    assert not done.is_alive()  # publish n'a pas attendu la fin du recalcul
+    release.set()
+    rebuild.join(5)
+    assert [kind for _, kind, _ in feed.events][-2:] == ['delta', 'snapshot']
+
+
+def _current_in_context(app, feed):
+    with app.app_context():
+        feed.current()
@@ -0,0 +1,100 @@
+import glob
+import json
+import logging
+import multiprocessing
+from datetime import datetime
+
+import pytest
+
+from app import db, logs
+from app.logs import JsonFormatter, SharedRotatingFileHandler, tail
+from app.models import User
+
+
+def _write(path, entries, trailing=''):
+    path.write_text(''.join(json.dumps(entry) + '\n' for entry in entries) + trailing)
+
+
+def _entry(minute, level='INFO', message='hello'):
+    return {'timestamp': f'2026-01-01T10:{minute:02d}:00.000', 'level': level, 'message': message}
+
+
+def test_tail_reads_backwards_with_filters(tmp_path):
+    path = tmp_path / 'app.log'
+    _write(tmp_path / 'app.log.1', [_entry(m) for m in range(0, 10)])
+    _write(path, [_entry(m, 'ERROR' if m % 5 == 0 else 'INFO', f'msg {m}') for m in range(10, 30)],
+           trailing='{"timestamp": "2026-01-01T10:30')  # ligne en cours d'écriture
+    path = str(path)
+
+    assert [e['message'] for e in tail(path, 3)] == ['msg 29', 'msg 28', 'msg 27']
+    assert [e['message'] for e in tail(path, 10, level='ERROR')] == ['msg 25', 'msg 20', 'msg 15', 'msg 10']
+    assert len(tail(path, 100)) == 30  # continue dans le fichier de rotation
+    since = datetime(2026, 1, 1, 10, 25)
+    assert len(tail(path, 100, since=since)) == 5
+    assert [e['message'] for e in tail(path, 100, until=datetime(2026, 1, 1, 10, 11), search='MSG')] == \
+        ['msg 11', 'msg 10']
+    assert tail(str(tmp_path / 'missing.log')) == []
+
+
+def test_json_formatter_keeps_exception_separate():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        record = logging.LogRecord('app', logging.ERROR, __file__, 1, 'boom %s', ('x',), __import__('sys').exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'boom x' and 'ZeroDivisionError' in entry['exception']
+
+
+
+def _write_records(handler, worker, count):
+    for i in range(count):
+        handler.emit(logging.LogRecord('app', logging.INFO, __file__, 1, f'worker {worker} record {i}', None, None))
+
+
+def test_rotation_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'app.log')
+    handler = SharedRotatingFileHandler(path, maxBytes=4096, backupCount=1000, encoding='utf-8')
+    handler.setFormatter(JsonFormatter())
+    context = multiprocessing.get_context('fork')  # handler hérité, comme les workers gunicorn
+    workers = [context.Process(target=_write_records, args=(handler, worker, 300)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    handler.close()
+    lines = [line for name in glob.glob(path + '*') if not name.endswith('.lock')
+             for line in open(name).read().splitlines()]
+    assert len(lines) == 4 * 300 and len({json.loads(line)['message'] for line in lines}) == 4 * 300
+    assert len(glob.glob(path + '.*')) > 2  # plusieurs rotations
+
+@pytest.fixture
+def log_file(app, tmp_path):
+    app.config['LOG_FILE'] = str(tmp_path / 'logs' / 'app.log')
+    logs.init_app(app)
+    yield app.extensions['logs']
+    app.config['LOG_FILE'] = None
+    logs.init_app(app)
+
+
+def test_admin_logs_page_shows_queued_records(app, log_file):
+    client = app.test_client()
+    client.post('/login', data={'username': 'nobody', 'password': 'wrong'})
+    logs.flush()
+    entry = json.loads(open(log_file).readlines()[-1])
+    assert entry['path'] == '/login' and entry['level'] == 'WARNING'
+
+    admin = User(username='admin', is_admin=True)
+    admin.set_password('adminpass')
+    db.session.add(admin)
+    db.session.commit()
+    client.post('/login', data={'username': 'admin', 'password': 'adminpass'})
+    html = client.get('/admin/logs?level=WARNING').get_data(as_text=True)
+    assert "Failed login for username &#39;nobody&#39;" in html
+    assert 'User login: admin' not in html
+
+
+def test_after_fork_starts_a_new_writer(app, log_file):
+    logs.after_fork()
+    app.logger.warning('from the worker')
+    logs.flush()
+    assert json.loads(open(log_file).readlines()[-1])['message'] == 'from the worker'
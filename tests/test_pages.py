@@ -0,0 +1,69 @@
+import os
+
+from flask import template_rendered
+
+from app import create_app, db
+from app.models import User
+from config import TestConfig
+
+
+def _renders(app):
+    rendered = []
+    template_rendered.connect(lambda sender, template, context, **extra: rendered.append(template.name),
+                              app, weak=False)
+    return rendered
+
+
+def test_static_pages_are_served_from_cache(app):
+    rendered = _renders(app)
+    anonymous = app.test_client()
+    first = anonymous.get('/about', headers={'Accept-Encoding': 'gzip'})
+    second = anonymous.get('/about', headers={'Accept-Encoding': 'gzip'})
+    assert first.data == second.data and second.headers['Content-Encoding'] == 'gzip'
+    assert rendered == ['about.html']
+
+    # message flash en attente : rendu normal, hors cache
+    flashed = app.test_client()
+    with flashed.session_transaction() as session:
+        session['_flashes'] = [('info', 'Hello from a flash')]
+    assert 'Hello from a flash' in flashed.get('/about').get_data(as_text=True)
+    assert len(rendered) == 2
+
+    # autre utilisateur (barre de navigation différente) : autre entrée
+    user = User(username='alice')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    assert b'alice' in client.get('/about').data
+    client.get('/about')
+    assert rendered == ['about.html', 'about.html', 'about.html']
+
+
+def test_cached_file_supports_conditional_requests(app):
+    client = app.test_client()
+    response = client.get('/robots.txt')
+    assert b'User-agent' in response.data and response.headers['ETag']
+    again = client.get('/robots.txt', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_templates_compile_fills_bytecode_cache(tmp_path):
+    class Config(TestConfig):
+        TEMPLATE_CACHE_DIR = str(tmp_path / 'jinja')
+
+    app = create_app(Config)
+    result = app.test_cli_runner().invoke(args=['templates', 'compile'])
+    assert 'gabarit(s) compilé(s)' in result.output
+    assert len(os.listdir(tmp_path / 'jinja')) == len(app.jinja_env.list_templates())
+
+
+def test_cache_key_follows_negotiated_encoding(app):
+    client = app.test_client()
+    response = client.get('/about', headers={'Accept-Encoding': 'br;q=0.1, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    # client sans gzip : jamais servi depuis l'entrée gzip
+    response = client.get('/about', headers={'Accept-Encoding': 'br'})
+    assert response.headers.get('Content-Encoding') != 'gzip'
+    assert b'<html' in response.data or response.headers['Content-Encoding'] == 'br'
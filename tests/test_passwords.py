@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from app import db, passwords
+from app.models import User
+from app.passwords import FailureLog, Hasher, PasswordBusy
+
+
+def _user(app, method):
+    app.config['PASSWORD_HASH_METHOD'] = method
+    user = User(username='alice')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_login_rehashes_with_new_parameters(app):
+    user = _user(app, 'pbkdf2:sha256:1000')
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt:1024:8:1'
+    assert passwords.needs_rehash(user.password_hash)
+
+    response = app.test_client().post('/login', data={'username': 'alice', 'password': 'secret'})
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert user.password_hash.startswith('scrypt:1024:8:1$')
+    assert not passwords.needs_rehash(user.password_hash)
+
+
+def test_repeated_failures_are_rejected_before_hashing(app, monkeypatch):
+    _user(app, 'pbkdf2:sha256:1000')
+    app.config['LOGIN_MAX_FAILURES'] = 2
+    calls = []
+    verify = passwords.verify
+    monkeypatch.setattr(passwords, 'verify', lambda *args: calls.append(args) or verify(*args))
+    client = app.test_client()
+    for _ in range(2):
+        assert client.post('/login', data={'username': 'alice', 'password': 'wrong'}).status_code == 200
+
+    response = client.post('/login', data={'username': 'Alice', 'password': 'secret'})
+    assert response.status_code == 429 and int(response.headers['Retry-After']) > 0
+    assert len(calls) == 2
+
+
+def test_failure_log_window():
+    log = FailureLog(window=60, max_keys=2)
+    log.add('a', now=0)
+    log.add('a', now=10)
+    assert log.retry_after('a', 2, now=20) == 41
+    assert log.retry_after('a', 2, now=61) == 0
+    log.add('b', now=0)
+    log.add('c', now=0)
+    assert list(log.entries) == ['b', 'c']
+
+
+def test_hasher_rejects_when_queue_is_full():
+    hasher = Hasher(threads=1, queue=0, wait=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+
+    worker = threading.Thread(target=hasher.run, args=(slow,))
+    worker.start()
+    started.wait()
+    with pytest.raises(PasswordBusy):
+        hasher.run(len, 'x')
+    release.set()
+    worker.join()
+    assert hasher.run(len, 'x') == 1
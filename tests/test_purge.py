@@ -0,0 +1,56 @@
+from app import db, live, read_models
+from app.models import Idea, User
+from app.purge import purge
+
+
+def _user_with_ideas(name, count):
+    user = User(username=name, password_hash='x')
+    db.session.add(user)
+    db.session.add_all(Idea(title=f'{name} {i}', tags='video', author=user) for i in range(count))
+    db.session.commit()
+    return user
+
+
+def test_admin_delete_user_is_soft_then_purged_in_batches(admin_client):
+    bob = _user_with_ideas('bob', 7)
+    bob_id = bob.id
+    response = admin_client.post(f'/admin/users/{bob_id}/delete')
+    assert response.get_json() == {'success': True}
+
+    # masqué immédiatement, mais encore présent physiquement
+    assert User.query.filter_by(username='bob').first() is None
+    # ses idées sortent des listes et totaux admin avant la purge
+    assert read_models.admin_idea_page(1).total == 0 and read_models.idea_status_counts() == {}
+    assert live.build_snapshot()['total_ideas'] == 0
+    assert User.query.execution_options(include_deleted=True).filter_by(id=bob_id).count() == 1
+
+    messages = []
+    assert purge(batch_size=3, pause=0, report=messages.append) == (7, 1)
+    assert len(messages) == 4  # 3 lots d'idées + le compte
+    assert Idea.query.execution_options(include_deleted=True).count() == 0
+    assert User.query.execution_options(include_deleted=True).filter_by(id=bob_id).count() == 0
+
+
+def test_deleted_idea_is_hidden_everywhere(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    idea = Idea(title='Gone', tags='video', author=user)
+    db.session.add(idea)
+    db.session.commit()
+    idea_id = idea.id
+
+    logged_client.post(f'/idea/{idea_id}/delete')
+    assert Idea.query.count() == 0
+    assert logged_client.get('/debug/ideas').get_json() == []
+    assert Idea.query.filter_by(id=idea_id).first() is None
+    assert db.session.get(Idea, idea_id, execution_options={'include_deleted': True}) is not None
+
+    assert purge(pause=0) == (1, 0)
+    assert db.session.get(Idea, idea_id, execution_options={'include_deleted': True}) is None
+
+
+def test_deleted_username_stays_reserved_until_purge(admin_client):
+    bob = _user_with_ideas('bobby', 0)
+    admin_client.post(f'/admin/users/{bob.id}/delete')
+    client = admin_client.application.test_client()
+    client.post('/register', data={'username': 'bobby', 'password': 'secret1'})
+    assert User.query.filter_by(username='bobby').first() is None
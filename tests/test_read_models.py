@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Idea, User
+from app.purge import soft_delete_idea
+
+
+@contextmanager
+def count_queries():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def _ideas(user, count=3):
+    ideas = [Idea(title=f'Idea {i}', description='Some "quoted", text', tags='video', status='Draft',
+                  timestamp=datetime(2026, 1, i + 1), author=user) for i in range(count)]
+    db.session.add_all(ideas)
+    db.session.commit()
+    return ideas
+
+
+def test_user_views_skip_deleted_ideas(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ideas = _ideas(user)
+    soft_delete_idea(ideas[0])
+
+    data = logged_client.get('/debug/ideas').get_json()
+    assert sorted(d['title'] for d in data) == ['Idea 1', 'Idea 2']
+    assert data[0]['timestamp'].startswith('2026-01-0')
+    assert logged_client.get('/ideas/export').get_data(as_text=True).splitlines() == [
+        'Title,Description,Tags,Status,Date',
+        'Idea 1,"Some ""quoted"", text",video,Draft,2026-01-02 00:00',
+        'Idea 2,"Some ""quoted"", text",video,Draft,2026-01-03 00:00',
+    ]
+    html = logged_client.get('/').get_data(as_text=True)
+    assert 'Idea 2' in html and 'Idea 0' not in html
+    assert 'Idea 1' in logged_client.get('/calendar').get_data(as_text=True)
+
+
+def test_admin_lists_use_one_query_per_list(admin_client):
+    for name in ('alice', 'bob'):
+        _ideas(User(username=name, password_hash='x'), count=5)
+
+    with count_queries() as statements:
+        html = admin_client.get('/admin/ideas').get_data(as_text=True)
+    assert 'alice' in html and 'bob' in html
+    ideas_queries = len(statements)
+
+    with count_queries() as statements:
+        html = admin_client.get('/admin/users').get_data(as_text=True)
+    assert '5 ideas created' in html
+    # pas de chargement par ligne (author, ideas)
+    assert ideas_queries <= 5 and len(statements) <= 5
@@ -0,0 +1,60 @@
+from app import db
+from app.models import Idea, IdeaVector, User
+from app.related import RelatedIndex, related_ideas, term_frequencies
+
+
+def _ideas(user):
+    return [
+        Idea(title='Editing vlogs faster', description='Proxy workflows for video editing', tags='video', author=user),
+        Idea(title='Color grading video', description='Grading footage for vlogs', tags='video', author=user),
+        Idea(title='Sourdough starter', description='Flour, water and patience', tags='food', author=user),
+        Idea(title='Baking bread at home', description='Sourdough loaves and flour types', tags='food', author=user),
+    ]
+
+
+def test_term_frequencies_weights_title_and_tags():
+    terms, weights = term_frequencies('Video tips', 'video editing', 'video')
+    assert len(terms) == 4  # video, tips, editing, #video
+    assert list(terms) == sorted(terms)
+    assert weights.max() > weights.min()
+    assert len(term_frequencies('', None, None)[0]) == 0
+
+
+def test_index_ranks_neighbours():
+    docs = [(1, 'Editing vlogs', 'video editing workflow'), (2, 'Video editing', 'cutting vlogs'),
+            (3, 'Sourdough', 'bread flour water')]
+    index = RelatedIndex((i, *term_frequencies(t, d, None)) for i, t, d in docs)
+    terms, weights = term_frequencies('Editing vlogs', 'video editing workflow', None)
+    assert [i for i, _ in index.neighbours(1, terms, weights)] == [2]
+
+    # une idée modifiée passe par le delta, l'ancienne version est ignorée
+    index.update(3, *term_frequencies('Vlog editing', 'video workflow', None))
+    assert {i for i, _ in index.neighbours(1, terms, weights)} == {2, 3}
+    index.update(2)
+    assert [i for i, _ in index.neighbours(1, terms, weights)] == [3]
+
+
+def test_related_ideas_follow_writes(app):
+    user = User(username='alice', password_hash='x')
+    ideas = _ideas(user)
+    db.session.add_all(ideas)
+    db.session.commit()
+    assert IdeaVector.query.count() == 4
+    assert related_ideas(ideas[0])[0] == ideas[1]
+    assert related_ideas(ideas[2])[0] == ideas[3]
+
+    ideas[1].title, ideas[1].description, ideas[1].tags = 'Rye bread', 'Sourdough rye flour', 'food'
+    db.session.commit()
+    assert ideas[1] not in related_ideas(ideas[0])
+    assert ideas[1] in related_ideas(ideas[2])
+
+
+def test_detail_page_lists_related_ideas(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    ideas = _ideas(user)
+    db.session.add_all(ideas)
+    db.session.commit()
+    response = logged_client.get(f'/idea/{ideas[0].id}')
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert 'Related Ideas' in html and 'Color grading video' in html
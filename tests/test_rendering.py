@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import Idea, User
+from app.rendering import _parser, description_html, digest, rebuild, render
+
+
+def test_render_escapes_html_and_unsafe_links():
+    html = render('**bold** <script>alert(1)</script> [x](javascript:alert(1)) [y](https://example.com)')
+    assert '<strong>bold</strong>' in html
+    assert '<script>' not in html and '&lt;script&gt;' in html
+    assert 'javascript:' not in html and 'href="https://example.com"' in html
+
+
+@pytest.mark.parametrize('url', ['javascript&colon;alert(1)', 'javascript&#58;alert(1)', 'java\tscript:alert(1)',
+                                 'java&#x0A;script:alert(1)', 'java&Tab;script&colon;alert(1)',
+                                 '\x01javascript:alert(1)', 'data:text/html;base64,PHNjcmlwdD4='])
+def test_unsafe_schemes_are_read_like_a_browser(url):
+    html = render(f'[x]({url}) ![i]({url})')
+    assert 'href' not in html and 'src' not in html
+
+
+def test_safe_and_relative_links_are_kept():
+    html = render('[a](/idea/1) [b](?page=2) [c](#top) [d](mailto:me@example.com) [e](HTTPS://example.com/a:b)')
+    assert html.count('href=') == 5
+
+
+def test_parser_is_shared_per_thread():
+    assert _parser() is _parser()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(_parser()))
+    thread.start()
+    thread.join()
+    assert other[0] is not _parser()
+    # reset() entre deux rendus : pas de fuite des références de liens
+    render('[a][ref]\n\n[ref]: https://example.com')
+    assert 'href' not in render('[a][ref]')
+
+
+def test_html_is_stored_and_refreshed_on_edit(app):
+    idea = Idea(title='Idea', description='*one*', author=User(username='alice', password_hash='x'))
+    db.session.add(idea)
+    db.session.commit()
+    assert idea.description_html == '<p><em>one</em></p>' and idea.description_hash == digest('*one*')
+
+    idea.description = '*two*'
+    db.session.commit()
+    assert idea.description_html == '<p><em>two</em></p>'
+
+    # écriture hors ORM : l'empreinte ne correspond plus, rendu à la volée puis rebuild
+    db.session.execute(update(Idea).values(description='*three*'))
+    db.session.commit()
+    assert description_html(idea) == '<p><em>three</em></p>'
+    assert rebuild() == 1 and rebuild() == 0
+
+
+def test_index_renders_descriptions(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Idea(title='Idea', description='- first\n- second', author=user))
+    db.session.commit()
+    assert '<li>second</li>' in logged_client.get('/').get_data(as_text=True)
@@ -1,12 +1,11 @@
 import pytest
 from app import create_app, db
 from app.models import User
+from config import TestConfig
 
 @pytest.fixture
 def client():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(TestConfig)
     with app.test_client() as client:
         with app.app_context():
             db.create_all()
@@ -29,13 +28,12 @@ def test_login(client):
     response = client.post('/login', data={'username': 'testuser', 'password': 'testpass'})
     assert response.status_code == 302  # Redirect to indeximport pytest
 from app import create_app, db
-from app.models import User
+from app.models import Idea, User
+from config import TestConfig
 
 @pytest.fixture
 def client():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app(TestConfig)
     with app.test_client() as client:
         with app.app_context():
             db.create_all()
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from app import db
+from app.models import Idea, IdeaChangeLog, User
+from app.backfill import run
+from app.scheduler import Scheduler, _due, publish, publish_due
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def _schedule(user, minutes, status='Draft'):
+    idea = Idea(title=f'In {minutes} min', status=status, author=user,
+                scheduled_at=NOW + timedelta(minutes=minutes))
+    db.session.add(idea)
+    return idea
+
+
+def test_publish_due_claims_each_idea_once(app):
+    user = User(username='alice', password_hash='x')
+    past = [_schedule(user, -m) for m in (1, 2, 3)]
+    future = _schedule(user, 10)
+    published = Idea(title='Done', status='Published', author=user)
+    db.session.add(published)
+    db.session.commit()
+    seq = db.session.scalar(select(IdeaChangeLog.seq).order_by(IdeaChangeLog.seq.desc()).limit(1))
+
+    assert publish_due(NOW, batch_size=2) == 3
+    # la date programmée devient la date de publication
+    assert all(idea.status == 'Published' and idea.scheduled_at is None and idea.published_at < NOW
+               for idea in past)
+    assert publish_due(NOW) == 0
+    assert future.status == 'Draft' and published.status == 'Published'
+    # déjà réservées : un second planificateur ne republie rien
+    assert publish([idea.id for idea in past], NOW) == 0
+    assert db.session.query(IdeaChangeLog).filter(IdeaChangeLog.seq > seq).count() == 3
+
+
+def test_due_query_uses_partial_index(app):
+    query = select(Idea.id).where(*_due(NOW)).order_by(Idea.scheduled_at)
+    sql = str(query.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plan = ' '.join(row[-1] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+    assert 'ix_idea_due' in plan
+
+
+def test_scheduler_sleeps_until_next_due_item(app):
+    user = User(username='alice', password_hash='x')
+    first, second = _schedule(user, 5), _schedule(user, 7)
+    _schedule(user, 600)  # hors fenêtre
+    db.session.commit()
+    scheduler = Scheduler(horizon=3600, refresh=30 * 60)
+
+    assert scheduler.tick(NOW) == 300
+    assert len(scheduler.heap) == 2
+    assert scheduler.tick(NOW + timedelta(minutes=5)) == 120
+    assert first.status == 'Published' and second.status == 'Draft'
+    # reprogrammée plus tard : l'entrée périmée du tas ne publie rien
+    second.scheduled_at = NOW + timedelta(minutes=20)
+    db.session.commit()
+    scheduler.tick(NOW + timedelta(minutes=7))
+    assert second.status == 'Draft' and scheduler.published == 1
+
+
+def test_form_schedules_idea(logged_client):
+    logged_client.post('/idea/new', data={'title': 'Later', 'status': 'Draft',
+                                          'scheduled_at': '2026-06-01T09:30'})
+    assert Idea.query.filter_by(title='Later').one().scheduled_at == datetime(2026, 6, 1, 9, 30)
+    later = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M')
+    response = logged_client.post('/idea/new', data={'title': 'Now', 'status': 'Published', 'scheduled_at': later})
+    assert b'already published' in response.data
+    logged_client.post('/idea/new', data={'title': 'Done', 'status': 'Published'})
+    assert Idea.query.filter_by(title='Done').one().published_at is not None
+
+
+def test_unpublished_idea_is_not_due_again(logged_client):
+    user = User.query.filter_by(username='testuser').one()
+    idea = _schedule(user, -5)
+    db.session.commit()
+    assert publish_due(NOW) == 1
+    assert idea.published_at == NOW - timedelta(minutes=5)
+
+    response = logged_client.post('/ideas/bulk', json={'action': 'status', 'ids': [idea.id], 'value': 'Draft'})
+    assert response.get_json()['affected'] == 1
+    assert idea.status == 'Draft' and idea.published_at is None
+    assert publish_due(NOW) == 0
+    assert idea.status == 'Draft'
+    # republiée à la main : date de publication du jour, sans programmation
+    logged_client.post('/ideas/bulk', json={'action': 'status', 'ids': [idea.id], 'value': 'Published'})
+    assert idea.published_at > NOW and idea.scheduled_at is None
+
+
+def test_bulk_reschedule(logged_client):
+    user = User.query.filter_by(username='testuser').one()
+    draft, done = _schedule(user, 5), Idea(title='Done', status='Published', author=user)
+    db.session.add(done)
+    db.session.commit()
+    response = logged_client.post('/ideas/bulk', json={'action': 'reschedule', 'ids': [draft.id, done.id],
+                                                      'value': '2026-05-02T08:00'})
+    assert response.get_json() == {'selected': 2, 'affected': 1}
+    assert draft.scheduled_at == datetime(2026, 5, 2, 8, 0) and done.scheduled_at is None
+    assert logged_client.post('/ideas/bulk', json={'action': 'reschedule', 'ids': [draft.id], 'value': ''}) \
+        .get_json()['affected'] == 1
+    assert draft.scheduled_at is None
+    assert logged_client.post('/ideas/bulk', json={'action': 'reschedule', 'ids': [draft.id],
+                                                   'value': 'tomorrow'}).status_code == 400
+
+
+def test_backfill_moves_publish_dates(app):
+    user = User(username='alice', password_hash='x')
+    legacy, draft = _schedule(user, -5, status='Published'), _schedule(user, 5)
+    db.session.commit()
+    assert run('published_at', pause=0).changed == 1
+    assert (legacy.scheduled_at, legacy.published_at) == (None, NOW - timedelta(minutes=5))
+    assert draft.scheduled_at == NOW + timedelta(minutes=5) and draft.published_at is None
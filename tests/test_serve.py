@@ -0,0 +1,59 @@
+import gc
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app, db
+from app.serve import PAGES, Server, options, tune, warmup
+from config import TestConfig
+
+
+def test_tune_sizes_workers_from_cpus():
+    assert tune('sync', 4) == (9, 1)
+    assert tune('gthread', 4) == (5, 4)
+    assert tune('gthread', 4, workers=2, threads=8) == (2, 8)
+    assert tune('sync', 32, max_workers=16) == (16, 1)
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "serve.db"}'
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_warmup_primes_templates_and_pages(file_app):
+    file_app.config.update(SERVER_NAME='ideas.example.com', PREFERRED_URL_SCHEME='https')
+    try:
+        templates, static = warmup(file_app)
+    finally:
+        gc.unfreeze()
+    assert templates == len(file_app.jinja_env.list_templates()) and static > 0
+    assert len(file_app.jinja_env.cache) >= templates
+    keys = file_app.extensions['pages'].entries
+    assert {key[2:] for key in keys if key[0] == 'main.about'} == {(None, 'br'), (None, 'gzip'), (None, None)}
+    # les requêtes réelles sur l'hôte public trouvent ces entrées
+    file_app.test_client().get('/about', base_url='https://ideas.example.com', headers={'Accept-Encoding': 'gzip'})
+    assert len(keys) == len(PAGES) * 3
+
+
+def test_warmup_skips_pages_without_server_name(file_app):
+    try:
+        warmup(file_app)
+    finally:
+        gc.unfreeze()
+    assert not file_app.extensions['pages'].entries
+
+
+def test_post_request_recycles_a_worker_over_the_memory_limit(file_app):
+    server = Server(file_app, options(file_app.config, '127.0.0.1:0', 'sync', 1, None))
+    assert server.cfg.preload_app and server.cfg.workers == 1
+    worker = SimpleNamespace(alive=True, pid=1, log=file_app.logger)
+    server.post_request(worker, None, {}, None)
+    assert worker.alive
+    file_app.config['SERVE_MAX_RSS_MB'] = 1
+    server.post_request(worker, None, {}, None)
+    assert not worker.alive
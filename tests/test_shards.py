@@ -0,0 +1,224 @@
+import io
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app, db, read_models, shards
+from app.backfill import schedule
+from app.models import BackfillState, Idea, User, UserTagCount
+from app.shards import ID_STRIDE, ShardError, initialize, move_user, plan_rebalance
+from app.tag_stats import top_tags
+from config import TestConfig
+
+
+def _config(tmp_path, count):
+    class ShardConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "central.db"}'
+        IDEA_SHARDS = count
+        IDEA_SHARD_DIR = str(tmp_path / 'shards')
+    return ShardConfig
+
+
+@pytest.fixture
+def shard_app(tmp_path):
+    app = create_app(_config(tmp_path, 2))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        shards.dispose()
+
+
+def _user(name, **kwargs):
+    user = User(username=name, **kwargs)
+    user.set_password('pass')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _ideas(user, count, tags='video', day=1):
+    with shards.use(shards.shard_of(user)):
+        db.session.add_all([Idea(title=f'{user.username} {i}', tags=tags, status='Draft', user_id=user.id,
+                                 timestamp=datetime(2026, 1, day + i)) for i in range(count)])
+        db.session.commit()
+
+
+def _titles(shard):
+    with shards.use(shard):
+        return sorted(db.session.scalars(db.select(Idea.title)))
+
+
+def test_ideas_are_written_to_the_author_shard(shard_app):
+    alice, bob = _user('alice'), _user('bob')
+    assert (alice.shard, bob.shard) == (0, 1)
+    _ideas(alice, 1)
+    client = shard_app.test_client()
+    client.post('/login', data={'username': 'bob', 'password': 'pass'})
+    assert client.post('/idea/new', data={'title': 'bob idea', 'tags': 'fun', 'status': 'Draft'}).status_code == 302
+    html = client.get('/').get_data(as_text=True)
+    assert 'bob idea' in html and 'alice 0' not in html
+
+    assert _titles(0) == ['alice 0'] and _titles(1) == ['bob idea']
+    with shards.use(1):
+        assert db.session.scalar(db.select(Idea.id)) > ID_STRIDE
+    with pytest.raises(ShardError):
+        Idea.query.count()
+
+
+def test_streamed_zip_export_reads_the_user_shard(shard_app):
+    alice, bob = _user('alice'), _user('bob')
+    _ideas(alice, 1)
+    _ideas(bob, 2)
+    client = shard_app.test_client()
+    client.post('/login', data={'username': 'bob', 'password': 'pass'})
+    response = client.get('/ideas/export.zip')
+    assert response.status_code == 200 and response.is_streamed
+    names = zipfile.ZipFile(io.BytesIO(response.data)).namelist()
+    assert len([name for name in names if name != 'index.md']) == 2
+
+def test_admin_views_merge_every_shard(shard_app):
+    alice, bob = _user('alice'), _user('bob')
+    _ideas(alice, 3, tags='video', day=1)
+    _ideas(bob, 2, tags='video,tech', day=10)
+
+    page = read_models.admin_idea_page(1, per_page=3)
+    assert page.total == 5
+    assert [row.title for row in page.items] == ['bob 1', 'bob 0', 'alice 2']
+    assert [row.author_name for row in read_models.admin_idea_page(2, per_page=3).items] == ['alice', 'alice']
+    assert read_models.idea_status_counts() == {'Draft': 5}
+    assert [row.idea_count for row in read_models.admin_user_page(1).items] == [3, 2]
+    assert top_tags(2) == [('video', 5), ('tech', 2)]
+    assert top_tags(2, user_id=bob.id) == [('tech', 2), ('video', 2)]
+
+    _user('admin', is_admin=True)
+    client = shard_app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'pass'})
+    assert 'bob 1' in client.get('/admin/').get_data(as_text=True)
+    with shards.use(1):
+        idea_id = db.session.scalar(db.select(Idea.id).where(Idea.title == 'bob 0'))
+    assert client.post(f'/admin/ideas/{idea_id}/delete').get_json() == {'success': True}
+    assert read_models.idea_status_counts() == {'Draft': 4}
+
+
+def test_move_and_rebalance(shard_app):
+    alice, bob = _user('alice'), _user('bob')
+    _ideas(alice, 3)
+    _ideas(bob, 1)
+
+    assert move_user(alice.id, 1) == 3
+    assert alice.shard == 1
+    assert _titles(0) == [] and _titles(1) == ['alice 0', 'alice 1', 'alice 2', 'bob 0']
+    with shards.use(1):
+        assert db.session.get(UserTagCount, (alice.id, 'video')).count == 3
+    with shards.use(0):
+        assert db.session.get(UserTagCount, (alice.id, 'video')) is None
+
+    assert plan_rebalance() == [(alice.id, 1, 0, 3)]
+
+
+def test_move_blocks_writes_and_keeps_late_ideas(shard_app, monkeypatch):
+    alice = _user('alice')
+    _ideas(alice, 2)
+    client = shard_app.test_client()
+    client.post('/login', data={'username': 'alice', 'password': 'pass'})
+    late = []
+
+    def write_during_move(seconds):
+        # requête en cours au début du déplacement, puis nouvelle requête refusée
+        _ideas(alice, 1, day=20)
+        late.append(client.post('/idea/new', data={'title': 'blocked', 'status': 'Draft'}).status_code)
+        assert client.get('/').status_code == 200
+    monkeypatch.setattr(shards.time, 'sleep', write_during_move)
+
+    assert move_user(alice.id, 1) == 3
+    assert late == [503] and alice.moving_at is None
+    assert _titles(1) == ['alice 0', 'alice 0', 'alice 1'] and _titles(0) == []
+    assert client.post('/idea/new', data={'title': 'after', 'status': 'Draft'}).status_code == 302
+
+    # écrite après la lecture : pas copiée, donc pas supprimée de la source
+    read = shards._read
+
+    def read_then_write(user_id):
+        rows = read(user_id)
+        _ideas(alice, 1, day=25)
+        return rows
+    monkeypatch.setattr(shards.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(shards, '_read', read_then_write)
+    with pytest.raises(ShardError):
+        move_user(alice.id, 0)
+    assert _titles(1) == ['alice 0'] and len(_titles(0)) == 4
+
+
+def test_init_spreads_central_ideas_keeping_ids(tmp_path):
+    app = create_app(_config(tmp_path, 0))
+    with app.app_context():
+        db.create_all()
+        for name in ('alice', 'bob', 'carol'):
+            _ideas(_user(name), {'alice': 3, 'bob': 2, 'carol': 1}[name])
+        ids = dict(db.session.execute(db.select(Idea.title, Idea.id)).all())
+        db.session.remove()
+
+    app = create_app(_config(tmp_path, 2))
+    with app.app_context():
+        try:
+            assert initialize() == 3
+            assert [user.shard for user in User.query.order_by(User.id)] == [0, 1, 1]
+            with shards.use(1):
+                assert dict(db.session.execute(db.select(Idea.title, Idea.id)).all()) == {
+                    title: ids[title] for title in ('bob 0', 'bob 1', 'carol 0')}
+            _ideas(db.session.get(User, 1), 1, day=20)
+            with shards.use(0):
+                assert db.session.scalar(db.select(db.func.max(Idea.id))) == max(ids.values()) + 1
+        finally:
+            db.session.remove()
+            shards.dispose()
+
+
+def test_backfill_runs_on_every_shard(shard_app):
+    alice, bob = _user('alice'), _user('bob')
+    _ideas(alice, 2, tags=' Video, video ')
+    _ideas(bob, 3, tags='TIPS')
+    schedule(SimpleNamespace(get_bind=db.session.connection), 'tags_normalize')  # comme une migration
+    db.session.commit()
+    runner = shard_app.test_cli_runner()
+
+    result = runner.invoke(args=['backfill', 'run', '--pending', '--pause', '0'])
+    assert result.exit_code == 0, result.output
+    with shards.use(0):
+        assert db.session.scalars(db.select(Idea.tags)).all() == ['video', 'video']
+    with shards.use(1):
+        assert db.session.scalars(db.select(Idea.tags)).all() == ['tips'] * 3
+    # points de reprise dans la base centrale, un par shard
+    assert db.session.execute(db.select(BackfillState.shard, BackfillState.status, BackfillState.processed)
+                              .where(BackfillState.name == 'tags_normalize')
+                              .order_by(BackfillState.shard)).all() == [(0, 'done', 2), (1, 'done', 3)]
+
+    result = runner.invoke(args=['shards', 'each', 'backfill', 'run', '--pending'])
+    assert result.exit_code == 0 and result.output.count('Aucun backfill en attente.') == 2
+    result = runner.invoke(args=['backfill', 'list'])
+    assert result.exit_code == 0 and 'tags_normalize [1]' in result.output
+
+
+def test_shard_schema_follows_the_models(tmp_path):
+    app = create_app(_config(tmp_path, 1))
+    with app.app_context():
+        with shards.engines()[0].begin() as connection:
+            connection.execute(db.text('DROP INDEX ix_idea_due'))
+            connection.execute(db.text('ALTER TABLE idea DROP COLUMN published_at'))
+        shards.dispose()
+
+    # colonne et index ajoutés au démarrage suivant (migration de la base centrale)
+    app = create_app(_config(tmp_path, 1))
+    with app.app_context():
+        engine = shards.engines()[0]
+        assert 'published_at' in {column['name'] for column in db.inspect(engine).get_columns('idea')}
+        assert 'ix_idea_due' in {index['name'] for index in db.inspect(engine).get_indexes('idea')}
+        with engine.begin() as connection:
+            connection.execute(db.text("ALTER TABLE idea ADD COLUMN legacy VARCHAR(10) NOT NULL DEFAULT ''"))
+        shards.dispose()
+
+    with pytest.raises(ShardError, match='legacy'):
+        create_app(_config(tmp_path, 1))
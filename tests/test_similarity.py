@@ -0,0 +1,64 @@
+import io
+
+from app import db
+from app.models import Idea, IdeaSignature, User
+from app.similarity import duplicate_clusters, find_duplicate, signature, similarity
+
+LONG = ("Ten productivity tips for remote video editors, covering keyboard shortcuts, "
+        "proxy workflows and how to organise footage before the first cut.")
+
+
+def test_signature_similarity_orders_texts():
+    base = signature('Remote editing tips', LONG)
+    close = signature('Remote editing tips!', LONG.replace('first', '1st'))
+    other = signature('Sourdough starter basics', 'Flour, water and a lot of patience.')
+    assert similarity(base, [close])[0] > 0.8
+    assert similarity(base, [other])[0] < 0.2
+    assert signature('', None) is None
+
+
+def test_index_follows_writes_and_finds_duplicates(app):
+    user = User(username='alice', password_hash='x')
+    idea = Idea(title='Remote editing tips', description=LONG, author=user)
+    db.session.add(idea)
+    db.session.commit()
+    assert IdeaSignature.query.count() == 1
+    assert find_duplicate(user.id, 'Remote editing tips', LONG) == idea.id
+    assert find_duplicate(user.id, 'Sourdough basics', 'Flour and water') is None
+    assert find_duplicate(user.id + 1, 'Remote editing tips', LONG) is None
+
+    idea.description = 'Completely different content about sourdough bread baking.'
+    db.session.commit()
+    assert find_duplicate(user.id, 'Remote editing tips', LONG) is None
+
+
+def test_import_skips_near_duplicates(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Idea(title='Remote editing tips', description=LONG, author=user))
+    db.session.commit()
+    csv_data = ("Title,Description,Tags,Status\n"
+                f'Remote editing tips,"{LONG}",video,Draft\n'
+                "Sourdough basics,Flour and water,food,Draft\n"
+                "Sourdough basics,Flour and water,food,Draft\n")
+    logged_client.post('/ideas/import', data={'file': (io.BytesIO(csv_data.encode()), 'ideas.csv')},
+                       content_type='multipart/form-data')
+    assert sorted(i.title for i in Idea.query.all()) == ['Remote editing tips', 'Sourdough basics']
+
+
+def test_create_from_suggestion_rejects_duplicate(logged_client):
+    payload = {'title': 'Remote editing tips', 'description': LONG}
+    assert logged_client.post('/idea/create_from_suggestion', json=payload).get_json()['success']
+    response = logged_client.post('/idea/create_from_suggestion', json=payload)
+    assert response.status_code == 409
+    assert Idea.query.count() == 1
+
+
+def test_duplicate_clusters(app):
+    user = User(username='alice', password_hash='x')
+    ideas = [Idea(title='Remote editing tips', description=LONG, author=user),
+             Idea(title='Remote editing tips (copy)', description=LONG, author=user),
+             Idea(title='Remote editing tips', description=LONG + ' Bonus!', author=user),
+             Idea(title='Sourdough basics', description='Flour and water', author=user)]
+    db.session.add_all(ideas)
+    db.session.commit()
+    assert duplicate_clusters(user.id) == [sorted(i.id for i in ideas[:3])]
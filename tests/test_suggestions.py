@@ -0,0 +1,67 @@
+import json
+import re
+
+import pytest
+
+from benchmarks.fake_model_server import FakeModelServer
+
+SETS = [['video', 'shorts'], 'food, baking', ['#Travel']]
+
+
+def structured(prompt, skip=()):
+    """Réponse JSON du faux modèle pour chaque « Set N: tags » du prompt."""
+    results = [{'set': int(number), 'ideas': [
+        {'title': f'{tags} idea', 'description': 'Why not', 'hashtags': ['#Trending', tags.split(',')[0]]}]}
+        for number, tags in re.findall(r'^Set (\d+): (.*)$', prompt, re.M) if int(number) not in skip]
+    return json.dumps({'results': results})
+
+
+def free_text(prompt):
+    return '1. **#diy** Build a desk\n2. Weekly vlog #vlog\nSome closing words.'
+
+
+@pytest.fixture
+def model(app):
+    with FakeModelServer() as server:
+        app.config['GEMINI_BASE_URL'] = server.url
+        yield server
+
+
+def test_batch_packs_tag_sets_into_one_call(logged_client, model):
+    model.reply = structured
+    data = logged_client.post('/idea/suggest/batch', json={'tag_sets': SETS}).get_json()
+    assert data['calls'] == model.requests == 1
+    assert model.last_request['generationConfig']['responseMimeType'] == 'application/json'
+    assert [r['tags'] for r in data['results']] == ['video,shorts', 'food,baking', 'travel']
+    idea = data['results'][1]['ideas'][0]
+    assert idea == {'title': 'food, baking idea', 'description': 'Why not',
+                    'hashtags': ['trending', 'food'], 'tags': 'food,baking,trending'}
+    # prêt pour create_from_suggestion
+    assert logged_client.post('/idea/create_from_suggestion', json=idea).get_json()['success']
+
+
+def test_batch_is_split_by_chunk_size(app, logged_client, model):
+    model.reply = structured
+    app.config['SUGGEST_BATCH_SETS_PER_CALL'] = 2
+    data = logged_client.post('/idea/suggest/batch', json={'tag_sets': SETS}).get_json()
+    assert data['calls'] == 2 and all(not r['fallback'] for r in data['results'])
+
+
+def test_falls_back_per_set_when_parsing_fails(logged_client, model):
+    model.reply = lambda prompt: structured(prompt, skip={2}) if prompt.startswith('Suggest creative content ideas for each') \
+        else free_text(prompt)
+    data = logged_client.post('/idea/suggest/batch', json={'tag_sets': SETS}).get_json()
+    assert data['calls'] == 2 and [r['fallback'] for r in data['results']] == [False, True, False]
+    assert [i['title'] for i in data['results'][1]['ideas']] == ['Build a desk', 'Weekly vlog']
+    assert data['results'][1]['ideas'][0]['tags'] == 'food,baking,diy'
+
+    model.reply = lambda prompt: 'not json' if 'JSON' in prompt else free_text(prompt)
+    data = logged_client.post('/idea/suggest/batch', json={'tag_sets': SETS}).get_json()
+    assert data['calls'] == 4 and all(r['fallback'] for r in data['results'])
+
+
+def test_batch_rejects_bad_input(logged_client, model):
+    assert logged_client.post('/idea/suggest/batch', json={'tag_sets': []}).status_code == 400
+    assert logged_client.post('/idea/suggest/batch', json={'tag_sets': [' , ']}).status_code == 400
+    assert logged_client.post('/idea/suggest/batch', json={'tag_sets': ['a'] * 51}).status_code == 400
+    assert model.requests == 0
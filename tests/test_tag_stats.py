@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from app import db
+from app import tag_stats
+from app.purge import purge
+from app.models import Idea, TagCount, TagPairCount, User, UserTagCount
+
+
+def _user(name):
+    user = User(username=name, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_counts_follow_idea_writes(app):
+    alice, bob = _user('alice'), _user('bob')
+    idea = Idea(title='a', tags='video,Tech', author=alice, timestamp=datetime(2024, 3, 2))
+    db.session.add_all([idea, Idea(title='b', tags='tech,fun', author=bob)])
+    db.session.commit()
+
+    assert tag_stats.top_tags(2) == [('tech', 2), ('fun', 1)]
+    assert tag_stats.top_tags(5, user_id=alice.id) == [('tech', 1), ('video', 1)]
+    assert ('tech', 'video', 1) in tag_stats.tag_pairs()
+    assert tag_stats.tag_trends(['video']) == {'video': [('2024-03', 1)]}
+
+    idea.tags = 'fun'
+    db.session.commit()
+    assert tag_stats.top_tags(5) == [('fun', 2), ('tech', 1)]
+    assert db.session.get(TagPairCount, ('tech', 'video')) is None
+
+    db.session.delete(idea)
+    db.session.commit()
+    assert tag_stats.top_tags(5) == [('fun', 1), ('tech', 1)]
+    assert db.session.get(UserTagCount, (alice.id, 'fun')) is None
+
+
+def test_rollback_leaves_counts_untouched(app):
+    alice = _user('alice')
+    db.session.add(Idea(title='a', tags='video', author=alice))
+    db.session.flush()
+    db.session.rollback()
+    assert TagCount.query.count() == 0
+
+
+def test_rebuild_matches_incremental(app):
+    alice = _user('alice')
+    for i in range(20):
+        db.session.add(Idea(title=str(i), tags='x,y' if i % 2 else 'y', author=alice))
+    db.session.commit()
+    incremental = (tag_stats.top_tags(10), tag_stats.tag_pairs())
+    assert tag_stats.rebuild() == 20
+    assert (tag_stats.top_tags(10), tag_stats.tag_pairs()) == incremental
+
+
+def test_admin_delete_user_updates_counts(admin_client):
+    bob = _user('bob')
+    db.session.add(Idea(title='a', tags='video', author=bob))
+    db.session.commit()
+    response = admin_client.post(f'/admin/users/{bob.id}/delete')
+    assert response.get_json() == {'success': True}
+    purge(pause=0)
+    assert tag_stats.top_tags() == []
+
+
+def test_normalize_tag_column_matches_normalize_tags():
+    values = ['Video, tips,video', None, '', ' , ', 'x' * 120 + ',b', 'Été, été,Fun']
+    assert tag_stats.normalize_tag_column(values) == [tag_stats.normalize_tags(v) for v in values]
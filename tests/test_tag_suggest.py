@@ -0,0 +1,37 @@
+from app import db
+from app.models import Idea, User
+from app.tag_suggest import TagIndex
+
+
+def test_tag_index_prefix_ranking():
+    index = TagIndex({'tech': 3, 'tutorial': 5, 'travel': 1, 'video': 2, 'tiktok': 3})
+    assert index.suggest('t', 3) == [('tutorial', 5), ('tech', 3), ('tiktok', 3)]
+    assert index.suggest('tr') == [('travel', 1)]
+    assert index.suggest('x') == []
+
+    index.apply({'travel': -1, 'trends': 2})
+    assert index.suggest('tr') == [('trends', 2)]
+    assert 'travel' not in index.sorted_tags
+
+
+def test_suggest_endpoint_follows_writes(logged_client):
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add(Idea(title='a', tags='video,vlog', author=user))
+    db.session.add(Idea(title='b', tags='vlog', author=user))
+    db.session.commit()
+
+    response = logged_client.get('/tags/suggest?q=fun, v')
+    assert response.get_json() == [{'tag': 'vlog', 'count': 2}, {'tag': 'video', 'count': 1}]
+
+    # l'index déjà construit est mis à jour sans relire la base
+    db.session.add(Idea(title='c', tags='viral', author=user))
+    db.session.commit()
+    tags = [item['tag'] for item in logged_client.get('/tags/suggest?q=vi').get_json()]
+    assert tags == ['video', 'viral']
+
+
+def test_suggest_is_scoped_to_current_user(logged_client):
+    other = User(username='other', password_hash='x')
+    db.session.add(Idea(title='a', tags='secret', author=other))
+    db.session.commit()
+    assert logged_client.get('/tags/suggest?q=s').get_json() == []